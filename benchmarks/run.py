@@ -0,0 +1,291 @@
+"""Offline micro-benchmarks for the non-model parts of the pipeline.
+
+Replays the recorded VLM and Gemini responses in `benchmarks/corpus/`
+through the same steps the agents run on them:
+
+    extract_repair        parse_response (JSON extraction and repair)
+    extract_validate      parse_presentation (pydantic-core fast path, repair on failure)
+    validate              validate_vlm_output
+    convert_json_to_marp  markdown generation and write
+    write_pptx            native .pptx writer (in memory)
+    render_slides         slide images behind the PDF and PNG exports
+    run_marp              Marp render (skipped when Marp is not installed)
+
+Each stage reports throughput, latency percentiles and peak Python memory
+(tracemalloc). Results are written as JSON with stable key order so runs
+on two commits can be diffed, or compared directly:
+
+    python benchmarks/run.py -o before.json
+    python benchmarks/run.py -o after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(ROOT, "benchmarks", "corpus")
+
+# No network and no side effects outside the temp directory
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ.setdefault("OWL_CACHE_ENABLED", "false")
+os.environ.setdefault("OWL_WORKSPACE_DIR", os.path.join(tempfile.gettempdir(), "owl_bench"))
+sys.path.insert(0, ROOT)
+
+from owl.json_repair import parse_response  # noqa: E402
+from owl.ppt_manager import convert_json_to_marp, marp_args, render_pool  # noqa: E402
+from owl.pptx_writer import pptx_bytes  # noqa: E402
+from owl.slide_images import render_slides  # noqa: E402
+from owl.validators import parse_presentation, validate_vlm_output  # noqa: E402
+
+
+def load_corpus(pattern: str = "*.txt") -> dict[str, str]:
+    """Returns the recorded responses by file name (without extension)."""
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, pattern))):
+        with open(path, encoding="utf-8") as f:
+            corpus[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return corpus
+
+
+def latency_stats(samples: list[float]) -> dict:
+    """Summarizes per-call latencies (seconds) in microseconds."""
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "mean_us": round(sum(ordered) / len(ordered) * 1e6, 2),
+        "min_us": round(ordered[0] * 1e6, 2),
+        "p50_us": round(percentile(0.5) * 1e6, 2),
+        "p95_us": round(percentile(0.95) * 1e6, 2),
+        "p99_us": round(percentile(0.99) * 1e6, 2),
+        "max_us": round(ordered[-1] * 1e6, 2),
+    }
+
+
+def measure(func, inputs: dict, iterations: int) -> dict:
+    """
+    Runs `func` on every input `iterations` times and reports throughput,
+    latency percentiles, per-input median and peak traced memory.
+
+    Args:
+        func:
+            Callable taking one input
+        inputs:
+            Inputs by name
+        iterations:
+            Calls per input
+    """
+    # Warm up imports and caches outside the measurement
+    for value in inputs.values():
+        func(value)
+
+    samples, per_input = [], {}
+    start = time.perf_counter()
+    for name, value in inputs.items():
+        timings = []
+        for _ in range(iterations):
+            call_start = time.perf_counter()
+            func(value)
+            timings.append(time.perf_counter() - call_start)
+        samples += timings
+        per_input[name] = latency_stats(timings)["p50_us"]
+    elapsed = time.perf_counter() - start
+
+    # Separate pass: tracemalloc slows every allocation down
+    tracemalloc.start()
+    for value in inputs.values():
+        func(value)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "calls": len(samples),
+        "ops_per_s": round(len(samples) / elapsed, 1),
+        **latency_stats(samples),
+        "peak_kb": round(peak / 1024, 1),
+        "p50_us_by_input": per_input,
+    }
+
+
+def _parse_or_none(text: str):
+    try:
+        return parse_response(text)
+    except json.JSONDecodeError:
+        return None
+
+
+def _parse_presentation_or_none(text: str):
+    try:
+        return parse_presentation(text)
+    except json.JSONDecodeError:
+        return None
+
+
+def _quiet_validate(output: dict) -> bool:
+    # validate_vlm_output prints the errors of invalid outputs
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return validate_vlm_output(output)
+
+
+def _marp_available() -> bool:
+    local = os.path.join(ROOT, "node_modules", ".bin", "marp")
+    return shutil.which("marp") is not None or os.path.exists(local)
+
+
+def bench_render(presentations: dict, workdir: str, iterations: int) -> dict:
+    """Renders every deck `iterations` times on the warm Marp worker pool."""
+
+    async def render_all() -> list[float]:
+        timings = []
+        for name, presentation in presentations.items():
+            markdown_file = os.path.join(workdir, f"{name}.md")
+            convert_json_to_marp(presentation, markdown_file)
+            for index in range(iterations):
+                output_file = os.path.join(workdir, f"{name}.{index}.pptx")
+                start = time.perf_counter()
+                if not await render_pool.render(marp_args(markdown_file, output_file)):
+                    raise RuntimeError(f"Marp failed to render {name}")
+                timings.append(time.perf_counter() - start)
+        await render_pool.close()
+        return timings
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    start = time.perf_counter()
+    samples = asyncio.run(render_all())
+    elapsed = time.perf_counter() - start
+    return {
+        "calls": len(samples),
+        "ops_per_s": round(len(samples) / elapsed, 2),
+        **latency_stats(samples),
+        # Marp runs in node processes, tracemalloc cannot see it
+        "child_max_rss_kb": max(
+            before, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        ),
+    }
+
+
+def run(iterations: int, render_iterations: int) -> dict:
+    corpus = load_corpus()
+    parsed = {name: _parse_or_none(text) for name, text in corpus.items()}
+    dicts = {name: value for name, value in parsed.items() if isinstance(value, dict)}
+    valid = {name: value for name, value in dicts.items() if _quiet_validate(value)}
+
+    stages = {}
+    stages["extract_repair"] = measure(_parse_or_none, corpus, iterations)
+    stages["extract_repair"]["input_bytes"] = sum(
+        len(text.encode("utf-8")) for text in corpus.values()
+    )
+    stages["extract_validate"] = measure(_parse_presentation_or_none, corpus, iterations)
+    stages["validate"] = measure(_quiet_validate, dicts, iterations)
+
+    with tempfile.TemporaryDirectory(prefix="owl_bench_") as workdir:
+        markdown_file = os.path.join(workdir, "presentation.md")
+        stages["convert_json_to_marp"] = measure(
+            lambda presentation: convert_json_to_marp(presentation, markdown_file),
+            valid,
+            iterations,
+        )
+        stages["write_pptx"] = measure(pptx_bytes, valid, iterations)
+        # Drawing is much slower than the other stages, fewer calls suffice
+        stages["render_slides"] = measure(render_slides, valid, max(1, iterations // 20))
+        if render_iterations and _marp_available():
+            stages["run_marp"] = bench_render(valid, workdir, render_iterations)
+        else:
+            stages["run_marp"] = {"skipped": "marp is not installed"}
+
+    return {
+        "environment": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "corpus": {
+            "responses": len(corpus),
+            "parsed": len(dicts),
+            "valid": sorted(valid),
+            "unparseable": sorted(name for name, value in parsed.items() if value is None),
+        },
+        "iterations": iterations,
+        "stages": stages,
+    }
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    """Lists the change of each stage's p50/p95 and throughput vs a baseline."""
+    lines = []
+    for stage, stats in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage, {})
+        for metric in ("p50_us", "p95_us", "ops_per_s", "peak_kb"):
+            if metric not in stats or not before.get(metric):
+                continue
+            change = (stats[metric] - before[metric]) / before[metric] * 100
+            lines.append(
+                f"{stage:22} {metric:10} {before[metric]:>12} -> {stats[metric]:>12} "
+                f"({change:+.1f}%)"
+            )
+    return lines
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="calls per input")
+    parser.add_argument(
+        "--render-iterations", type=int, default=3, help="Marp renders per deck (0 skips)"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=os.path.join(ROOT, "benchmarks", "results.json"),
+        help="results file",
+    )
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.render_iterations)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    for stage, stats in results["stages"].items():
+        if "skipped" in stats:
+            print(f"{stage:22} skipped ({stats['skipped']})")
+        else:
+            print(
+                f"{stage:22} {stats['ops_per_s']:>10} ops/s  p50 {stats['p50_us']:>10} us  "
+                f"p95 {stats['p95_us']:>10} us  p99 {stats['p99_us']:>10} us"
+            )
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(results, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
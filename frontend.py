@@ -1,9 +1,8 @@
 import streamlit as st
 import requests
-import os
 import base64
+import json
 import uuid
-from pathlib import Path
 
 st.set_page_config(page_title="Whiteboard to PPT", layout="centered")
 
@@ -14,18 +13,259 @@ st.markdown("Convert your whiteboard photos into beautiful presentations instant
 # Configuration
 API_URL = "http://localhost:8000"
 APP_NAME = "owl"
+USER_ID = "user_123"
 OUTPUT_FILE = "presentation.pptx"
+# Seconds between two job status requests
+POLL_SECONDS = 1.0
+# Pipeline stages reported by the job status, in order
+STAGES = {
+    "preprocess": "Preparing the images",
+    "vlm": "Reading the whiteboard",
+    "validation": "Checking the extracted slides",
+    "enhancer": "Writing and rendering the slides",
+}
 
 
 def image_to_base64(image_bytes):
     return base64.b64encode(image_bytes).decode()
 
 
+@st.cache_resource
+def http_session():
+    """One keep-alive connection pool to the backend, shared by all reruns."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def image_part(session_id, uploaded_image):
+    """
+    Uploads an image as binary and returns the message part referencing it.
+
+    Falls back to base64 inline data when the backend has no upload
+    endpoint (`adk api_server` instead of `python server.py`).
+    """
+    mime_type = f"image/{uploaded_image.type.split('/')[-1]}"
+    uploaded_image.seek(0)
+    response = http_session().post(
+        f"{API_URL}/apps/{APP_NAME}/users/{USER_ID}/sessions/{session_id}/uploads",
+        data=uploaded_image,
+        headers={"Content-Type": mime_type},
+        timeout=(10, 120),
+    )
+    if response.status_code == 201:
+        upload = response.json()
+        return {"fileData": {"fileUri": upload["fileUri"], "mimeType": upload["mimeType"]}}
+    if response.status_code not in (404, 405):
+        response.raise_for_status()
+    return {
+        "inlineData": {
+            "data": image_to_base64(uploaded_image.getvalue()),
+            "mimeType": mime_type,
+        }
+    }
+
+
+def fetch_artifact(session_id, filename):
+    """Downloads a file rendered for this session from the ADK artifact store."""
+    response = http_session().get(
+        f"{API_URL}/apps/{APP_NAME}/users/{USER_ID}/sessions/{session_id}/artifacts/{filename}",
+        timeout=30,
+    )
+    if response.status_code != 200:
+        return None
+
+    inline_data = (response.json() or {}).get("inlineData") or {}
+    data = inline_data.get("data")
+    if not data:
+        return None
+    # Bytes may be serialized with the URL-safe base64 alphabet
+    return base64.urlsafe_b64decode(data.replace("+", "-").replace("/", "_") + "==")
+
+
+def fetch_presentation(session_id, exports=None):
+    """Downloads the deck rendered for this session as (filename, data)."""
+    filename = ((exports or {}).get("pptx") or [OUTPUT_FILE])[0]
+    data = fetch_artifact(session_id, filename)
+    return (filename, data) if data else None
+
+
+def fetch_exports(session_id, exports, thumbnails=True):
+    """Downloads the other export formats and the slide thumbnails."""
+    files = {}
+    for name in ("pdf", "html"):
+        for filename in exports.get(name, []):
+            data = fetch_artifact(session_id, filename)
+            if data:
+                files[name] = (filename, data)
+    if not thumbnails:
+        return files, []
+    images = [fetch_artifact(session_id, filename) for filename in exports.get("png", [])]
+    return files, [image for image in images if image]
+
+
+def render_thumbnails(thumbnails):
+    """Shows the rendered slides as a grid of thumbnails."""
+    columns = st.columns(2)
+    for index, thumbnail in enumerate(thumbnails):
+        columns[index % 2].image(thumbnail, caption=f"Slide {index + 1}", use_column_width=True)
+
+
+def render_slides(placeholder, slides):
+    """Renders the enhanced slides received so far into the preview pane."""
+    with placeholder.container():
+        for slide in slides:
+            st.markdown(f"**{slide.get('title', '')}**")
+            content = slide.get("content") or []
+            if isinstance(content, list):
+                st.markdown("\n".join(f"- {item}" for item in content))
+            else:
+                st.markdown(content)
+
+
+def store_result(session_id, slides, exports, languages=None, warning=None):
+    """Downloads the decks, other formats and thumbnails of a finished run.
+
+    `languages` maps each language to its exports when several languages
+    were requested; thumbnails are shown for the first one only. `warning`
+    says which images could not be read.
+    """
+    st.session_state["slides"] = slides
+    st.session_state["warning"] = warning
+    decks = {}
+    # Each session gets its own decks, so concurrent users never collide
+    for index, (language, language_exports) in enumerate((languages or {None: exports}).items()):
+        presentation = fetch_presentation(session_id, language_exports)
+        if not presentation:
+            continue
+        files, thumbnails = fetch_exports(session_id, language_exports, thumbnails=index == 0)
+        decks[language] = {"presentation": presentation, "files": files}
+        if index == 0:
+            st.session_state["thumbnails"] = thumbnails
+    if not decks:
+        return False
+    st.session_state["session_id"] = session_id
+    st.session_state["decks"] = decks
+    return True
+
+
+def primary_slides(slides_by_language, languages):
+    """Slides of the first requested language that has any."""
+    for language in [None, *(languages or [])]:
+        if slides_by_language.get(language):
+            return slides_by_language[language]
+    return next(iter(slides_by_language.values()), [])
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def job_progress():
+    """Polls the running job without holding a request open for the whole run."""
+    job = st.session_state.get("job")
+    if not job:
+        return
+
+    response = http_session().get(f"{API_URL}/jobs/{job['id']}", timeout=10)
+    if response.status_code != 200:
+        st.session_state.pop("job")
+        st.error(f"❌ Lost track of the job: {response.text}")
+        return
+    status = response.json()
+
+    if status["status"] == "queued":
+        st.info(f"⏳ Waiting for a free worker ({status['position']} job(s) ahead)")
+    elif status["status"] == "running":
+        progress = status.get("progress") or {}
+        completed = {
+            stage["stage"]
+            for stage in progress.get("completed", [])
+            if stage["outcome"] == "ok" and stage["stage"] in STAGES
+        }
+        label = STAGES.get(progress.get("stage"), "Working")
+        st.progress(len(completed) / len(STAGES), text=f"⚙️ {label}...")
+        # Slides appear one by one while the enhancer is still working
+        slides = {
+            language or None: language_slides
+            for language, language_slides in (status.get("slides") or {}).items()
+        }
+        if slides:
+            render_slides(st.empty(), primary_slides(slides, LANGUAGES))
+    elif status["status"] == "done":
+        st.session_state.pop("job")
+        result = status["result"]
+        if store_result(
+            job["session_id"],
+            result["slides"],
+            result["exports"],
+            result.get("languages"),
+            result.get("warning"),
+        ):
+            st.rerun()
+        st.warning("⚠️ Agent executed but PPTX file not found. Check agent logs.")
+    else:
+        st.session_state.pop("job")
+        st.error(f"❌ Error: {status.get('error')}")
+
+
+def run_streaming(session_id, message, slides_placeholder):
+    """Runs the agent in this request and streams the slides back, for
+    backends without the job API (`adk api_server`)."""
+    slides = {}
+    exports = {}
+    languages = None
+    warning = None
+    with http_session().post(
+        f"{API_URL}/run_sse",
+        json={
+            "appName": APP_NAME,
+            "userId": USER_ID,
+            "sessionId": session_id,
+            "newMessage": message,
+            "streaming": True,
+        },
+        stream=True,
+        timeout=(10, 300),
+    ) as run_response:
+        if run_response.status_code != 200:
+            st.error(f"❌ Error: {run_response.text}")
+            st.stop()
+
+        for line in run_response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if "error" in event:
+                st.error(f"❌ Error: {event['error']}")
+                st.stop()
+
+            # The enhancer emits each slide as soon as it is ready; with
+            # several languages, the slides of each deck carry its language
+            metadata = event.get("customMetadata") or {}
+            if metadata.get("owl_slide"):
+                slides.setdefault(metadata.get("language"), []).append(metadata["owl_slide"])
+                render_slides(slides_placeholder, primary_slides(slides, LANGUAGES))
+
+            # The final event lists every rendered file by format
+            state_delta = (event.get("actions") or {}).get("stateDelta") or {}
+            exports = state_delta.get("exports") or exports
+            languages = state_delta.get("exports_by_language") or languages
+            warning = state_delta.get("extraction_warning", warning)
+
+    st.success("✓ Agent processed image")
+    if store_result(
+        session_id, primary_slides(slides, list(languages or [])), exports, languages, warning
+    ):
+        st.success("✅ Presentation generated successfully!")
+        st.rerun()
+    st.warning("⚠️ Agent executed but PPTX file not found. Check agent logs.")
+
+
 col1, col2 = st.columns(2)
 
 with col1:
-    LANGUAGE = st.selectbox(
-        "Select Language",
+    LANGUAGES = st.multiselect(
+        "Select Languages",
         [
             "English",
             "French",
@@ -33,52 +273,88 @@ with col1:
             "Italian",
             "Spanish",
         ],
-    )
-    st.subheader("Upload Image")
-    uploaded_image = st.file_uploader(
-        "Choose a whiteboard image",
+        default=["English"],
+        help="Each language gets its own deck from a single reading of the images.",
+    ) or ["English"]
+    BOARD_ID = st.text_input(
+        "Board name (optional)",
+        help="New photos of a named board only re-read the parts that changed "
+        "and update its previous presentation.",
+    ).strip()
+    st.subheader("Upload Images")
+    uploaded_images = st.file_uploader(
+        "Choose whiteboard images",
         type=["jpg", "jpeg", "png", "webp"],
-        help="Upload a photo of your whiteboard or canvas",
+        accept_multiple_files=True,
+        help="Upload one or more photos of your whiteboard or canvas. "
+        "Several photos are combined into a single presentation.",
     )
 
-    if uploaded_image:
-        st.image(uploaded_image, use_column_width=True, caption="Uploaded Image")
+    for index, uploaded_image in enumerate(uploaded_images or []):
+        st.image(
+            uploaded_image, use_column_width=True, caption=f"Uploaded Image {index + 1}"
+        )
 
 with col2:
     st.subheader("Preview")
-    if os.path.exists(OUTPUT_FILE):
+    decks = st.session_state.get("decks")
+    if decks:
         st.success("✓ Presentation ready!")
+        if st.session_state.get("warning"):
+            st.warning(f"⚠️ {st.session_state['warning']}")
 
-        file_size = Path(OUTPUT_FILE).stat().st_size / (1024 * 1024)
-        st.metric("File Size", f"{file_size:.2f} MB")
-
-        with open(OUTPUT_FILE, "rb") as f:
+        for language, deck in decks.items():
+            if language:
+                st.markdown(f"**{language}**")
+            filename, data = deck["presentation"]
             st.download_button(
                 label="📥 Download PPTX",
-                data=f,
-                file_name=OUTPUT_FILE,
+                data=data,
+                file_name=filename,
                 mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+                key=f"{filename}-download",
             )
-    else:
+            for name, mime in (("pdf", "application/pdf"), ("html", "text/html")):
+                if name in deck["files"]:
+                    filename, data = deck["files"][name]
+                    st.download_button(
+                        label=f"📥 Download {name.upper()}",
+                        data=data,
+                        file_name=filename,
+                        mime=mime,
+                        key=f"{filename}-download",
+                    )
+    elif not st.session_state.get("job"):
         st.info("🔄 No presentation yet. Upload an image and process it.")
 
-if uploaded_image:
-    if st.button("Generate Presentation", use_container_width=True):
-        with st.spinner("Processing your image..."):
+    job_progress()
+
+    # Slides appear here one by one while the agent is still working, then
+    # are replaced by the rendered thumbnails
+    slides_placeholder = st.empty()
+    if st.session_state.get("thumbnails"):
+        with slides_placeholder.container():
+            render_thumbnails(st.session_state["thumbnails"])
+    elif st.session_state.get("slides"):
+        render_slides(slides_placeholder, st.session_state["slides"])
+
+if uploaded_images:
+    if st.button(
+        "Generate Presentation",
+        use_container_width=True,
+        disabled=bool(st.session_state.get("job")),
+    ):
+        with st.spinner("Processing your images..."):
             try:
                 # Generate unique session IDs
-                user_id = "user_123"
+                user_id = USER_ID
                 session_id = f"session_{uuid.uuid4().hex[:8]}"
 
-                # Encode image to base64 with proper format
-                image_bytes = uploaded_image.getvalue()
-                image_base64 = image_to_base64(image_bytes)
-                mime_type = f"image/{uploaded_image.type.split('/')[-1]}"  # Get MIME type from uploaded file
-
                 # Create session
-                session_response = requests.post(
+                session_response = http_session().post(
                     f"{API_URL}/apps/{APP_NAME}/users/{user_id}/sessions/{session_id}",
-                    json={},
+                    # Initial session state
+                    json={"board_id": BOARD_ID} if BOARD_ID else {},
                     timeout=10,
                 )
 
@@ -88,48 +364,49 @@ if uploaded_image:
 
                 st.success("✓ Session created")
 
-                # Step 2: Send image to agent
-                st.info("Sending the Whiteboard image to the agent...")
+                # Upload each image once as binary, the message references it by id
+                image_parts = [
+                    image_part(session_id, uploaded_image) for uploaded_image in uploaded_images
+                ]
+
+                message = {
+                    "role": "user",
+                    "parts": [
+                        {
+                            "text": "Describe this image strictly in the following Language: "
+                            f"\n{', '.join(LANGUAGES)}"
+                        },
+                        *image_parts,
+                    ],
+                }
 
-                # Send image to agent as base64
-                run_response = requests.post(
-                    f"{API_URL}/run",
+                # Queue the generation and poll it instead of waiting on one request
+                job_response = http_session().post(
+                    f"{API_URL}/jobs",
                     json={
-                        "appName": APP_NAME,  # changed to camelCase
+                        "appName": APP_NAME,
                         "userId": user_id,
                         "sessionId": session_id,
-                        "newMessage": {
-                            "role": "user",
-                            "parts": [
-                                {
-                                    "text": f"Describe this image strictly in the following Language: \n{LANGUAGE}"  # add text part if desired
-                                },
-                                {
-                                    "inlineData": {
-                                        "data": image_base64,  # just base64
-                                        "mimeType": mime_type,  # "image/jpeg"
-                                    }
-                                },
-                            ],
-                        },
-                        "streaming": False,
+                        "newMessage": message,
                     },
-                    timeout=300,
+                    timeout=30,
                 )
-
-                if run_response.status_code != 200:
-                    st.error(f"❌ Error: {run_response.text}")
-                    st.stop()
-
-                st.success("✓ Agent processed image")
-
-                if os.path.exists(OUTPUT_FILE):
-                    st.success("✅ Presentation generated successfully!")
+                if job_response.status_code == 202:
+                    for key in ("decks", "thumbnails", "slides", "warning"):
+                        st.session_state.pop(key, None)
+                    st.session_state["job"] = {
+                        "id": job_response.json()["id"],
+                        "session_id": session_id,
+                    }
                     st.rerun()
+                elif job_response.status_code == 429:
+                    retry_after = job_response.headers.get("Retry-After", "a few")
+                    st.warning(f"⏳ The server is busy, please retry in {retry_after} seconds.")
+                elif job_response.status_code in (404, 405):
+                    st.info("Sending the Whiteboard images to the agent...")
+                    run_streaming(session_id, message, slides_placeholder)
                 else:
-                    st.warning(
-                        "⚠️ Agent executed but PPTX file not found. Check agent logs."
-                    )
+                    st.error(f"❌ Error: {job_response.text}")
 
             except requests.exceptions.ConnectionError:
                 st.error(
@@ -0,0 +1,358 @@
+"""Load generator for the ADK API server running the real `root_agent`.
+
+Every simulated user follows the frontend protocol: create a session, send
+the images with the language prompt to `/run_sse` (or `/run`), then fetch
+the rendered deck artifact. With `--upload` the images are uploaded as
+binary first and referenced by id, as the frontend does with `server.py`. Reports throughput, latency percentiles, error
+rate and the server's memory growth (from /proc/<pid>/status).
+
+Against an already running server:
+
+    python loadtest/run.py --url http://127.0.0.1:8000 --server-pid <pid>
+
+Or start the stub model server and `server.py` pointed at it:
+
+    python loadtest/run.py --launch --concurrency 16 --requests 200 \\
+        --stub-latency 1.5 --stub-failure-rate 0.05
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import mimetypes
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from typing import Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_NAME = "owl"
+USER_ID = "loadtest"
+OUTPUT_FILE = "presentation.pptx"
+LANGUAGES = ["English", "French", "German", "Italian", "Spanish"]
+DEFAULT_IMAGES = ["test_compressed_small.jpg", "test2_compressed_small.jpg", "test.png"]
+
+
+def parse_images(specs: list[str]) -> list[tuple[str, float]]:
+    """Parses `PATH[:WEIGHT]` image specs."""
+    images = []
+    for spec in specs:
+        path, _, weight = spec.partition(":")
+        images.append((path, float(weight or 1)))
+    return images
+
+
+def image_part(data: bytes, mime_type: str) -> dict:
+    return {"inlineData": {"data": base64.b64encode(data).decode(), "mimeType": mime_type}}
+
+
+def memory_kb(pid: int) -> Optional[int]:
+    """Returns the resident memory (VmRSS) of a process in KB."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        images = parse_images(args.image or [os.path.join(ROOT, name) for name in DEFAULT_IMAGES])
+        self.paths = [path for path, _ in images]
+        self.weights = [weight for _, weight in images]
+        self.images = {}
+        for path in self.paths:
+            with open(path, "rb") as f:
+                self.images[path] = (f.read(), mimetypes.guess_type(path)[0] or "image/jpeg")
+        self.parts = {path: image_part(*self.images[path]) for path in self.paths}
+        self.results = []
+        self.memory = []
+
+    async def message(self, client: httpx.AsyncClient, base: str) -> dict:
+        count = random.randint(1, max(1, self.args.max_images))
+        paths = random.choices(self.paths, weights=self.weights, k=count)
+        language = random.choice(self.args.language or LANGUAGES)
+        if self.args.upload:
+            parts = []
+            for path in paths:
+                data, mime_type = self.images[path]
+                response = await client.post(
+                    f"{base}/uploads", content=data, headers={"Content-Type": mime_type}
+                )
+                response.raise_for_status()
+                upload = response.json()
+                parts.append({"fileData": {"fileUri": upload["fileUri"], "mimeType": mime_type}})
+        else:
+            parts = [self.parts[path] for path in paths]
+        return {
+            "role": "user",
+            "parts": [
+                {"text": f"Describe this image strictly in the following Language: \n{language}"},
+                *parts,
+            ],
+        }
+
+    async def generation(self, client: httpx.AsyncClient) -> dict:
+        """Runs one generation and returns its timing and status."""
+        session_id = f"load_{uuid.uuid4().hex[:12]}"
+        base = f"/apps/{APP_NAME}/users/{USER_ID}/sessions/{session_id}"
+        result = {"status": "ok", "images": 0, "slides": 0}
+        start = time.perf_counter()
+        try:
+            response = await client.post(base, json={})
+            if response.status_code not in (200, 201):
+                return {**result, "status": f"session_{response.status_code}"}
+
+            message = await self.message(client, base)
+            result["images"] = len(message["parts"]) - 1
+            payload = {
+                "appName": APP_NAME,
+                "userId": USER_ID,
+                "sessionId": session_id,
+                "newMessage": message,
+            }
+            events = []
+            if self.args.no_stream:
+                response = await client.post("/run", json=payload)
+                if response.status_code != 200:
+                    return {**result, "status": f"run_{response.status_code}"}
+                events = response.json()
+            else:
+                async with client.stream(
+                    "POST", "/run_sse", json={**payload, "streaming": True}
+                ) as response:
+                    if response.status_code != 200:
+                        return {**result, "status": f"run_{response.status_code}"}
+                    async for line in response.aiter_lines():
+                        if line.startswith("data:"):
+                            event = json.loads(line[len("data:"):])
+                            if "first_event" not in result:
+                                result["first_event"] = time.perf_counter() - start
+                            events.append(event)
+
+            if any("error" in event for event in events):
+                return {**result, "status": "agent_error"}
+            result["slides"] = sum(
+                1 for event in events if (event.get("customMetadata") or {}).get("owl_slide")
+            )
+
+            response = await client.get(f"{base}/artifacts/{OUTPUT_FILE}")
+            if response.status_code != 200 or not (response.json() or {}).get("inlineData"):
+                result["status"] = "no_deck"
+        except httpx.HTTPError as e:
+            result["status"] = type(e).__name__
+        finally:
+            result["latency"] = time.perf_counter() - start
+        return result
+
+    async def sample_memory(self, pid: int, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            value = memory_kb(pid)
+            if value is not None:
+                self.memory.append((time.perf_counter(), value))
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.args.memory_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, pid: Optional[int]) -> dict:
+        limits = httpx.Limits(max_connections=self.args.concurrency * 2)
+        timeout = httpx.Timeout(self.args.timeout, connect=10)
+        queue = asyncio.Queue()
+        for index in range(self.args.requests):
+            queue.put_nowait(index)
+
+        async with httpx.AsyncClient(
+            base_url=self.args.url, limits=limits, timeout=timeout
+        ) as client:
+            # Load the agent and start the render workers before measuring
+            for _ in range(self.args.warmup):
+                await self.generation(client)
+
+            async def user() -> None:
+                while True:
+                    try:
+                        queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    self.results.append(await self.generation(client))
+
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(self.sample_memory(pid, stop)) if pid else None
+            start = time.perf_counter()
+            await asyncio.gather(*(user() for _ in range(self.args.concurrency)))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            if sampler:
+                await sampler
+
+            stages = None
+            try:
+                response = await client.get("/metrics/summary")
+                if response.status_code == 200:
+                    stages = response.json().get("stages")
+            except httpx.HTTPError:
+                pass
+
+        return self.report(elapsed, stages)
+
+    def report(self, elapsed: float, stages: Optional[dict]) -> dict:
+        latencies = sorted(result["latency"] for result in self.results)
+        ok = sorted(result["latency"] for result in self.results if result["status"] == "ok")
+        statuses = {}
+        for result in self.results:
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+        first_events = sorted(
+            result["first_event"] for result in self.results if "first_event" in result
+        )
+
+        report = {
+            "config": {
+                "url": self.args.url,
+                "concurrency": self.args.concurrency,
+                "requests": self.args.requests,
+                "max_images": self.args.max_images,
+                "streaming": not self.args.no_stream,
+                "upload": self.args.upload,
+            },
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+            "error_rate": round(1 - len(ok) / len(self.results), 4) if self.results else 0.0,
+            "statuses": statuses,
+            "latency_s": {
+                name: round(percentile(ok or latencies, q), 3)
+                for name, q in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+            },
+            "first_event_p50_s": round(percentile(first_events, 0.5), 3),
+        }
+        if self.memory:
+            values = [value for _, value in self.memory]
+            report["server_memory_kb"] = {
+                "start": values[0],
+                "end": values[-1],
+                "peak": max(values),
+                "growth": values[-1] - values[0],
+            }
+        if stages:
+            report["stages_p95_s"] = {
+                stage: round(stats.get("p95", 0.0), 4) for stage, stats in stages.items()
+            }
+        return report
+
+
+def launch(args: argparse.Namespace) -> list[subprocess.Popen]:
+    """Starts the stub model server and server.py configured to use it."""
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(ROOT, "loadtest", "stub_server.py"),
+            "--port", str(args.stub_port),
+            "--latency", str(args.stub_latency),
+            "--failure-rate", str(args.stub_failure_rate),
+            "--malformed-rate", str(args.stub_malformed_rate),
+        ]
+    )
+    port = httpx.URL(args.url).port or 8000
+    env = {
+        **os.environ,
+        "OPENAI_API_BASE": f"http://127.0.0.1:{args.stub_port}/v1",
+        "OPENAI_API_KEY": "stub",
+        "OWL_VLM_MODEL": "openai/stub-vlm",
+        "OWL_ENHANCER_MODEL": "openai/stub-enhancer",
+        "OWL_REPAIR_MODEL": "openai/stub-repair",
+        "OWL_PORT": str(port),
+        # Every request should reach the models
+        "OWL_CACHE_ENABLED": "false",
+        "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+    }
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py")],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL if args.quiet_server else None,
+        stderr=subprocess.DEVNULL if args.quiet_server else None,
+    )
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{args.url}/list-apps", timeout=2).status_code == 200:
+                return [server, stub]
+        except httpx.HTTPError:
+            pass
+        if server.poll() is not None:
+            break
+        time.sleep(0.5)
+    for process in (server, stub):
+        process.terminate()
+    raise RuntimeError("server.py did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the OWL ADK API server")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-n", "--requests", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=2, help="requests excluded from the report")
+    parser.add_argument(
+        "--image", action="append", help="PATH[:WEIGHT], repeatable (default: sample images)"
+    )
+    parser.add_argument("--max-images", type=int, default=1, help="images per request, 1..N")
+    parser.add_argument("--language", action="append", help="repeatable (default: all)")
+    parser.add_argument("--no-stream", action="store_true", help="use /run instead of /run_sse")
+    parser.add_argument(
+        "--upload", action="store_true", help="upload images as binary (server.py only)"
+    )
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--server-pid", type=int, help="sample this process's memory")
+    parser.add_argument("--memory-interval", type=float, default=0.5)
+    parser.add_argument("--launch", action="store_true", help="start the stub and server.py")
+    parser.add_argument("--stub-port", type=int, default=9000)
+    parser.add_argument("--stub-latency", type=float, default=1.0)
+    parser.add_argument("--stub-failure-rate", type=float, default=0.0)
+    parser.add_argument("--stub-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--quiet-server", action="store_true", help="hide server.py output")
+    parser.add_argument("-o", "--output", help="write the report as JSON")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    processes = launch(args) if args.launch else []
+    pid = args.server_pid or (processes[0].pid if processes else None)
+    try:
+        report = asyncio.run(LoadTest(args).run(pid))
+    finally:
+        for process in processes:
+            process.send_signal(signal.SIGINT)
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
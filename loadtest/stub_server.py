@@ -0,0 +1,242 @@
+"""Local OpenAI-compatible stand-in for the VLM and enhancer models.
+
+Answers `POST /v1/chat/completions` after a configurable latency, failing a
+configurable share of requests, so load tests exercise the real agents
+(retries, repair, rendering) without NIM or Gemini:
+
+    python loadtest/stub_server.py --port 9000 --latency 1.5 --failure-rate 0.05
+
+Requests with an image get a whiteboard deck as the VLM would return it.
+Text requests whose message contains presentation JSON (enhancement and
+slide repair) get their slides back, lightly rewritten.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VLM_RESPONSE = {
+    "presentation_title": "Load Test Whiteboard",
+    "slides": [
+        {
+            "slide_number": index + 1,
+            "title": title,
+            "content": [f"{title} point {point + 1}" for point in range(3)],
+        }
+        for index, title in enumerate(["Goals", "Architecture", "Timeline", "Risks"])
+    ],
+}
+
+
+class StubConfig:
+    def __init__(self, latency: float, jitter: float, failure_rate: float, malformed_rate: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.requests = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+
+def completion_text(body: dict, config: StubConfig) -> str:
+    """Builds the model answer for a chat completion request."""
+    messages = body.get("messages") or []
+    has_image = False
+    user_text = ""
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            for item in content:
+                if item.get("type") == "image_url":
+                    has_image = True
+                elif item.get("type") == "text" and message.get("role") == "user":
+                    user_text = item.get("text", "")
+        elif message.get("role") == "user" and isinstance(content, str):
+            user_text = content
+
+    if has_image:
+        text = "Here is the extracted content:\n```json\n" + json.dumps(VLM_RESPONSE) + "\n```"
+    else:
+        text = json.dumps(enhanced(user_text))
+
+    if random.random() < config.malformed_rate:
+        # Truncated output, as when the model hits its token limit
+        text = text[: max(1, int(len(text) * 0.8))]
+    return text
+
+
+def enhanced(user_text: str) -> dict:
+    """Echoes the slides of an enhancement or repair request."""
+    match = re.search(r"\{.*\}", user_text, re.DOTALL)
+    try:
+        payload = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        payload = {}
+
+    slides = []
+    for index, item in enumerate(payload.get("slides") or VLM_RESPONSE["slides"]):
+        # Repair requests wrap each slide as {"index", "slide", "errors"}
+        slide = item.get("slide", item) if isinstance(item, dict) else {}
+        content = slide.get("content") or ["Details"]
+        if isinstance(content, str):
+            content = [content]
+        slides.append(
+            {
+                "slide_number": index + 1,
+                "title": str(slide.get("title") or f"Slide {index + 1}"),
+                "content": [f"{str(point).strip()}." for point in content][:4],
+            }
+        )
+    return {
+        "presentation_title": payload.get("presentation_title")
+        or VLM_RESPONSE["presentation_title"],
+        "slides": slides,
+    }
+
+
+def make_handler(config: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+            elif self.path == "/stats":
+                self._json(200, {"requests": config.requests, "failures": config.failures})
+            else:
+                self._json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._json(400, {"error": {"message": "invalid JSON body"}})
+                return
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._json(404, {"error": {"message": "not found"}})
+                return
+
+            with config.lock:
+                config.requests += 1
+            time.sleep(max(0.0, random.gauss(config.latency, config.jitter)))
+
+            if random.random() < config.failure_rate:
+                with config.lock:
+                    config.failures += 1
+                self._json(
+                    503,
+                    {"error": {"message": "stub overloaded", "type": "server_error"}},
+                )
+                return
+
+            text = completion_text(body, config)
+            prompt_tokens = length // 4
+            completion_tokens = len(text) // 4
+            model = body.get("model", "stub")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+            if body.get("stream"):
+                self._stream(completion_id, model, text, prompt_tokens, completion_tokens)
+                return
+
+            self._json(
+                200,
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                },
+            )
+
+        def _json(self, status: int, payload: dict) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, completion_id, model, text, prompt_tokens, completion_tokens):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            chunks = [text[start : start + 40] for start in range(0, len(text), 40)]
+            for index, chunk in enumerate(chunks):
+                last = index == len(chunks) - 1
+                event = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": chunk},
+                            "finish_reason": "stop" if last else None,
+                        }
+                    ],
+                }
+                if last:
+                    event["usage"] = {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=1.0, help="mean seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency std deviation")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of 503 replies")
+    parser.add_argument(
+        "--malformed-rate", type=float, default=0.0, help="share of truncated JSON replies"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    config = StubConfig(args.latency, args.jitter, args.failure_rate, args.malformed_rate)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print(f"Stub model server on http://{args.host}:{args.port}/v1", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
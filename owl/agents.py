@@ -3,94 +3,541 @@ from google.adk.agents import LoopAgent, LlmAgent, SequentialAgent
 from google.adk.agents import BaseAgent
 from google.adk.events import Event, EventActions
 from google.adk.agents.invocation_context import InvocationContext
-from typing import AsyncGenerator
+from google.genai import types
+from contextlib import aclosing
+from typing import AsyncGenerator, Optional
+import asyncio
 import logging
 import json
-import re
-import pythonmonkey
+import os
 
-jsonrepair = pythonmonkey.require('jsonrepair').jsonrepair
-
-from .prompts import VLM_INSTRUCTIONS, LLM_INSTRUCTIONS
-from .validators import validate_vlm_output, PresentationSchema
-from .ppt_manager import convert_json_to_marp, run_marp
+from .prompts import (
+    VLM_INSTRUCTIONS,
+    VLM_RETRY_INSTRUCTIONS,
+    LLM_INSTRUCTIONS,
+    REPAIR_INSTRUCTIONS,
+    GROUP_ENHANCE_INSTRUCTIONS,
+    TILE_HINT,
+    static_prompt,
+)
+from .validators import (
+    parse_presentation,
+    validate_vlm_output,
+    validation_errors,
+    broken_slides,
+    fix_vlm_output,
+    PresentationSchema,
+    SlideGroup,
+    valid_slides,
+)
+from .ppt_manager import EXPORT_MIME_TYPES, export_deck
+from .cache import ResultCache, digest, make_key
+from .boards import compare_board, merge_revision
+from .uploads import resolve_uploads, upload_parts
+from .config import (
+    CACHE_ENABLED,
+    CACHE_DIR,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_MB,
+    CACHE_TTL_SECONDS,
+    BATCH_CONCURRENCY,
+    BATCH_MAX_ATTEMPTS,
+    BOARD_GRID,
+    BOARD_INDEX_ENABLED,
+    BOARD_MAX_CHANGED,
+    BOARD_TILE_BITS,
+    ENHANCE_GROUP_SIZE,
+    ENHANCE_MODE,
+    ENHANCE_WORKERS,
+    ENHANCER_MODEL_NAMES,
+    PREPROCESS_ENABLED,
+    PREPROCESS_MAX_DIMENSION,
+    PREPROCESS_MODE,
+    PREPROCESS_QUALITY,
+    PREPROCESS_TARGET_KB,
+    REPAIR_MODEL,
+    STRUCTURED_OUTPUT,
+    TILE_ENABLED,
+    TILE_MAX_TILES,
+    TILE_MIN_DIMENSION,
+    TILE_OVERLAP,
+    VLM_SHORT_RETRY,
+    VLM_MODEL_NAMES,
+    WORKSPACE_DIR,
+    WORKSPACE_MAX_MB,
+    WORKSPACE_TTL_SECONDS,
+)
+from .workspace import WorkspaceManager
+from .utils import (
+    compact_json,
+    image_parts,
+    language_code,
+    prompt_parts,
+    requested_languages,
+    merge_presentations,
+    split_long_slides,
+    stitch_presentations,
+)
+from .llm import (
+    generate_text,
+    output_schema_rejected,
+    reject_output_schema,
+    payload_size,
+    with_output_schema,
+)
+from .metrics import record_vlm_attempts
+from .routing import routed_model
+from .preprocess import compress_image_bytes, tile_image_bytes
+from .json_repair import JSONArrayItemStream, parse_response, loads as repair_loads
+from .telemetry import Span, record_usage, span, span_events
 
 logger = logging.getLogger(__name__)
 
+
+
+def _is_valid_presentation(text: str) -> bool:
+    """Whether a VLM response holds a presentation that passes validation."""
+    try:
+        output, validated = parse_presentation(text)
+    except ValueError:
+        return False
+    return validated or validate_vlm_output(output)
+
+
 # Tag for `cosmos-nemotron-34b`
-VLM_MODEL = LiteLlm(model="nvidia_nim/nvidia/llama-3.1-nemotron-nano-vl-8b-v1")
+# With several candidates per stage, calls are routed and hedged (see routing.py)
+VLM_MODEL = routed_model(
+    "vlm", [LiteLlm(model=name) for name in VLM_MODEL_NAMES], accept=_is_valid_presentation
+)
 # LLM_MODEL = LiteLlm(model="nvidia_nim/nvidia/llama-3.1-nemotron-ultra-253b-v1")
+ENHANCER_MODEL = routed_model("enhancer", ENHANCER_MODEL_NAMES)
+
+# Repeat uploads of the same image skip the model calls entirely.
+result_cache = (
+    ResultCache(
+        os.path.join(CACHE_DIR, "results.sqlite3"),
+        max_entries=CACHE_MAX_ENTRIES,
+        max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=CACHE_TTL_SECONDS,
+    )
+    if CACHE_ENABLED
+    else None
+)
+
+# Tile hashes and deck of the last photo of each board (see boards.py)
+board_index = (
+    ResultCache(
+        os.path.join(CACHE_DIR, "boards.sqlite3"),
+        max_entries=CACHE_MAX_ENTRIES,
+        max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=CACHE_TTL_SECONDS,
+    )
+    if BOARD_INDEX_ENABLED
+    else None
+)
+
+# Each session renders into its own directory so concurrent runs never collide.
+workspaces = WorkspaceManager(
+    WORKSPACE_DIR,
+    max_bytes=int(WORKSPACE_MAX_MB * 1024 * 1024),
+    ttl_seconds=WORKSPACE_TTL_SECONDS,
+)
+
+
+class ImagePreprocessAgent(BaseAgent):
+    """Downscales, converts and re-encodes uploaded images before the VLM
+    sees them, and records the before/after sizes in session state."""
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        """Replaces every inline image with its compressed version in place."""
+        # Images uploaded as binary are referenced by id in the message
+        if upload_parts(ctx.user_content):
+            resolved = resolve_uploads(ctx.user_content, workspaces.path(ctx.session.id))
+            logger.info(f"[{self.name}] Resolved {resolved} uploaded image(s)")
+
+        images = image_parts(ctx.user_content)
+        if not images:
+            yield Event(author=self.name, actions=EventActions(escalate=False))
+            return
+
+        image_stats = []
+        image_digests = []
+        image_tiles = None
+        ctx.session.state["temp:board"] = None
+        with span("preprocess", session_id=ctx.session.id, images=len(images)) as stage:
+            for index, part in enumerate(images):
+                original = part.inline_data.data
+                image_digests.append(digest(original))
+                stats = {"original_bytes": len(original), "processed_bytes": len(original)}
+
+                # A new photo of a known board is compared at full resolution,
+                # before tiling: only the region of its changed tiles goes on
+                if len(images) == 1 and await self._compare_board(ctx, part, stage):
+                    image_stats.append(stats)
+                    break
+
+                # A single high-resolution photo is cut into tiles instead of
+                # being downscaled
+                if PREPROCESS_ENABLED and TILE_ENABLED and len(images) == 1:
+                    image_tiles = await self._tile(ctx, part, stats)
+                    if image_tiles:
+                        stage.set(tiles=len(image_tiles))
+
+                if PREPROCESS_ENABLED and not image_tiles:
+                    try:
+                        # Pillow work is CPU bound, keep it off the event loop
+                        processed, size = await asyncio.to_thread(
+                            compress_image_bytes,
+                            part.inline_data.data,
+                            quality=PREPROCESS_QUALITY,
+                            max_dimension=PREPROCESS_MAX_DIMENSION,
+                            target_size_kb=PREPROCESS_TARGET_KB,
+                            mode=PREPROCESS_MODE,
+                        )
+                        if len(processed) < len(part.inline_data.data):
+                            part.inline_data.data = processed
+                            part.inline_data.mime_type = "image/jpeg"
+                            stats["processed_bytes"] = len(processed)
+                        stats["processed_size"] = list(size)
+                    except Exception as e:
+                        logger.error(f"[{self.name}] Could not preprocess image {index + 1}: {e}")
+
+                logger.info(
+                    f"[{self.name}] Image {index + 1}: {stats['original_bytes']} -> "
+                    f"{stats['processed_bytes']} bytes"
+                )
+                image_stats.append(stats)
+            stage.set(
+                input_bytes=sum(stats["original_bytes"] for stats in image_stats),
+                output_bytes=sum(stats["processed_bytes"] for stats in image_stats),
+            )
+
+        yield Event(
+            author=self.name,
+            actions=EventActions(
+                escalate=False,
+                # Original digests keep the result cache stable across settings
+                state_delta={
+                    "image_stats": image_stats,
+                    "image_digests": image_digests,
+                    "image_tiles": image_tiles,
+                },
+            ),
+        )
+
+    async def _compare_board(
+        self, ctx: InvocationContext, part: types.Part, stage: Span
+    ) -> bool:
+        """
+        Compares a single photo with the previous photo of its board. When
+        some tiles changed, the photo in the message is swapped for the
+        full-resolution region that covers them, and the validated output is
+        merged into the previous deck (see `_update_board`).
+
+        Returns:
+            bool: True when no tile changed: the previous deck is reused
+            (see `VLMAgent._extract`) and the photo needs no preprocessing
+        """
+        board_id = ctx.session.state.get("board_id")
+        if board_index is None or not board_id:
+            return False
+
+        key = make_key("board", ctx.session.user_id, board_id)
+        previous = await board_index.aget("board", key)
+        try:
+            signature, tiles, region = await asyncio.to_thread(
+                compare_board,
+                part.inline_data.data,
+                previous,
+                grid=BOARD_GRID,
+                max_bits=BOARD_TILE_BITS,
+                max_changed=BOARD_MAX_CHANGED,
+                # Re-encoded by the tiling or compression that follows
+                quality=95,
+            )
+        except Exception as e:
+            logger.error(f"[{self.name}] Could not compare board {board_id!r}: {e}")
+            return False
+
+        board = {"key": key, "signature": signature, "merge_into": None, "unchanged": None}
+        ctx.session.state["temp:board"] = board
+        if tiles is None:
+            stage.set(board="full")
+            return False
+        stage.set(board="revision", changed_tiles=len(tiles))
+        if not tiles:
+            board["unchanged"] = previous["presentation"]
+            return True
+
+        logger.info(
+            f"[{self.name}] Board {board_id!r}: re-extracting tiles {tiles} "
+            f"({len(region)} bytes)"
+        )
+        part.inline_data.data = region
+        part.inline_data.mime_type = "image/jpeg"
+        board["merge_into"] = previous["presentation"]
+        return False
+
+    async def _tile(
+        self, ctx: InvocationContext, part: types.Part, stats: dict
+    ) -> Optional[list[list[int]]]:
+        """Replaces a high-resolution image in the message with its tiles.
+        Returns the tile boxes, or None if the image is not tiled."""
+        try:
+            tiles = await asyncio.to_thread(
+                tile_image_bytes,
+                part.inline_data.data,
+                min_dimension=TILE_MIN_DIMENSION,
+                tile_dimension=PREPROCESS_MAX_DIMENSION,
+                overlap=TILE_OVERLAP,
+                max_tiles=TILE_MAX_TILES,
+                quality=PREPROCESS_QUALITY,
+                target_size_kb=PREPROCESS_TARGET_KB,
+                mode=PREPROCESS_MODE,
+            )
+        except Exception as e:
+            logger.error(f"[{self.name}] Could not tile image: {e}")
+            return None
+        if not tiles or len(tiles) < 2:
+            return None
+
+        index = ctx.user_content.parts.index(part)
+        # Keep the same list object: the message is shared with later agents
+        ctx.user_content.parts[index : index + 1] = [
+            types.Part.from_bytes(data=data, mime_type="image/jpeg") for data, _ in tiles
+        ]
+        stats["processed_bytes"] = sum(len(data) for data, _ in tiles)
+        stats["tiles"] = len(tiles)
+        logger.info(f"[{self.name}] Cut the image into {len(tiles)} tiles")
+        return [list(box) for _, box in tiles]
+
+
+def _vlm_request(callback_context, llm_request) -> None:
+    """Sends the VLM only the user message, images first and text last, so
+    every attempt repeats the same bytes after the static system prompt."""
+    llm_request.contents = [
+        types.Content(role="user", parts=prompt_parts(callback_context.user_content))
+    ]
+    return None
 
 
 class VLMAgent(BaseAgent):
     """Custom VLM Agent that captures output to session state."""
 
     vlm_llm_agent: LlmAgent
+    # System prompts: instructions and output schema, byte-stable across
+    # requests for the providers' prompt caches
+    prompt: str
+    retry_prompt: Optional[str] = None
+    # Same model without the output schema, used once the backend rejected
+    # the schema (see llm.reject_output_schema)
+    fallback_llm_agent: Optional[LlmAgent] = None
 
     model_config = {"arbitrary_types_allowed": True}
 
     def __init__(
-        self, name: str, description: str, instructions: str, model, output_schema
+        self,
+        name: str,
+        description: str,
+        instructions: str,
+        model,
+        output_schema,
+        retry_instructions: Optional[str] = None,
     ):
+        # Constrain decoding to the output schema when the backend supports it
+        structured_model = (
+            with_output_schema(model, output_schema) if STRUCTURED_OUTPUT else None
+        )
+
         # Create an LlmAgent to wrap the model
         # Use output_key to automatically save the LLM response to session state
-        vlm_llm_agent = LlmAgent(
-            name=f"{name}_llm",
-            model=model,
-            instruction=instructions,
-            output_key="vlm_raw_response",  # Automatically saves response to state
-        )
+        def llm_agent(agent_name: str, llm) -> LlmAgent:
+            return LlmAgent(
+                name=agent_name,
+                model=llm,
+                # Retries send the same request instead of growing the history
+                include_contents="none",
+                before_model_callback=_vlm_request,
+                output_key="vlm_raw_response",  # Automatically saves response to state
+            )
 
         # Pydantic will validate and assign them based on the class annotations
         super().__init__(
             name=name,
-            vlm_llm_agent=vlm_llm_agent,
+            vlm_llm_agent=llm_agent(f"{name}_llm", structured_model or model),
+            prompt=static_prompt(instructions, output_schema),
+            retry_prompt=(
+                static_prompt(retry_instructions, output_schema)
+                if retry_instructions
+                else None
+            ),
+            fallback_llm_agent=(
+                llm_agent(f"{name}_prompt_llm", model) if structured_model is not None else None
+            ),
         )
+        for agent in (self.vlm_llm_agent, self.fallback_llm_agent):
+            if agent is not None:
+                agent.instruction = lambda context: self.prompt_for(
+                    context.state.get("temp:vlm_attempts", 1)
+                )
+
+    def prompt_for(self, attempt: int) -> str:
+        """Returns the system prompt of a VLM call: the full one, or the
+        shorter variant for retries when it is configured."""
+        if attempt > 1 and self.retry_prompt is not None:
+            return self.retry_prompt
+        return self.prompt
+
+    def llm_agent(self) -> LlmAgent:
+        """Returns the agent of the next VLM call: the structured output one,
+        or the prompt-only one once the backend rejected the schema."""
+        if self.fallback_llm_agent is not None and output_schema_rejected(
+            self.vlm_llm_agent.model
+        ):
+            return self.fallback_llm_agent
+        return self.vlm_llm_agent
+
+    @property
+    def decoding_mode(self) -> str:
+        if self.fallback_llm_agent is None or self.llm_agent() is self.fallback_llm_agent:
+            return "prompt"
+        return "structured"
+
+    def _fall_back_to_prompt_only(self, error: Exception) -> bool:
+        """Uses prompt-only decoding from the next call on if the backend
+        rejected the structured output request. Returns True if it did."""
+        if self.fallback_llm_agent is None:
+            return False
+        return reject_output_schema(self.vlm_llm_agent.model, error)
 
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
         """Runs the VLM model and stores output in session state."""
+        stage_events = span_events(
+            "vlm",
+            lambda stage: self._run_stage(ctx, stage),
+            session_id=ctx.session.id,
+            iteration=ctx.session.state.get("temp:vlm_attempts", 0) + 1,
+            decoding=self.decoding_mode,
+        )
+        async with aclosing(stage_events) as events:
+            async for event in events:
+                yield event
+
+    async def _run_stage(
+        self, ctx: InvocationContext, stage: Span
+    ) -> AsyncGenerator[Event, None]:
+        """The "vlm" stage: extraction, failed if it left no output."""
+        async for event in self._extract(ctx, stage):
+            yield event
+        if ctx.session.state.get("vlm_output") is None:
+            stage.fail("no_output")
+
+    async def _extract(
+        self, ctx: InvocationContext, stage: Span
+    ) -> AsyncGenerator[Event, None]:
+        """Extracts the presentation from the uploaded image(s)."""
         logger.info(f"[{self.name}] Running VLM Agent...")
 
+        # A new photo of a known board that did not change (see
+        # ImagePreprocessAgent._compare_board)
+        board = ctx.session.state.get("temp:board")
+        if board and board["unchanged"] is not None:
+            logger.info(f"[{self.name}] Board unchanged, reusing its deck")
+            ctx.session.state["vlm_output"] = board["unchanged"]
+            ctx.session.state["vlm_output_validated"] = True
+            ctx.session.state["vlm_cache_key"] = None
+            ctx.session.state["vlm_cache_hit"] = True
+            yield Event(author=self.name, actions=EventActions(escalate=False))
+            return
+
+        # Serve repeat uploads straight from the result cache
+        cache_key = self._cache_key(ctx)
+        ctx.session.state["vlm_cache_key"] = cache_key
+        ctx.session.state["vlm_cache_hit"] = False
+        # Set when the output already passed schema validation (cached, or
+        # validated straight from the response text), so it is not re-validated
+        ctx.session.state["vlm_output_validated"] = False
+        if cache_key is not None:
+            cached_output = await result_cache.aget("vlm", cache_key)
+            if cached_output is not None:
+                logger.info(f"[{self.name}] Cache hit, skipping VLM call")
+                stage.set(cache_hit=True)
+                ctx.session.state["vlm_output"] = cached_output
+                ctx.session.state["vlm_cache_hit"] = True
+                ctx.session.state["vlm_output_validated"] = True
+                # The cached deck covers the whole photo, nothing to merge
+                if ctx.session.state.get("temp:board"):
+                    ctx.session.state["temp:board"]["merge_into"] = None
+                yield Event(author=self.name, actions=EventActions(escalate=False))
+                return
+
+        # Count the VLM calls of this invocation for the retry metrics
+        ctx.session.state["temp:vlm_attempts"] = (
+            ctx.session.state.get("temp:vlm_attempts", 0) + 1
+        )
+        ctx.session.state["temp:vlm_decoding"] = self.decoding_mode
+        prompt = self.prompt_for(ctx.session.state["temp:vlm_attempts"])
+        stage.set(prompt="short" if prompt is self.retry_prompt else "full")
+        stage.add(instruction_bytes=len(prompt.encode("utf-8")))
+
+        # Several whiteboard photos, or the tiles of one: extract them
+        # concurrently into one deck
+        images = image_parts(ctx.user_content)
+        stage.set(images=len(images), input_bytes=payload_size(ctx.user_content.parts))
+        if len(images) > 1:
+            vlm_output, warning = await self._extract_batch(ctx, images)
+            # Every image of the batch is validated before it is merged
+            ctx.session.state["vlm_output"] = vlm_output
+            ctx.session.state["vlm_output_validated"] = vlm_output is not None
+            yield Event(
+                author=self.name,
+                actions=EventActions(
+                    escalate=False, state_delta={"extraction_warning": warning}
+                ),
+            )
+            return
+
         # Clear previous state to avoid context bloat
         try:
             # Call the LLM agent with a timeout
-            async for event in self.vlm_llm_agent.run_async(ctx):
+            async for event in self.llm_agent().run_async(ctx):
+                if not event.partial:
+                    record_usage(event.usage_metadata)
                 yield event
 
             # Get the raw response from the LLM agent
             llm_response_text = ctx.session.state.pop("vlm_raw_response", "")
+            stage.set(output_bytes=len(llm_response_text.encode("utf-8")))
 
             logger.info(
                 f"[{self.name}] Raw LLM response length: {len(llm_response_text)}"
             )
-            logger.info(f"[{self.name}] Response preview: {llm_response_text}")
+            logger.debug(f"[{self.name}] Response preview: {llm_response_text}")
 
             try:
-                # Extract and parse JSON from the response.
-                # json_match = re.search(r"\{[\s\S]*?\}", llm_response_text)
-                json_match = re.search(r"\{[\s\S]*?\}", llm_response_text)
-                if json_match:
-                    json_str = json_match.group(0)
-                    json_str = jsonrepair(json_str)
-
-                    ctx.session.state["vlm_output"] = json.loads(json_str)
-                    
-                    logger.info(
-                        f"[{self.name}] VLM output parsed and stored successfully"
-                    )
-                
-                else:
-                    logger.error(f"[{self.name}] No JSON found in LLM response")
-                    ctx.session.state["vlm_output"] = None
-            
+                # Validate the first balanced JSON object straight from the
+                # text, and only repair it if that fails.
+                vlm_output, validated = parse_presentation(llm_response_text)
+                ctx.session.state["vlm_output"] = vlm_output
+                ctx.session.state["vlm_output_validated"] = validated
+                stage.set(validated=validated)
+
+                logger.info(
+                    f"[{self.name}] VLM output parsed and stored successfully"
+                )
+
             except json.JSONDecodeError as e:
                 logger.error(f"[{self.name}] Failed to parse JSON: {e}")
                 ctx.session.state["vlm_output"] = None
 
         except Exception as e:
             logger.error(f"[{self.name}] Error running VLM: {str(e)}")
+            stage.fail()
+            self._fall_back_to_prompt_only(e)
             ctx.session.state["vlm_output"] = None
             yield Event(author=self.name, actions=EventActions(escalate=False))
             return
@@ -98,6 +545,111 @@ class VLMAgent(BaseAgent):
         # Continue to next agent
         yield Event(author=self.name, actions=EventActions(escalate=False))
 
+    async def _extract_batch(
+        self, ctx: InvocationContext, images: list[types.Part]
+    ) -> tuple[Optional[dict], Optional[str]]:
+        """
+        Extracts and validates every image concurrently (bounded by
+        BATCH_CONCURRENCY) and merges the results into one ordered deck.
+        The tiles of one photo are all extracted at once and stitched.
+
+        Each image gets BATCH_MAX_ATTEMPTS attempts. A deck that misses some
+        images is neither cached nor indexed as its board's deck.
+
+        Returns:
+            tuple: The deck (None if no image could be extracted) and a
+            warning naming the images it misses, if any
+        """
+        tiles = ctx.session.state.get("image_tiles")
+        if not tiles or len(tiles) != len(images):
+            tiles = None
+        logger.info(
+            f"[{self.name}] Batch extraction of {len(images)} "
+            f"{'tiles' if tiles else 'images'}..."
+        )
+
+        # Tiles are parts of one photo, the slowest one bounds the latency
+        semaphore = asyncio.Semaphore(len(images) if tiles else BATCH_CONCURRENCY)
+        text_parts = [part for part in prompt_parts(ctx.user_content) if part.text]
+        loop_attempt = ctx.session.state.get("temp:vlm_attempts", 1)
+
+        async def extract(index: int, image: types.Part) -> Optional[dict]:
+            parts = [image, *text_parts]
+            if tiles:
+                parts.append(types.Part(text=_tile_hint(tiles, index)))
+            async with semaphore:
+                for attempt in range(1, BATCH_MAX_ATTEMPTS + 1):
+                    try:
+                        # Variable text last, after the image
+                        response_text = await generate_text(
+                            self.llm_agent().model,
+                            self.prompt_for(max(attempt, loop_attempt)),
+                            parts,
+                        )
+                        output, validated = parse_presentation(response_text)
+                        if validated or validate_vlm_output(output):
+                            return output
+                        logger.warning(
+                            f"[{self.name}] Image {index + 1}: invalid output "
+                            f"(attempt {attempt}/{BATCH_MAX_ATTEMPTS})"
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"[{self.name}] Image {index + 1}: {str(e)} "
+                            f"(attempt {attempt}/{BATCH_MAX_ATTEMPTS})"
+                        )
+                        self._fall_back_to_prompt_only(e)
+                return None
+
+        results = await asyncio.gather(
+            *(extract(index, image) for index, image in enumerate(images))
+        )
+        presentations = [result for result in results if result is not None]
+        boxes = [box for box, result in zip(tiles or [], results) if result is not None]
+        if not presentations:
+            logger.error(f"[{self.name}] No image in the batch could be extracted")
+            return None, None
+
+        kind = "tiles" if tiles else "images"
+        logger.info(f"[{self.name}] Extracted {len(presentations)}/{len(images)} {kind}")
+        warning = None
+        missing = [index + 1 for index, result in enumerate(results) if result is None]
+        if missing:
+            warning = (
+                f"{len(missing)} of {len(images)} {kind} "
+                f"({', '.join(str(index) for index in missing)}) could not be read, "
+                "the presentation may be incomplete"
+            )
+            logger.warning(f"[{self.name}] {warning}")
+            # Read again in full next time
+            ctx.session.state["vlm_cache_key"] = None
+            board = ctx.session.state.get("temp:board")
+            if board:
+                board["signature"] = None
+
+        if tiles:
+            return stitch_presentations(presentations, boxes), warning
+        return merge_presentations(presentations), warning
+
+    def _cache_key(self, ctx: InvocationContext) -> Optional[str]:
+        """Builds the result cache key from the image digests, model id and
+        prompt version. Extraction is language-neutral, so every language
+        shares it. Returns None when caching is off."""
+        images = image_parts(ctx.user_content)
+        if result_cache is None or not images:
+            return None
+
+        model = self.llm_agent().model
+        return make_key(
+            "vlm",
+            *(
+                ctx.session.state.get("image_digests")
+                or [digest(part.inline_data.data) for part in images]
+            ),
+            getattr(model, "model", model),
+            digest(self.prompt),
+        )
+
 
 class ValidateVLMOutputAgent(BaseAgent):
     """Custom agent to validate VLM output against the presentation schema.
@@ -119,14 +671,48 @@ class ValidateVLMOutputAgent(BaseAgent):
             yield Event(author=self.name, actions=EventActions(escalate=False))
             return
 
-        # Validate schema
-        is_valid = self._validate_schema(vlm_output)
+        with span(
+            "validation",
+            session_id=ctx.session.id,
+            iteration=ctx.session.state.get("temp:vlm_attempts", 1),
+        ) as stage:
+            # Validate schema, unless the VLM stage already did
+            validated = ctx.session.state.get("vlm_output_validated", False)
+            stage.set(prevalidated=validated)
+            is_valid = validated or self._validate_schema(vlm_output)
+
+            # Repair the broken slides instead of re-running the whole VLM call
+            if not is_valid:
+                repaired = await self._repair(vlm_output)
+                stage.set(repaired=repaired is not None)
+                if repaired is not None:
+                    vlm_output = repaired
+                    ctx.session.state["vlm_output"] = repaired
+                    ctx.session.state["vlm_output_validated"] = True
+                    is_valid = True
+
+            if not is_valid:
+                stage.fail("invalid")
 
         # Update state with validation result
         ctx.session.state["validation_passed"] = is_valid
 
         logger.info(f"[{self.name}] Validation result: {is_valid}")
 
+        if is_valid:
+            vlm_output = await _update_board(ctx, vlm_output)
+            _strip_images(ctx)
+
+        cache_key = ctx.session.state.get("vlm_cache_key")
+        if is_valid and cache_key and not ctx.session.state.get("vlm_cache_hit"):
+            await result_cache.aput("vlm", cache_key, vlm_output)
+
+        if is_valid and not ctx.session.state.get("vlm_cache_hit"):
+            record_vlm_attempts(
+                ctx.session.state.get("temp:vlm_decoding", "prompt"),
+                ctx.session.state.get("temp:vlm_attempts", 1),
+            )
+
         if is_valid:
             yield Event(author=self.name, actions=EventActions(escalate=True))
         else:
@@ -138,6 +724,118 @@ class ValidateVLMOutputAgent(BaseAgent):
         """
         return validate_vlm_output(vlm_output)
 
+    async def _repair(self, vlm_output: dict) -> Optional[dict]:
+        """Repairs an invalid output while keeping the slides that validate.
+
+        Shape problems are fixed deterministically first. Slides that are
+        still broken are sent, with their error locations, to a cheap
+        text-only model. Returns None when only a new VLM call can help.
+        """
+        fixed = fix_vlm_output(vlm_output)
+        if not validation_errors(fixed):
+            logger.info(f"[{self.name}] Output repaired deterministically")
+            return fixed
+
+        broken = broken_slides(fixed)
+        slide_errors = sum(len(errors) for errors in broken.values())
+        # Missing title/slides or unfixable structure: regenerate from the image
+        if not REPAIR_MODEL or not broken or slide_errors != len(
+            validation_errors(fixed)
+        ):
+            return None
+
+        logger.info(
+            f"[{self.name}] Repairing slides {sorted(broken)} with {REPAIR_MODEL}"
+        )
+        payload = {
+            "slides": [
+                {"index": index, "slide": fixed["slides"][index], "errors": errors}
+                for index, errors in sorted(broken.items())
+            ]
+        }
+        try:
+            response_text = await generate_text(
+                REPAIR_MODEL,
+                REPAIR_INSTRUCTIONS,
+                [types.Part(text=json.dumps(payload, ensure_ascii=False))],
+            )
+            repaired_slides = parse_response(response_text)["slides"]
+        except Exception as e:
+            logger.error(f"[{self.name}] Slide repair failed: {str(e)}")
+            return None
+
+        if not isinstance(repaired_slides, list) or len(repaired_slides) != len(broken):
+            return None
+
+        slides = list(fixed["slides"])
+        for index, slide in zip(sorted(broken), repaired_slides):
+            slides[index] = slide
+        repaired = fix_vlm_output({**fixed, "slides": slides})
+
+        if validation_errors(repaired):
+            return None
+        logger.info(f"[{self.name}] Output repaired with a text-only call")
+        return repaired
+
+
+def _tile_hint(tiles: list[list[int]], index: int) -> str:
+    """Describes where a tile sits in its photo (see TILE_HINT)."""
+    lefts = sorted({box[0] for box in tiles})
+    tops = sorted({box[1] for box in tiles})
+    return TILE_HINT.format(
+        index=index + 1,
+        count=len(tiles),
+        row=tops.index(tiles[index][1]) + 1,
+        column=lefts.index(tiles[index][0]) + 1,
+    ).strip()
+
+
+async def _update_board(ctx: InvocationContext, vlm_output: dict) -> dict:
+    """Merges a validated revision into the previous deck of its board and
+    indexes the photo. Returns the deck of the whole photo."""
+    board = ctx.session.state.get("temp:board")
+    if not board:
+        return vlm_output
+
+    if board["merge_into"] is not None:
+        vlm_output = merge_revision(board["merge_into"], vlm_output)
+        ctx.session.state["vlm_output"] = vlm_output
+        board["merge_into"] = None
+    # No signature: the extraction missed part of the photo (see _extract_batch)
+    if board["signature"] is not None:
+        await board_index.aput(
+            "board", board["key"], {**board["signature"], "presentation": vlm_output}
+        )
+    ctx.session.state["temp:board"] = {}
+    return vlm_output
+
+
+def _strip_images(ctx: InvocationContext) -> None:
+    """Drops the images from the stored session once the extraction is
+    validated, with session services that support it (see sessions.py)."""
+    strip_images = getattr(ctx.session_service, "strip_images", None)
+    if strip_images is None:
+        return
+    stripped = strip_images(
+        app_name=ctx.session.app_name,
+        user_id=ctx.session.user_id,
+        session_id=ctx.session.id,
+    )
+    if stripped:
+        logger.info(f"Removed {stripped} bytes of images from session {ctx.session.id}")
+
+
+def _enhancer_request(callback_context, llm_request) -> None:
+    """Sends the enhancer model only the prepared slide JSON, never the
+    conversation with the image and the VLM turns."""
+    llm_request.contents = [
+        types.Content(
+            role="user",
+            parts=[types.Part(text=callback_context.state["temp:enhancer_input"])],
+        )
+    ]
+    return None
+
 
 class EnhancerAgent(BaseAgent):
     """Enhances the textual information extracted from the whiteboarding image
@@ -149,8 +847,11 @@ class EnhancerAgent(BaseAgent):
     def __init__(self, name: str):
         llm_agent = LlmAgent(
             name=f"{name}_llm",
-            model="gemini-2.5-flash",
+            model=ENHANCER_MODEL,
             instruction=LLM_INSTRUCTIONS,
+            # The input is the validated JSON only (see _enhancer_request)
+            include_contents="none",
+            before_model_callback=_enhancer_request,
             output_key="enhanced_output",  # Automatically saves response to state
         )
         super().__init__(
@@ -162,60 +863,374 @@ class EnhancerAgent(BaseAgent):
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
         """Enhances the VLM output using LLM while preserving the schema."""
+        stage_events = span_events(
+            "enhancer",
+            lambda stage: self._enhance(ctx, stage),
+            session_id=ctx.session.id,
+            mode=ENHANCE_MODE,
+        )
+        async with aclosing(stage_events) as events:
+            async for event in events:
+                yield event
+
+    async def _enhance(
+        self, ctx: InvocationContext, stage: Span
+    ) -> AsyncGenerator[Event, None]:
+        """Enhances, renders and publishes the deck."""
         # Get validated VLM output from session state
         vlm_output = ctx.session.state.get("vlm_output", None)
 
         if vlm_output is None:
             logger.error(f"[{self.name}] No VLM output found in session state")
+            stage.fail("no_input")
             yield Event(author=self.name, actions=EventActions(escalate=False))
             return
 
-        try:
-            # Get enhanced content from LLM
-            logger.info(f"[{self.name}] Enhancing presentation content...")
-            async for event in self.llm_agent.run_async(ctx):
+        # Several languages: one deck per language from the same extraction
+        languages = requested_languages(ctx.user_content)
+        if len(languages) > 1:
+            async for event in self._enhance_languages(ctx, stage, vlm_output, languages):
                 yield event
+            return
+
+        cache_key = self._cache_key(vlm_output, languages[0])
+
+        try:
+            enhanced_output = (
+                await result_cache.aget("enhancer", cache_key) if cache_key else None
+            )
+            streamed_slides = 0
+
+            if enhanced_output is not None:
+                logger.info(f"[{self.name}] Cache hit, skipping enhancement call")
+                stage.set(cache_hit=True)
+            elif ENHANCE_MODE == "parallel":
+                enhanced_slides = []
+                async for event in self._enhance_parallel(
+                    ctx, stage, vlm_output, enhanced_slides, languages[0]
+                ):
+                    yield event
+                    streamed_slides += 1
+                enhanced_output = {
+                    "presentation_title": vlm_output["presentation_title"],
+                    "slides": enhanced_slides,
+                }
+            else:
+                # Get enhanced content from LLM, forwarding each slide to the
+                # client as soon as it is complete in the stream
+                enhancer_input = compact_json(
+                    {"language": languages[0], "presentation": vlm_output}
+                )
+                ctx.session.state["temp:enhancer_input"] = enhancer_input
+                stage.add(input_bytes=len(enhancer_input.encode("utf-8")))
+                logger.info(
+                    f"[{self.name}] Enhancing presentation content "
+                    f"({len(enhancer_input)} characters of JSON)..."
+                )
+                slide_stream = JSONArrayItemStream("slides")
+                async for event in self.llm_agent.run_async(ctx):
+                    yield event
+                    if not event.partial:
+                        record_usage(event.usage_metadata)
+                    if event.partial and event.content and event.content.parts:
+                        chunk = "".join(
+                            part.text
+                            for part in event.content.parts
+                            if part.text and not part.thought
+                        )
+                        for slide_text in slide_stream.feed(chunk):
+                            # A preview is best effort: the final parse below
+                            # still reads a slide that cannot be parsed here
+                            try:
+                                slide = repair_loads(slide_text)
+                            except Exception as e:
+                                logger.warning(
+                                    f"[{self.name}] No preview of slide {streamed_slides + 1}: {e}"
+                                )
+                                slide = None
+                            if isinstance(slide, dict):
+                                yield self._slide_event(streamed_slides, slide)
+                            streamed_slides += 1
 
             # Parse the enhanced output
+            raw_output = ""
             try:
-                enhanced_output = ctx.session.state.pop("enhanced_output", "")
-                logger.info(f"[{self.name}] Enhanced output: {enhanced_output}")
-
-                # Remove gemini markdown quotes.
+                if enhanced_output is None:
+                    raw_output = ctx.session.state.pop("enhanced_output", "")
+                    logger.debug(f"[{self.name}] Enhanced output: {raw_output}")
 
-                enhanced_output = enhanced_output.strip()
-                if enhanced_output.startswith("```"):
-                    enhanced_output = enhanced_output[3:]
-                    if enhanced_output.startswith("json"):
-                        enhanced_output = enhanced_output[4:]
+                    # Drop gemini markdown quotes, validate the JSON straight
+                    # from the text and only repair it if that fails.
+                    enhanced_output, validated = parse_presentation(raw_output)
+                    if not validated:
+                        enhanced_output = fix_vlm_output(enhanced_output)
 
-                if enhanced_output.endswith("```"):
-                    enhanced_output = enhanced_output[:-3]
+                stage.set(slides=len(enhanced_output["slides"]))
 
-                enhanced_output = enhanced_output.strip()
-                enhanced_output = json.loads(enhanced_output)
+                # Without streaming (or on a cache hit) preview all slides at once
+                if streamed_slides == 0:
+                    for index, slide in enumerate(enhanced_output["slides"]):
+                        yield self._slide_event(index, slide)
 
-                markdown_content = convert_json_to_marp(enhanced_output)
-                run_success = run_marp("presentation.md", "presentation.pptx")
+                # One render job writes every export format
+                outputs = await export_deck(enhanced_output, workspaces.path(ctx.session.id))
 
-                if run_success:
+                if "pptx" in outputs:
+                    for name, paths in outputs.items():
+                        for path in paths:
+                            await self._publish(ctx, path, EXPORT_MIME_TYPES[name])
+                    if cache_key:
+                        await result_cache.aput("enhancer", cache_key, enhanced_output)
                     logger.info(f"[{self.name}] Content enhancement successful")
-                    yield Event(author=self.name, actions=EventActions(escalate=True))
+                    yield Event(
+                        author=self.name,
+                        actions=EventActions(
+                            escalate=True,
+                            state_delta={
+                                "presentation_path": outputs["pptx"][0],
+                                # Artifact names by format, for the frontend
+                                "exports": _export_names(outputs),
+                            },
+                        ),
+                    )
                 else:
-                    logger.error(f"[{self.name}] Failed to run MARP")
+                    logger.error(f"[{self.name}] Failed to render the presentation")
+                    stage.fail("render_failed")
                     yield Event(author=self.name, actions=EventActions(escalate=False))
 
             except json.JSONDecodeError as e:
                 logger.error(f"[{self.name}] Failed to parse enhanced output: {str(e)}")
-                logger.debug(
-                    f"Raw response: {ctx.session.state.pop("enhanced_output", "")}"
-                )
+                logger.debug(f"Raw response: {raw_output}")
+                stage.fail("invalid_json")
                 yield Event(author=self.name, actions=EventActions(escalate=False))
 
         except Exception as e:
             logger.error(f"[{self.name}] Error in enhancement: {str(e)}")
+            stage.fail()
             yield Event(author=self.name, actions=EventActions(escalate=False))
 
+    async def _enhance_languages(
+        self,
+        ctx: InvocationContext,
+        stage: Span,
+        vlm_output: dict,
+        languages: list[str],
+    ) -> AsyncGenerator[Event, None]:
+        """Enhances the extracted deck into every language concurrently and
+        renders each one as `presentation.<language code>.<format>` as soon
+        as its text is ready. Slide previews are sent per finished language."""
+        logger.info(
+            f"[{self.name}] Enhancing into {len(languages)} languages: "
+            f"{', '.join(languages)}"
+        )
+        stage.set(languages=len(languages))
+        workspace = workspaces.path(ctx.session.id)
+
+        async def build(language: str) -> tuple[str, Optional[dict], dict]:
+            cache_key = self._cache_key(vlm_output, language)
+            try:
+                enhanced = await result_cache.aget("enhancer", cache_key) if cache_key else None
+                if enhanced is None:
+                    enhanced = await self._enhance_text(ctx, stage, vlm_output, language)
+                outputs = await export_deck(
+                    enhanced, workspace, basename=f"presentation.{language_code(language)}"
+                )
+            except Exception as e:
+                logger.error(f"[{self.name}] {language}: {str(e)}")
+                return language, None, {}
+            if cache_key and "pptx" in outputs:
+                await result_cache.aput("enhancer", cache_key, enhanced)
+            return language, enhanced, outputs
+
+        decks = {}
+        tasks = [asyncio.ensure_future(build(language)) for language in languages]
+        try:
+            for next_deck in asyncio.as_completed(tasks):
+                language, enhanced, outputs = await next_deck
+                if "pptx" not in outputs:
+                    logger.error(f"[{self.name}] {language}: failed to render the presentation")
+                    continue
+                for name, paths in outputs.items():
+                    for path in paths:
+                        await self._publish(ctx, path, EXPORT_MIME_TYPES[name])
+                decks[language] = outputs
+                for index, slide in enumerate(enhanced["slides"]):
+                    yield self._slide_event(index, slide, language)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if not decks:
+            stage.fail("render_failed")
+            yield Event(author=self.name, actions=EventActions(escalate=False))
+            return
+
+        exports = {
+            language: _export_names(decks[language])
+            for language in languages
+            if language in decks
+        }
+        primary = next(iter(exports))
+        stage.set(rendered_languages=len(decks))
+        logger.info(f"[{self.name}] Rendered {len(decks)}/{len(languages)} languages")
+        yield Event(
+            author=self.name,
+            actions=EventActions(
+                escalate=True,
+                state_delta={
+                    "presentation_path": decks[primary]["pptx"][0],
+                    # The first language is also the deck of single-language clients
+                    "exports": exports[primary],
+                    "exports_by_language": exports,
+                },
+            ),
+        )
+
+    async def _enhance_text(
+        self, ctx: InvocationContext, stage: Span, vlm_output: dict, language: str
+    ) -> dict:
+        """Enhances the deck into one language without slide previews."""
+        if ENHANCE_MODE == "parallel":
+            slides = []
+            async for _ in self._enhance_parallel(ctx, stage, vlm_output, slides, language):
+                pass
+            return {"presentation_title": vlm_output["presentation_title"], "slides": slides}
+
+        enhancer_input = compact_json({"language": language, "presentation": vlm_output})
+        stage.add(input_bytes=len(enhancer_input.encode("utf-8")))
+        response_text = await generate_text(
+            self.llm_agent.model, LLM_INSTRUCTIONS, [types.Part(text=enhancer_input)]
+        )
+        enhanced, validated = parse_presentation(response_text)
+        return enhanced if validated else fix_vlm_output(enhanced)
+
+    def _cache_key(self, vlm_output: dict, language: str) -> Optional[str]:
+        """Builds the result cache key from the extracted deck, language,
+        model id, mode (with its group size) and the version of the prompt
+        that mode sends. Returns None when caching is off."""
+        if result_cache is None:
+            return None
+        if ENHANCE_MODE == "parallel":
+            mode = f"parallel:{ENHANCE_GROUP_SIZE}"
+            instructions = GROUP_ENHANCE_INSTRUCTIONS
+        else:
+            mode, instructions = ENHANCE_MODE, LLM_INSTRUCTIONS
+        return make_key(
+            "enhancer",
+            digest(vlm_output),
+            language,
+            getattr(ENHANCER_MODEL, "model", ENHANCER_MODEL),
+            mode,
+            digest(instructions),
+        )
+
+    async def _enhance_parallel(
+        self,
+        ctx: InvocationContext,
+        stage: Span,
+        vlm_output: dict,
+        enhanced_slides: list,
+        language: str,
+    ) -> AsyncGenerator[Event, None]:
+        """Enhances groups of ENHANCE_GROUP_SIZE slides concurrently (at most
+        ENHANCE_WORKERS at a time) and appends them to `enhanced_slides` in
+        order, yielding a preview event per slide as soon as every earlier
+        group is done."""
+        slides = vlm_output["slides"]
+        groups = [
+            slides[start : start + ENHANCE_GROUP_SIZE]
+            for start in range(0, len(slides), ENHANCE_GROUP_SIZE)
+        ]
+        logger.info(
+            f"[{self.name}] Enhancing {len(slides)} slides in {len(groups)} groups..."
+        )
+
+        semaphore = asyncio.Semaphore(ENHANCE_WORKERS)
+        # Every group sees the full outline so the deck reads as one piece
+        context = {
+            "presentation_title": vlm_output["presentation_title"],
+            "outline": [slide["title"] for slide in slides],
+            "language": language,
+        }
+
+        async def enhance(index: int, group: list[dict]) -> list[dict]:
+            async with semaphore:
+                try:
+                    group_input = compact_json({**context, "slides": group})
+                    stage.add(input_bytes=len(group_input.encode("utf-8")))
+                    response_text = await generate_text(
+                        self.llm_agent.model,
+                        GROUP_ENHANCE_INSTRUCTIONS,
+                        [types.Part(text=group_input)],
+                    )
+                    group_output, validated = parse_presentation(response_text, SlideGroup)
+                    enhanced = (
+                        group_output.get("slides") if isinstance(group_output, dict) else None
+                    )
+                    if validated and enhanced:
+                        return enhanced
+                    if isinstance(enhanced, list) and enhanced:
+                        # Only the slides that can be repaired into shape
+                        enhanced = valid_slides(
+                            fix_vlm_output({**context, "slides": enhanced})["slides"]
+                        )
+                        if enhanced:
+                            return enhanced
+                    logger.error(f"[{self.name}] Group {index + 1}: no valid slides in result")
+                except Exception as e:
+                    logger.error(f"[{self.name}] Group {index + 1}: {str(e)}")
+                # Keep the extracted slides rather than failing the whole deck
+                return group
+
+        tasks = [
+            asyncio.ensure_future(enhance(index, group))
+            for index, group in enumerate(groups)
+        ]
+        try:
+            for task in tasks:
+                for slide in split_long_slides(await task):
+                    enhanced_slides.append(
+                        {**slide, "slide_number": len(enhanced_slides) + 1}
+                    )
+                    yield self._slide_event(
+                        len(enhanced_slides) - 1, enhanced_slides[-1]
+                    )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _slide_event(self, index: int, slide: dict, language: Optional[str] = None) -> Event:
+        """Preview event for one enhanced slide. It is partial, so it is
+        streamed to the client but not stored in the session history."""
+        metadata = {"owl_slide": slide, "slide_index": index}
+        if language is not None:
+            metadata["language"] = language
+        return Event(author=self.name, partial=True, custom_metadata=metadata)
+
+    async def _publish(
+        self, ctx: InvocationContext, path: str, mime_type: str
+    ) -> None:
+        """Saves a rendered file as a session artifact so the frontend can
+        download the deck of its own session."""
+        if ctx.artifact_service is None:
+            return
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        await ctx.artifact_service.save_artifact(
+            app_name=ctx.app_name,
+            user_id=ctx.user_id,
+            session_id=ctx.session.id,
+            filename=os.path.basename(path),
+            artifact=types.Part.from_bytes(data=data, mime_type=mime_type),
+        )
+
+
+def _export_names(outputs: dict[str, list[str]]) -> dict[str, list[str]]:
+    """Artifact names of rendered files by format."""
+    return {name: [os.path.basename(path) for path in paths] for name, paths in outputs.items()}
+
 
 vlm_agent = VLMAgent(
     name="core_vlm_agent",
@@ -223,7 +1238,9 @@ vlm_agent = VLMAgent(
     instructions=VLM_INSTRUCTIONS,
     model=VLM_MODEL,
     output_schema=PresentationSchema,
+    retry_instructions=VLM_RETRY_INSTRUCTIONS if VLM_SHORT_RETRY else None,
 )
+preprocess_agent = ImagePreprocessAgent(name="ImagePreprocessor")
 validation_agent = ValidateVLMOutputAgent(name="ValidationAgent")
 enhancer_agent = EnhancerAgent(name="ContentEnhancer")
 
@@ -233,5 +1250,5 @@ _core_loop = LoopAgent(
 )
 core_loop = SequentialAgent(
     name="CoreLoop",
-    sub_agents=[_core_loop, enhancer_agent],
+    sub_agents=[preprocess_agent, _core_loop, enhancer_agent],
 )
@@ -0,0 +1,282 @@
+"""Tile-level change detection between photos of the same whiteboard.
+
+Each board keeps a small index of its last photo: a grid of perceptual
+hashes (one dHash per tile) and a thumbnail to align the next photo with.
+When a new photo of the board arrives, it is aligned to the previous one,
+and only the tiles whose hash moved by more than a few bits go to the VLM.
+The slides extracted from them are merged into the previous deck, so a
+revision costs in proportion to what changed on the board.
+"""
+
+import base64
+import io
+import math
+from typing import Optional
+
+from PIL import Image, ImageChops, ImageOps, ImageStat
+
+from .utils import merge_slides
+
+# Width of the grayscale thumbnail the photos are aligned on
+_ALIGN_WIDTH = 160
+# Largest camera shift searched, as a fraction of the thumbnail size
+_MAX_SHIFT = 0.06
+# Mean absolute difference (0-255) above which an aligned photo is taken for
+# another board, or a different view of it
+_MAX_ALIGN_DIFF = 40.0
+# Brightness step two neighbouring hash cells need to count as an edge, so
+# blank board areas hash the same despite lighting and sensor noise
+_EDGE_STEP = 6
+
+
+def board_signature(image: Image.Image, grid: int) -> dict:
+    """
+    Returns the index entry of a photo: its tile hashes and the thumbnail
+    the next photo is aligned on.
+
+    Args:
+        image:
+            The photo, already transposed to its camera orientation
+        grid:
+            Tiles per side
+
+    Returns:
+        dict: JSON-able `grid`, `hashes` (hex, row by row), `inner_hashes`
+        (the same without the strip along the photo border, see `_inner`)
+        and `thumbnail`
+    """
+    gray = _gray(image)
+    thumbnail = _thumbnail(gray)
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format="PNG")
+    boxes = tile_boxes(gray.size, grid)
+    return {
+        "grid": grid,
+        "hashes": [f"{_dhash(gray.crop(box)):016x}" for box in boxes],
+        "inner_hashes": [
+            f"{_dhash(gray.crop(_inner(box, gray.size))):016x}" for box in boxes
+        ],
+        "thumbnail": base64.b64encode(buffer.getvalue()).decode("ascii"),
+    }
+
+
+def compare_board(
+    data: bytes,
+    previous: Optional[dict],
+    grid: int,
+    max_bits: int,
+    max_changed: float,
+    quality: int,
+) -> tuple[dict, Optional[list[int]], Optional[bytes]]:
+    """
+    Compares a photo, at full resolution, with the index entry of its board.
+
+    Args:
+        data:
+            Encoded photo
+        previous:
+            Index entry of the board's previous photo, if any
+        grid:
+            Tiles per side of a new index entry
+        max_bits:
+            Hash bits a tile may differ by and still count as unchanged
+        max_changed:
+            Fraction of changed tiles above which the whole photo is extracted
+        quality:
+            JPEG quality of the cropped region
+
+    Returns:
+        tuple: The signature of the photo, the changed tiles (None when the
+        whole photo must be extracted) and the JPEG of the region they cover
+        (None when nothing changed)
+    """
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    signature = board_signature(image, grid)
+    if previous is None or previous.get("grid") != grid:
+        return signature, None, None
+
+    tiles, _ = changed_tiles(previous, image, max_bits)
+    if tiles is None or len(tiles) > max_changed * grid * grid:
+        return signature, None, None
+    if not tiles:
+        return signature, tiles, None
+
+    region = crop_tiles(image, tiles, grid)
+    if region.mode not in ("RGB", "L"):
+        region = region.convert("RGB")
+    buffer = io.BytesIO()
+    region.save(buffer, format="JPEG", quality=quality)
+    return signature, tiles, buffer.getvalue()
+
+
+def changed_tiles(
+    previous: dict, image: Image.Image, max_bits: int
+) -> tuple[Optional[list[int]], tuple[float, float]]:
+    """
+    Aligns a photo to the previous photo of the board and lists the tiles
+    whose content changed.
+
+    Args:
+        previous:
+            `board_signature` of the previous photo
+        image:
+            The new photo, already transposed to its camera orientation
+        max_bits:
+            Hash bits a tile may differ by and still count as unchanged
+
+    Returns:
+        tuple: The indices of the changed tiles (row by row), or None when
+        the photo does not line up with the previous one, and the shift of
+        the new photo as fractions of its width and height
+    """
+    gray = _gray(image)
+    shift = _align(_decode_thumbnail(previous["thumbnail"]), _thumbnail(gray))
+    if shift is None:
+        return None, (0.0, 0.0)
+
+    width, height = gray.size
+    offset = (round(shift[0] * width), round(shift[1] * height))
+    changed = []
+    for index, box in enumerate(tile_boxes(gray.size, previous["grid"])):
+        # The previous tile, where it sits in the new photo
+        moved = _move(box, offset)
+        hashes = previous["hashes"]
+        if _clip(moved, gray.size) != moved:
+            # Part of it is out of view: compare the part both photos show
+            moved = _move(_inner(box, gray.size), offset)
+            hashes = previous.get("inner_hashes")
+            if hashes is None or _clip(moved, gray.size) != moved:
+                changed.append(index)
+                continue
+        distance = bin(_dhash(gray.crop(moved)) ^ int(hashes[index], 16)).count("1")
+        if distance > max_bits:
+            changed.append(index)
+    return changed, shift
+
+
+def crop_tiles(image: Image.Image, tiles: list[int], grid: int, margin: float = 0.5) -> Image.Image:
+    """
+    Returns the region of a photo that covers the given tiles.
+
+    Args:
+        image:
+            The photo
+        tiles:
+            Tile indices (row by row)
+        grid:
+            Tiles per side
+        margin:
+            Extra border around the region, in tiles, so writing that
+            crosses a tile edge is not cut off
+    """
+    boxes = tile_boxes(image.size, grid)
+    left = min(boxes[index][0] for index in tiles)
+    top = min(boxes[index][1] for index in tiles)
+    right = max(boxes[index][2] for index in tiles)
+    bottom = max(boxes[index][3] for index in tiles)
+    pad_x = round(image.width / grid * margin)
+    pad_y = round(image.height / grid * margin)
+    return image.crop(
+        (
+            max(0, left - pad_x),
+            max(0, top - pad_y),
+            min(image.width, right + pad_x),
+            min(image.height, bottom + pad_y),
+        )
+    )
+
+
+def merge_revision(previous: dict, update: dict) -> dict:
+    """
+    Merges the slides extracted from the changed part of a board into the
+    deck of its previous photo (see `merge_slides`). A slide read again
+    takes the points read from the new photo, so edits and erasures show.
+    """
+    return {
+        "presentation_title": previous["presentation_title"],
+        "slides": merge_slides(previous["slides"], update.get("slides", [])),
+    }
+
+
+def tile_boxes(size: tuple[int, int], grid: int) -> list[tuple[int, int, int, int]]:
+    """Returns the (left, top, right, bottom) boxes of a grid, row by row."""
+    width, height = size
+    return [
+        (
+            column * width // grid,
+            row * height // grid,
+            (column + 1) * width // grid,
+            (row + 1) * height // grid,
+        )
+        for row in range(grid)
+        for column in range(grid)
+    ]
+
+
+def _gray(image: Image.Image) -> Image.Image:
+    return ImageOps.autocontrast(image.convert("L"), cutoff=1)
+
+
+def _thumbnail(gray: Image.Image) -> Image.Image:
+    height = max(1, round(_ALIGN_WIDTH * gray.height / gray.width))
+    return gray.resize((_ALIGN_WIDTH, height), Image.Resampling.BOX)
+
+
+def _decode_thumbnail(data: str) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(data))).convert("L")
+
+
+def _dhash(tile: Image.Image) -> int:
+    """64-bit difference hash: is each of 8x8 cells brighter than its right
+    neighbour (by more than _EDGE_STEP)."""
+    cells = tile.resize((9, 8), Image.Resampling.BOX).tobytes()
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left, right = cells[row * 9 + column], cells[row * 9 + column + 1]
+            value = (value << 1) | (left - right > _EDGE_STEP)
+    return value
+
+
+def _align(previous: Image.Image, current: Image.Image) -> Optional[tuple[float, float]]:
+    """Finds the shift of `current` against `previous` (as fractions of the
+    size) that minimizes their difference, or None if nothing lines up."""
+    if current.size != previous.size:
+        current = current.resize(previous.size, Image.Resampling.BOX)
+    width, height = previous.size
+    max_x, max_y = max(1, round(width * _MAX_SHIFT)), max(1, round(height * _MAX_SHIFT))
+    # Compare the inner part only, so every shift sees the same pixels
+    inner = (max_x, max_y, width - max_x, height - max_y)
+    reference = previous.crop(inner)
+
+    best, best_shift = None, (0, 0)
+    for dy in range(-max_y, max_y + 1):
+        for dx in range(-max_x, max_x + 1):
+            moved = current.crop((inner[0] + dx, inner[1] + dy, inner[2] + dx, inner[3] + dy))
+            difference = ImageStat.Stat(ImageChops.difference(reference, moved)).mean[0]
+            if best is None or difference < best:
+                best, best_shift = difference, (dx, dy)
+    if best > _MAX_ALIGN_DIFF:
+        return None
+    return best_shift[0] / width, best_shift[1] / height
+
+
+def _move(box: tuple, offset: tuple[int, int]) -> tuple:
+    return box[0] + offset[0], box[1] + offset[1], box[2] + offset[0], box[3] + offset[1]
+
+
+def _clip(box: tuple, size: tuple[int, int]) -> tuple:
+    return max(0, box[0]), max(0, box[1]), min(size[0], box[2]), min(size[1], box[3])
+
+
+def _inner(box: tuple, size: tuple[int, int]) -> tuple:
+    """A tile without the strip along the photo border that the largest
+    camera shift `_align` finds can move out of view."""
+    margin_x = math.ceil(size[0] * (_MAX_SHIFT + 1 / _ALIGN_WIDTH))
+    margin_y = math.ceil(size[1] * (_MAX_SHIFT + 1 / _ALIGN_WIDTH))
+    return (
+        box[0] + margin_x if box[0] == 0 else box[0],
+        box[1] + margin_y if box[1] == 0 else box[1],
+        box[2] - margin_x if box[2] == size[0] else box[2],
+        box[3] - margin_y if box[3] == size[1] else box[3],
+    )
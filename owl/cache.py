@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def digest(data: Any) -> str:
+    """
+    Returns a stable sha256 hex digest for bytes, strings or JSON-able values.
+
+    Args:
+        data:
+            Raw bytes, a string, or any JSON-serializable value
+
+    Returns:
+        str: Hex digest of the content
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    elif not isinstance(data, (bytes, bytearray)):
+        data = json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(*parts: Any) -> str:
+    """Builds a cache key from the given parts (digests, language, model id...)."""
+    return digest("\x1f".join(str(part) for part in parts))
+
+
+class ResultCache:
+    """Persistent content-addressed cache for pipeline stage results.
+
+    Entries are JSON values stored in SQLite. The cache is bounded by entry
+    count and total payload size (least recently used entries are evicted
+    first) and every entry expires after `ttl_seconds`. Lookups only read:
+    access times are kept in memory and written with the next `put`.
+    Agents use `aget` and `aput`, which run off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: int = 7 * 24 * 3600,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        # Access times of the entries read since the last put
+        self._accessed: dict[str, float] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " namespace TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+        )
+        self._conn.commit()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        Looks up a cached value.
+
+        Args:
+            namespace:
+                Stage name, used for the hit/miss counters
+            key:
+                Cache key built with `make_key`
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            # Expired entries are deleted by the next put
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses[namespace] = self.misses.get(namespace, 0) + 1
+                return None
+
+            self._accessed[key] = now
+            self.hits[namespace] = self.hits.get(namespace, 0) + 1
+
+        return json.loads(row[0])
+
+    async def aget(self, namespace: str, key: str) -> Optional[Any]:
+        """`get` on a worker thread, for use from the event loop."""
+        return await asyncio.to_thread(self.get, namespace, key)
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        """Stores a JSON-serializable value and evicts entries over the bounds."""
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.warning(f"[cache] Entry for {namespace} too large to cache ({size} bytes)")
+            return
+
+        now = time.time()
+        with self._lock:
+            if self._accessed:
+                self._conn.executemany(
+                    "UPDATE entries SET accessed = ? WHERE key = ?",
+                    [(accessed, accessed_key) for accessed_key, accessed in self._accessed.items()],
+                )
+                self._accessed.clear()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries"
+                " (key, namespace, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, payload, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    async def aput(self, namespace: str, key: str, value: Any) -> None:
+        """`put` on a worker thread, for use from the event loop."""
+        await asyncio.to_thread(self.put, namespace, key, value)
+
+    def _evict(self, now: float) -> None:
+        """Drops expired entries, then least recently used ones until within bounds."""
+        cursor = self._conn.execute(
+            "DELETE FROM entries WHERE created < ?", (now - self.ttl_seconds,)
+        )
+        self.evictions += max(cursor.rowcount, 0)
+
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ).fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._accessed.clear()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size of the cache."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,139 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_list(name: str, default: str) -> list[str]:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+# Models (any LiteLLM "provider/model" name, e.g. "openai/..." with OPENAI_API_BASE)
+VLM_MODEL_NAME = os.getenv(
+    "OWL_VLM_MODEL", "nvidia_nim/nvidia/llama-3.1-nemotron-nano-vl-8b-v1"
+)
+ENHANCER_MODEL_NAME = os.getenv("OWL_ENHANCER_MODEL", "gemini-2.5-flash")
+# Candidate models per stage, from the preferred to the cheapest one
+VLM_MODEL_NAMES = _env_list("OWL_VLM_MODELS", VLM_MODEL_NAME)
+ENHANCER_MODEL_NAMES = _env_list("OWL_ENHANCER_MODELS", ENHANCER_MODEL_NAME)
+
+# Model routing: images up to this size (after preprocessing) go to the
+# cheapest candidate, and a call slower than the latency quantile of its
+# model gets a hedged request to the next candidate
+ROUTE_SIMPLE_MAX_KB = _env_int("OWL_ROUTE_SIMPLE_MAX_KB", 40)
+HEDGE_ENABLED = _env_bool("OWL_HEDGE_ENABLED", True)
+HEDGE_QUANTILE = _env_float("OWL_HEDGE_QUANTILE", 0.95)
+# Hedge delay until a model has enough recorded calls for the quantile
+HEDGE_DEFAULT_SECONDS = _env_float("OWL_HEDGE_DEFAULT_SECONDS", 30.0)
+
+# Result cache for the VLM and enhancer stages
+CACHE_ENABLED = _env_bool("OWL_CACHE_ENABLED", True)
+CACHE_DIR = os.getenv("OWL_CACHE_DIR", ".owl_cache")
+CACHE_MAX_ENTRIES = _env_int("OWL_CACHE_MAX_ENTRIES", 512)
+CACHE_MAX_MB = _env_float("OWL_CACHE_MAX_MB", 64.0)
+CACHE_TTL_SECONDS = _env_int("OWL_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+
+# Deck rendering: "native" writes the .pptx directly, "marp" renders the
+# markdown with the Marp CLI (needs Node and `npm install`)
+RENDER_BACKEND = os.getenv("OWL_RENDER_BACKEND", "native")
+THEME = os.getenv("OWL_THEME", "gaia")
+# Formats written by each render job (pptx is always written) and the
+# width of the PNG slide thumbnails
+EXPORT_FORMATS = [name.lower() for name in _env_list("OWL_EXPORT_FORMATS", "pptx,pdf,html,png")]
+THUMBNAIL_WIDTH = _env_int("OWL_THUMBNAIL_WIDTH", 480)
+# Font file for the PDF and PNG exports (default: the theme font if installed)
+FONT_PATH = os.getenv("OWL_FONT_PATH", "")
+
+# Marp render worker pool
+RENDER_WORKERS = _env_int("OWL_RENDER_WORKERS", 2)
+RENDER_QUEUE_SIZE = _env_int("OWL_RENDER_QUEUE_SIZE", 16)
+RENDER_TIMEOUT_SECONDS = _env_float("OWL_RENDER_TIMEOUT_SECONDS", 120.0)
+
+# Binary image uploads (server.py), kept in the session workspace until used
+UPLOAD_MAX_MB = _env_float("OWL_UPLOAD_MAX_MB", 25.0)
+
+# Asynchronous generation jobs (server.py /jobs)
+JOB_WORKERS = _env_int("OWL_JOB_WORKERS", 4)
+JOB_QUEUE_SIZE = _env_int("OWL_JOB_QUEUE_SIZE", 32)
+JOB_TIMEOUT_SECONDS = _env_float("OWL_JOB_TIMEOUT_SECONDS", 600.0)
+JOB_TTL_SECONDS = _env_int("OWL_JOB_TTL_SECONDS", 3600)
+
+# Session store of server.py: "memory" keeps sessions in process, bounded
+# by idle time, count and estimated size; "adk" leaves ADK's default store
+SESSION_STORE = os.getenv("OWL_SESSION_STORE", "memory")
+SESSION_MAX_COUNT = _env_int("OWL_SESSION_MAX_COUNT", 1000)
+SESSION_MAX_MB = _env_float("OWL_SESSION_MAX_MB", 256.0)
+SESSION_TTL_SECONDS = _env_int("OWL_SESSION_TTL_SECONDS", 3600)
+
+# Per-session render workspaces
+WORKSPACE_DIR = os.getenv("OWL_WORKSPACE_DIR", ".owl_workspaces")
+WORKSPACE_MAX_MB = _env_float("OWL_WORKSPACE_MAX_MB", 512.0)
+WORKSPACE_TTL_SECONDS = _env_int("OWL_WORKSPACE_TTL_SECONDS", 24 * 3600)
+
+# Multi-image batch extraction
+BATCH_CONCURRENCY = _env_int("OWL_BATCH_CONCURRENCY", 4)
+BATCH_MAX_ATTEMPTS = _env_int("OWL_BATCH_MAX_ATTEMPTS", 3)
+
+# Tiled extraction: a single photo whose longest side is at least
+# TILE_MIN_DIMENSION px is cut into overlapping tiles of up to
+# PREPROCESS_MAX_DIMENSION px instead of being downscaled, and the tiles
+# are extracted concurrently and stitched into one deck
+TILE_ENABLED = _env_bool("OWL_TILE_ENABLED", True)
+TILE_MIN_DIMENSION = _env_int("OWL_TILE_MIN_DIMENSION", 2000)
+TILE_OVERLAP = _env_float("OWL_TILE_OVERLAP", 0.15)
+TILE_MAX_TILES = _env_int("OWL_TILE_MAX_TILES", 9)
+
+# Revisions of the same board (session state "board_id"): tiles of a
+# grid x grid perceptual-hash index that moved by more than BOARD_TILE_BITS
+# are re-extracted and merged into the previous deck, unless more than
+# BOARD_MAX_CHANGED of the tiles changed
+BOARD_INDEX_ENABLED = _env_bool("OWL_BOARD_INDEX_ENABLED", True)
+BOARD_GRID = _env_int("OWL_BOARD_GRID", 4)
+BOARD_TILE_BITS = _env_int("OWL_BOARD_TILE_BITS", 6)
+BOARD_MAX_CHANGED = _env_float("OWL_BOARD_MAX_CHANGED", 0.5)
+
+# Image preprocessing before the VLM
+PREPROCESS_ENABLED = _env_bool("OWL_PREPROCESS_ENABLED", True)
+PREPROCESS_MODE = os.getenv("OWL_PREPROCESS_MODE", "grayscale")
+PREPROCESS_MAX_DIMENSION = _env_int("OWL_PREPROCESS_MAX_DIMENSION", 1024)
+PREPROCESS_TARGET_KB = _env_int("OWL_PREPROCESS_TARGET_KB", 200)
+PREPROCESS_QUALITY = _env_int("OWL_PREPROCESS_QUALITY", 60)
+
+# Targeted repair of slides that fail validation
+REPAIR_MODEL = os.getenv("OWL_REPAIR_MODEL", "gemini-2.5-flash-lite")
+
+# Enhancement: "single" sends the whole deck in one prompt and streams its
+# slides, "parallel" (opt-in) enhances slide groups concurrently
+ENHANCE_MODE = os.getenv("OWL_ENHANCE_MODE", "single")
+# At least one slide per group and one call at a time
+ENHANCE_GROUP_SIZE = max(1, _env_int("OWL_ENHANCE_GROUP_SIZE", 3))
+ENHANCE_WORKERS = max(1, _env_int("OWL_ENHANCE_WORKERS", 4))
+
+# Constrained decoding of the VLM output with PresentationSchema
+STRUCTURED_OUTPUT = _env_bool("OWL_STRUCTURED_OUTPUT", True)
+# Retry invalid VLM outputs with the shorter instructions: fewer input tokens,
+# but the retry misses the provider's cached prompt prefix
+VLM_SHORT_RETRY = _env_bool("OWL_VLM_SHORT_RETRY", False)
+
+# Stage telemetry: JSON span events (also written to this file when set) and
+# the number of recent runs used for the p50/p95/p99 quantiles
+TELEMETRY_FILE = os.getenv("OWL_TELEMETRY_FILE", "")
+TELEMETRY_WINDOW = _env_int("OWL_TELEMETRY_WINDOW", 1024)
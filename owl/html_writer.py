@@ -0,0 +1,53 @@
+"""Self-contained HTML export: one 16:9 `<section>` per slide, theme CSS inline."""
+
+from html import escape
+from typing import Union
+
+from .themes import DEFAULT_THEME, stylesheet, theme_name
+
+
+def html_document(presentation_data: dict, theme: str = DEFAULT_THEME) -> str:
+    """
+    Returns a presentation as a standalone HTML page.
+
+    Args:
+        presentation_data:
+            Validated dictionary with `presentation_title` and `slides`
+        theme:
+            Theme name (unknown names fall back to the default theme)
+    """
+    title = escape(str(presentation_data["presentation_title"]))
+    slides = presentation_data["slides"]
+    sections = [f'<section class="cover"><h1>{title}</h1></section>']
+    for index, slide in enumerate(slides, start=2):
+        sections.append(
+            f"<section><h1>{_inline(slide['title'])}</h1>{_body(slide['content'])}"
+            f"<footer>{index} / {len(slides) + 1}</footer></section>"
+        )
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f"<title>{title}</title><style>{stylesheet(theme_name(theme))}</style></head>"
+        f"<body>\n{chr(10).join(sections)}\n</body></html>\n"
+    )
+
+
+def write_html(presentation_data: dict, output_file: str, theme: str = DEFAULT_THEME) -> None:
+    """Writes `html_document` to a file."""
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(html_document(presentation_data, theme))
+
+
+def _body(content: Union[str, list]) -> str:
+    if isinstance(content, list):
+        items = "".join(f"<li>{_inline(item)}</li>" for item in content if str(item).strip())
+        return f"<ul>{items}</ul>"
+    return f"<p>{_inline(content)}</p>"
+
+
+def _inline(text) -> str:
+    """Escapes text; `**bold**` spans become <strong>."""
+    chunks = escape(str(text).strip()).split("**")
+    return "".join(
+        f"<strong>{chunk}</strong>" if index % 2 else chunk for index, chunk in enumerate(chunks)
+    )
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from .telemetry import session_progress
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job:
+    """A queued agent run and, once finished, its result or error."""
+
+    def __init__(self, request: dict, session_id: str):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.session_id = session_id
+        self.status = "queued"
+        self.result: Optional[dict] = None
+        # Slides the enhancer has streamed so far, by language ("" when a
+        # single language was requested), while the job runs
+        self.slides: dict[str, list[dict]] = {}
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def add_slide(self, slide: dict, language: Optional[str] = None) -> None:
+        """Adds a streamed slide to the preview of the running job."""
+        self.slides.setdefault(language or "", []).append(slide)
+
+    def to_dict(self) -> dict:
+        job = {
+            "id": self.id,
+            "status": self.status,
+            "sessionId": self.session_id,
+            "submittedAt": self.submitted_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.status != "queued":
+            job["progress"] = session_progress(self.session_id)
+        if self.status == "running":
+            job["slides"] = self.slides
+        if self.result is not None:
+            job["result"] = self.result
+        if self.error is not None:
+            job["error"] = self.error
+        return job
+
+
+class JobQueue:
+    """Bounded queue of agent runs served by a fixed pool of asyncio workers.
+
+    `submit` returns immediately with a job id, or raises QueueFull when
+    `max_queue` jobs are already waiting, so clients get backpressure instead
+    of a blocked request. `run` is called with the request and its job, to
+    report the slides streamed so far. Workers start lazily on the first submit inside the
+    running event loop. Finished jobs are kept for `ttl_seconds` so their
+    status and result can be polled.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[dict, Job], Awaitable[dict]],
+        workers: int = 4,
+        max_queue: int = 32,
+        timeout: float = 600.0,
+        ttl_seconds: int = 3600,
+    ):
+        self.run = run
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.ttl_seconds = ttl_seconds
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [
+            loop.create_task(self._worker_loop(index)) for index in range(self.workers)
+        ]
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, request: dict, session_id: str) -> Job:
+        """
+        Queues an agent run.
+
+        Args:
+            request:
+                Body of the ADK `/run` request
+            session_id:
+                Session of the run, for progress reporting
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            QueueFull: If `max_queue` jobs are already waiting
+        """
+        self._ensure_started()
+        self._prune()
+        job = Job(request, session_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"{self.max_queue} jobs are already waiting") from None
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> int:
+        """Returns the number of queued jobs submitted before `job`."""
+        if job.status != "queued":
+            return 0
+        return sum(
+            1
+            for other in self._jobs.values()
+            if other.status == "queued" and other.submitted_at < job.submitted_at
+        )
+
+    def stats(self) -> dict:
+        statuses = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self._jobs.values():
+            statuses[job.status] += 1
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue_depth,
+            "jobs": statuses,
+        }
+
+    async def _worker_loop(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await asyncio.wait_for(self.run(job.request, job), self.timeout)
+                job.status = "done"
+            except asyncio.TimeoutError:
+                job.error = f"Timed out after {self.timeout:g}s"
+                job.status = "failed"
+            except Exception as e:
+                logger.error(f"[jobs] Job {job.id} failed: {e}")
+                job.error = str(e) or type(e).__name__
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                # The request holds the images, results are all that is polled
+                job.request = None
+                job.slides = {}
+                self._queue.task_done()
+
+    def _prune(self) -> None:
+        """Forgets finished jobs older than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [
+            job.id
+            for job in self._jobs.values()
+            if job.finished and job.finished_at < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    async def close(self) -> None:
+        """Stops every worker; running jobs are cancelled."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        self._queue = None
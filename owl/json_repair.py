@@ -0,0 +1,534 @@
+"""Pure-Python JSON extraction and repair for model responses.
+
+Replaces the `jsonrepair` npm package (previously loaded via pythonmonkey).
+`JSONExtractor` finds the first balanced top-level JSON value in a (possibly
+streamed) response, and `loads` parses it, repairing the failure modes the
+VLM prompt warns about on the way: markdown fences, comments, trailing text,
+single/curly quotes, unquoted keys and values, unterminated strings, missing
+or trailing commas, missing colons, Python literals, `...` placeholders and
+truncated output with unclosed brackets.
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+from .telemetry import span
+
+_OPENERS = {"{": "}", "[": "]"}
+_CLOSERS = {"}": "{", "]": "["}
+_QUOTES = {'"': '"', "'": "'", "“": "”", "‘": "’"}
+# Curly quotes are often closed with a straight one
+_CLOSING_QUOTES = {"”": '"', "’": "'"}
+_LITERALS = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "True": True,
+    "False": False,
+    "None": None,
+}
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class JSONRepairError(json.JSONDecodeError):
+    """Raised when no JSON value can be recovered from the text."""
+
+
+class JSONExtractor:
+    """Incremental, bracket-balancing extractor for the first JSON object.
+
+    Feed response chunks as they arrive; `feed` returns the complete object
+    text as soon as its brackets balance. Strings are tracked so braces in
+    text content do not end the object early. If the stream ends before the
+    object closes, `finish` returns the partial text for `loads` to repair.
+    """
+
+    def __init__(self, opener: str = "{"):
+        self._opener = opener
+        self._chunks: list[str] = []
+        self._stack: list[str] = []
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._last = ""
+        self.result: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    @property
+    def depth(self) -> int:
+        return len(self._stack)
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Consumes the next chunk of the response.
+
+        Args:
+            chunk:
+                Text received from the model
+
+        Returns:
+            Optional[str]: The complete object text once balanced, else None
+        """
+        if self.done or not chunk:
+            return self.result
+
+        start = 0
+        if not self._stack:
+            start = chunk.find(self._opener)
+            if start < 0:
+                return None
+
+        for i in range(start, len(chunk)):
+            char = chunk[i]
+
+            if self._quote is not None:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == self._quote or _CLOSING_QUOTES.get(self._quote) == char:
+                    self._quote = None
+                continue
+
+            if char in _QUOTES and (char == '"' or self._last in "{[,:"):
+                self._quote = _QUOTES[char]
+            elif char in _OPENERS:
+                self._stack.append(char)
+            elif char in _CLOSERS:
+                # Pop through mismatched brackets, the repair pass fixes them
+                while self._stack and self._stack.pop() != _CLOSERS[char]:
+                    pass
+                if not self._stack:
+                    self._chunks.append(chunk[start : i + 1])
+                    self.result = "".join(self._chunks)
+                    self._chunks = []
+                    return self.result
+
+            if not char.isspace():
+                self._last = char
+
+        self._chunks.append(chunk[start:])
+        return None
+
+    def partial(self) -> str:
+        """Returns the text consumed so far (the object may be incomplete)."""
+        if self.result is not None:
+            return self.result
+        return "".join(self._chunks)
+
+    def finish(self) -> Optional[str]:
+        """Ends the stream, returning the complete or truncated object text."""
+        text = self.partial()
+        return text or None
+
+
+class JSONArrayItemStream:
+    """Emits the objects of an array field (e.g. "slides") while the JSON
+    that contains it is still streaming.
+
+    Feed response chunks as they arrive; `feed` returns the text of every
+    array item that completed in that chunk, ready for `loads`.
+    """
+
+    def __init__(self, key: str = "slides"):
+        self.key = key
+        self._text = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> list[str]:
+        """
+        Consumes the next chunk of the response.
+
+        Args:
+            chunk:
+                Text received from the model
+
+        Returns:
+            list[str]: The items of the array that completed in this chunk
+        """
+        self._text += chunk
+        text = self._text
+        items = []
+
+        for i in range(self._pos, len(text)):
+            char = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = text[self._string_start + 1 : i]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":" and len(self._stack) == 1:
+                self._last_key = self._last_string
+            elif char in _OPENERS:
+                if (
+                    self._array_depth is not None
+                    and char == "{"
+                    and len(self._stack) == self._array_depth
+                ):
+                    self._item_start = i
+                self._stack.append(char)
+                if char == "[" and self._stack == ["{", "["] and self._last_key == self.key:
+                    self._array_depth = len(self._stack)
+            elif char in _CLOSERS:
+                if self._stack:
+                    self._stack.pop()
+                if self._array_depth is not None:
+                    if char == "}" and len(self._stack) == self._array_depth:
+                        if self._item_start is not None:
+                            items.append(text[self._item_start : i + 1])
+                        self._item_start = None
+                    elif len(self._stack) < self._array_depth:
+                        self._array_depth = None
+
+        self._pos = len(text)
+        return items
+
+
+def extract_json(text: str) -> Optional[str]:
+    """Returns the first balanced (or truncated) JSON object in `text`."""
+    extractor = JSONExtractor()
+    return extractor.feed(text) or extractor.finish()
+
+
+def loads(text: str) -> Any:
+    """
+    Parses JSON, repairing it in a single pass if the strict parse fails.
+
+    Args:
+        text:
+            JSON-like text, typically the output of `extract_json`
+
+    Returns:
+        The parsed Python value
+
+    Raises:
+        JSONRepairError: If no JSON value can be recovered
+    """
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return _RepairingParser(text).parse()
+
+
+def parse_response(text: str, validate: Optional[Callable[[str], Any]] = None) -> Any:
+    """
+    Extracts the first JSON object of a model response and parses it,
+    repairing it if needed. Timed as the "json_repair" stage.
+
+    Args:
+        text:
+            Raw model response
+        validate:
+            Optional fast path tried on the extracted JSON text before any
+            parsing, e.g. a pydantic `model_validate_json`. Its result is
+            returned as is; if it raises ValueError (pydantic's
+            ValidationError included) the text is parsed and repaired as usual.
+
+    Returns:
+        The value returned by `validate`, or the parsed Python value
+
+    Raises:
+        JSONRepairError: If the response contains no recoverable JSON
+    """
+    with span("json_repair", input_bytes=len(text.encode("utf-8"))) as stage:
+        json_str = extract_json(text)
+        if not json_str:
+            stage.fail("no_json")
+            raise JSONRepairError("No JSON found in response", text, 0)
+        if validate is not None:
+            try:
+                value = validate(json_str)
+                stage.set(repaired=False, validated=True)
+                return value
+            except ValueError:
+                stage.set(validated=False)
+        try:
+            value = json.loads(json_str)
+            stage.set(repaired=False)
+        except json.JSONDecodeError:
+            value = _RepairingParser(json_str).parse()
+            stage.set(repaired=True)
+        return value
+
+
+class _RepairingParser:
+    """Lenient recursive-descent JSON parser that repairs as it reads."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.length = len(text)
+
+    def parse(self) -> Any:
+        self._skip_to_value()
+        if self.pos >= self.length:
+            raise JSONRepairError("No JSON value found", self.text, self.pos)
+        return self._value()
+
+    # Scanning helpers
+
+    def _peek(self) -> str:
+        return self.text[self.pos] if self.pos < self.length else ""
+
+    def _skip_whitespace(self) -> None:
+        text = self.text
+        while self.pos < self.length:
+            char = text[self.pos]
+            if char.isspace() or char == "﻿":
+                self.pos += 1
+            elif text.startswith("//", self.pos):
+                end = text.find("\n", self.pos)
+                self.pos = self.length if end < 0 else end + 1
+            elif text.startswith("/*", self.pos):
+                end = text.find("*/", self.pos + 2)
+                self.pos = self.length if end < 0 else end + 2
+            elif text.startswith("```", self.pos):
+                # Markdown fence, optionally followed by a language tag
+                self.pos += 3
+                while self.pos < self.length and text[self.pos].isalnum():
+                    self.pos += 1
+            else:
+                break
+
+    def _skip_to_value(self) -> None:
+        """Skips leading prose until the first object or array."""
+        starts = [
+            index for index in (self.text.find("{"), self.text.find("[")) if index >= 0
+        ]
+        if starts:
+            self.pos = min(starts)
+        else:
+            self._skip_whitespace()
+
+    def _next_is_delimiter(self, position: int, after_string: bool = False) -> bool:
+        """Whether the next significant char after `position` ends a value.
+        After a string or number, another quote means a comma is missing."""
+        text = self.text
+        while position < self.length and text[position] in " \t\r":
+            position += 1
+        if position >= self.length:
+            return True
+        char = text[position]
+        if char in ",:]}\n":
+            return True
+        return after_string and char == '"'
+
+    def _ends_mismatched(self, position: int, closing: str) -> bool:
+        """Whether a quote of another kind before `position` can end a
+        string. An apostrophe followed by a comma or a line break is taken
+        for prose inside a double-quoted string."""
+        if not self._next_is_delimiter(position):
+            return False
+        if closing != '"':
+            return True
+        while position < self.length and self.text[position] in " \t\r":
+            position += 1
+        return position >= self.length or self.text[position] in ":]}"
+
+    # Values
+
+    def _value(self) -> Any:
+        self._skip_whitespace()
+        char = self._peek()
+        if char == "{":
+            return self._object()
+        if char == "[":
+            return self._array()
+        if char in _QUOTES:
+            return self._string()
+        if char == "-" or char.isdigit():
+            return self._number()
+        return self._bare_word(stop=",]}\n")
+
+    def _object(self) -> dict:
+        self.pos += 1
+        result: dict = {}
+        while True:
+            self._skip_whitespace()
+            char = self._peek()
+            if char == "":
+                return result
+            if char == "}":
+                self.pos += 1
+                return result
+            if char == "]":
+                # Mismatched bracket: treat as the end of this object
+                self.pos += 1
+                return result
+            if char == ",":
+                self.pos += 1
+                continue
+
+            if char in _QUOTES:
+                key = self._string()
+            else:
+                key = str(self._bare_word(stop=":,}]\n", literal=False))
+            if key == "" and self._peek() not in ":":
+                # Unrecognized character, drop it
+                self.pos += 1
+                continue
+
+            self._skip_whitespace()
+            if self._peek() == ":":
+                self.pos += 1
+            self._skip_whitespace()
+
+            if self._peek() in (",", "}", ""):
+                result[key] = None
+            else:
+                result[key] = self._value()
+
+    def _array(self) -> list:
+        self.pos += 1
+        result: list = []
+        while True:
+            self._skip_whitespace()
+            char = self._peek()
+            if char == "":
+                return result
+            if char == "]":
+                self.pos += 1
+                return result
+            if char == "}":
+                # Mismatched bracket: close the array, let the parent object see it
+                return result
+            if char == ",":
+                self.pos += 1
+                continue
+            if self.text.startswith("...", self.pos):
+                self.pos += 3
+                continue
+            result.append(self._value())
+
+    def _string(self) -> str:
+        text = self.text
+        closing = _QUOTES[text[self.pos]]
+        self.pos += 1
+        chars: list[str] = []
+        # First quote of another kind that could end the string, used if
+        # its own closing quote never comes ('value")
+        mismatched = None
+
+        while self.pos < self.length:
+            char = text[self.pos]
+
+            if char == "\\":
+                self.pos += 1
+                escaped = self._peek()
+                if escaped in _ESCAPES:
+                    chars.append(_ESCAPES[escaped])
+                    self.pos += 1
+                elif escaped == "u" and self._is_hex(self.pos + 1, 4):
+                    chars.append(chr(int(text[self.pos + 1 : self.pos + 5], 16)))
+                    self.pos += 5
+                elif escaped == "'":
+                    chars.append("'")
+                    self.pos += 1
+                else:
+                    # Invalid escape, keep the backslash literally
+                    chars.append("\\")
+                continue
+
+            if char == closing or _CLOSING_QUOTES.get(closing) == char:
+                if self._next_is_delimiter(self.pos + 1, after_string=True):
+                    self.pos += 1
+                    return self._join(chars)
+                # Unescaped quote inside the string
+                chars.append(char)
+                self.pos += 1
+                continue
+
+            if mismatched is None and (char in _QUOTES or char in _CLOSING_QUOTES):
+                if self._ends_mismatched(self.pos + 1, closing):
+                    mismatched = (self.pos + 1, len(chars))
+
+            if char == "\n":
+                # A raw newline followed by a key, value or closing bracket
+                # means the closing quote is missing
+                lookahead = self.pos + 1
+                while lookahead < self.length and text[lookahead] in " \t\r":
+                    lookahead += 1
+                if lookahead >= self.length or text[lookahead] in "\"}]":
+                    self.pos += 1
+                    return self._join(chars).rstrip(",")
+
+            chars.append(char)
+            self.pos += 1
+
+        if mismatched is not None:
+            self.pos, end = mismatched
+            return self._join(chars[:end])
+        # Truncated output: close the string at end of input
+        return self._join(chars)
+
+    @staticmethod
+    def _join(chars: list[str]) -> str:
+        return "".join(chars)
+
+    def _is_hex(self, start: int, count: int) -> bool:
+        chunk = self.text[start : start + count]
+        return len(chunk) == count and all(c in "0123456789abcdefABCDEF" for c in chunk)
+
+    def _number(self) -> Any:
+        text = self.text
+        start = self.pos
+        if text[self.pos] == "-":
+            self.pos += 1
+        while self.pos < self.length and (text[self.pos].isdigit() or text[self.pos] in ".eE+-"):
+            self.pos += 1
+
+        token = text[start : self.pos].rstrip(".eE+-")
+        # A quote right after a number also means a comma is missing
+        if self._next_is_delimiter(self.pos, after_string=True):
+            try:
+                return int(token)
+            except ValueError:
+                try:
+                    return float(token)
+                except ValueError:
+                    pass
+
+        # Something like `2nd phase`: treat it as an unquoted string
+        self.pos = start
+        return self._bare_word(stop=",]}\n")
+
+    def _bare_word(self, stop: str, literal: bool = True) -> Any:
+        text = self.text
+        start = self.pos
+        while self.pos < self.length and text[self.pos] not in stop:
+            self.pos += 1
+
+        word = text[start : self.pos].strip()
+        if literal and word in _LITERALS:
+            return _LITERALS[word]
+        return word.strip("\"'")
@@ -0,0 +1,178 @@
+from google.adk.models import BaseLlm, LLMRegistry, LlmRequest
+from google.adk.models.lite_llm import LiteLlm
+from google.genai import types
+from pydantic import BaseModel
+from typing import Optional, Union
+import litellm
+import logging
+
+from .routing import RoutedLlm
+from .telemetry import record_usage, span
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_model(model: Union[str, BaseLlm]) -> BaseLlm:
+    """Returns the model instance for a model object or a registered model name."""
+    if isinstance(model, BaseLlm):
+        return model
+    return LLMRegistry.new_llm(model)
+
+
+async def generate_text(
+    model: Union[str, BaseLlm], instruction: str, parts: list[types.Part]
+) -> str:
+    """
+    Calls a model directly, outside of an LlmAgent, with a single user turn.
+
+    Used where the pipeline fans out several independent calls at once
+    (e.g. one per image) that must not share the session conversation.
+
+    Args:
+        model:
+            Model instance (e.g. LiteLlm) or model name (e.g. "gemini-2.5-flash")
+        instruction:
+            System instruction
+        parts:
+            Parts of the user message (text and/or images)
+
+    Returns:
+        str: The concatenated response text
+    """
+    llm = resolve_model(model)
+    request = LlmRequest(
+        model=llm.model,
+        contents=[types.Content(role="user", parts=parts)],
+        config=types.GenerateContentConfig(system_instruction=instruction),
+    )
+
+    chunks = []
+    with span("model_call", model=llm.model, input_bytes=payload_size(parts)) as stage:
+        async for response in llm.generate_content_async(request, stream=False):
+            if response.error_code:
+                raise RuntimeError(f"{response.error_code}: {response.error_message}")
+            record_usage(response.usage_metadata)
+            if response.content and response.content.parts:
+                chunks.extend(
+                    part.text
+                    for part in response.content.parts
+                    if part.text and not part.thought
+                )
+        text = "".join(chunks)
+        stage.set(output_bytes=len(text.encode("utf-8")))
+    return text
+
+
+def payload_size(parts: list[types.Part]) -> int:
+    """Returns the size in bytes of the text and inline data of message parts."""
+    size = 0
+    for part in parts:
+        if part.text:
+            size += len(part.text.encode("utf-8"))
+        if part.inline_data is not None and part.inline_data.data:
+            size += len(part.inline_data.data)
+    return size
+
+
+def structured_output_args(model_name: str, schema: type[BaseModel]) -> Optional[dict]:
+    """
+    Returns the LiteLLM completion arguments that constrain decoding to a
+    JSON schema, or None when the backend is not known to support it.
+
+    NVIDIA NIM uses guided decoding (`nvext.guided_json`), providers that
+    LiteLLM reports as schema-capable get an OpenAI-style `response_format`.
+    """
+    json_schema = schema.model_json_schema()
+    if model_name.split("/", 1)[0] == "nvidia_nim":
+        return {"extra_body": {"nvext": {"guided_json": json_schema}}}
+
+    try:
+        supported = litellm.supports_response_schema(model=model_name)
+    except Exception:
+        supported = False
+    if not supported:
+        return None
+    return {
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": schema.__name__, "schema": json_schema},
+        }
+    }
+
+
+def with_output_schema(
+    model: Union[str, BaseLlm], schema: type[BaseModel]
+) -> Optional[BaseLlm]:
+    """Returns a copy of a LiteLlm model that uses constrained decoding for
+    `schema`, or None if the model or its backend does not support it.
+    A routed model gets constrained decoding for every candidate that
+    supports it."""
+    if isinstance(model, RoutedLlm):
+        constrained = [with_output_schema(candidate, schema) for candidate in model.candidates]
+        if all(candidate is None for candidate in constrained):
+            return None
+        return model.with_candidates(
+            [new or old for new, old in zip(constrained, model.candidates)]
+        )
+    if not isinstance(model, LiteLlm):
+        return None
+    args = structured_output_args(model.model, schema)
+    if args is None:
+        logger.info(f"[llm] No structured output support for {model.model}")
+        return None
+    return LiteLlm(model=model.model, **args)
+
+
+# Phrases of backend errors that reject the structured output request
+_SCHEMA_ERRORS = (
+    "response_format",
+    "response_schema",
+    "json_schema",
+    "guided_json",
+    "structured output",
+    "schema",
+)
+# Models whose backend rejected their output schema, see reject_output_schema
+_rejected_schemas: set[str] = set()
+
+
+def is_unsupported_request_error(error: Exception) -> bool:
+    """Whether an error means the backend rejected the structured output
+    request (its response format or JSON schema), as opposed to another
+    bad request or a transient failure worth retrying as is."""
+    if not isinstance(error, (litellm.BadRequestError, litellm.UnsupportedParamsError)):
+        return False
+    message = str(error).lower()
+    return any(phrase in message for phrase in _SCHEMA_ERRORS)
+
+
+def reject_output_schema(model: Union[str, BaseLlm], error: Exception) -> bool:
+    """
+    Latches prompt-only decoding for a structured output model whose
+    backend rejected its schema, for every later request in this process.
+
+    Args:
+        model:
+            The structured output model (see `with_output_schema`)
+        error:
+            The error of a request to it
+
+    Returns:
+        bool: True if the error is such a rejection
+    """
+    if not is_unsupported_request_error(error):
+        return False
+    name = getattr(model, "model", model)
+    if name not in _rejected_schemas:
+        _rejected_schemas.add(name)
+        logger.warning(
+            f"[llm] {name} rejected structured output ({error}), "
+            "using prompt-only decoding for it from now on"
+        )
+    return True
+
+
+def output_schema_rejected(model: Union[str, BaseLlm]) -> bool:
+    """Whether the backend of a structured output model rejected its schema
+    (see `reject_output_schema`)."""
+    return getattr(model, "model", model) in _rejected_schemas
@@ -0,0 +1,48 @@
+// Long-lived Marp render worker used by owl/render_pool.py.
+//
+// Reads one JSON job per line on stdin ({"id": ..., "batch": [[...marp cli args], ...]})
+// and answers each with one line on stdout ({"id": ..., "results": [...]}),
+// prefixed so that anything Marp itself prints can be told apart from
+// protocol messages. The process and the loaded marp-cli modules are
+// reused across jobs, which saves the node start-up and module loading of
+// a `marp` call. Each run still starts and closes its own browser for the
+// pptx, pdf and png formats: marpCli() offers no way to share one.
+const readline = require('readline')
+const { marpCli } = require('@marp-team/marp-cli')
+
+const PREFIX = '@@owl '
+
+function reply(message) {
+  process.stdout.write(PREFIX + JSON.stringify(message) + '\n')
+}
+
+async function handle(line) {
+  let job
+  try {
+    job = JSON.parse(line)
+  } catch (e) {
+    return
+  }
+
+  const results = []
+  for (const args of job.batch || [job.args]) {
+    try {
+      const status = await marpCli(args)
+      results.push({ ok: status === 0, status })
+    } catch (e) {
+      results.push({ ok: false, error: String((e && e.message) || e) })
+    }
+  }
+  reply({ id: job.id, results })
+}
+
+// Jobs are handled one at a time per worker, the pool provides concurrency.
+let pending = Promise.resolve()
+readline
+  .createInterface({ input: process.stdin })
+  .on('line', (line) => {
+    pending = pending.then(() => handle(line))
+  })
+  .on('close', () => pending.then(() => process.exit(0)))
+
+reply({ ready: true })
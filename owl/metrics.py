@@ -0,0 +1,75 @@
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# Number of VLM calls needed before the output validated, per decoding mode
+_vlm_attempts: dict[str, Counter] = {}
+
+
+def record_vlm_attempts(mode: str, attempts: int) -> None:
+    """
+    Records how many VLM calls an invocation needed to produce valid output.
+
+    Args:
+        mode:
+            "structured" (constrained decoding) or "prompt" (instructions only)
+        attempts:
+            Number of VLM calls, 1 means no retry was needed
+    """
+    with _lock:
+        _vlm_attempts.setdefault(mode, Counter())[attempts] += 1
+    logger.info(f"[metrics] VLM output valid after {attempts} attempt(s) ({mode})")
+
+
+def vlm_retry_summary() -> dict:
+    """Returns the attempt histogram and mean retries per decoding mode."""
+    with _lock:
+        summary = {}
+        for mode, histogram in _vlm_attempts.items():
+            runs = sum(histogram.values())
+            retries = sum((attempts - 1) * count for attempts, count in histogram.items())
+            summary[mode] = {
+                "runs": runs,
+                "attempts": dict(sorted(histogram.items())),
+                "mean_retries": retries / runs if runs else 0.0,
+            }
+        return summary
+
+
+_routes: dict[str, dict] = {}
+
+
+def record_route(stage: str, model: str, hedged: bool, hedge_won: bool) -> None:
+    """
+    Records which candidate model answered a routed call.
+
+    Args:
+        stage:
+            Pipeline stage of the call ("vlm", "enhancer")
+        model:
+            Model whose response was kept
+        hedged:
+            Whether a second candidate was called
+        hedge_won:
+            Whether the kept response came from the second candidate
+    """
+    with _lock:
+        route = _routes.setdefault(
+            stage, {"calls": 0, "hedged": 0, "hedge_wins": 0, "models": Counter()}
+        )
+        route["calls"] += 1
+        route["hedged"] += hedged
+        route["hedge_wins"] += hedge_won
+        route["models"][model] += 1
+
+
+def routing_summary() -> dict:
+    """Returns the call, hedge and per-model answer counts per stage."""
+    with _lock:
+        return {
+            stage: {**route, "models": dict(route["models"])}
+            for stage, route in _routes.items()
+        }
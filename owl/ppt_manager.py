@@ -1,4 +1,190 @@
-import subprocess
+import asyncio
+import glob
+import logging
+import os
+
+from .config import (
+    EXPORT_FORMATS,
+    RENDER_BACKEND,
+    RENDER_QUEUE_SIZE,
+    RENDER_TIMEOUT_SECONDS,
+    RENDER_WORKERS,
+    THEME,
+    THUMBNAIL_WIDTH,
+)
+from .html_writer import write_html
+from .pptx_writer import write_pptx
+from .render_pool import MarpRenderPool
+from .slide_images import SLIDE_SIZE, render_slides, save_pdf, thumbnails
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+render_pool = MarpRenderPool(
+    size=RENDER_WORKERS, max_queue=RENDER_QUEUE_SIZE, timeout=RENDER_TIMEOUT_SECONDS
+)
+
+EXPORT_MIME_TYPES = {
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "pdf": "application/pdf",
+    "html": "text/html",
+    "png": "image/png",
+}
+
+
+async def export_deck(
+    presentation_data: dict,
+    output_dir: str,
+    formats: list[str] = EXPORT_FORMATS,
+    theme: str = THEME,
+    backend: str = RENDER_BACKEND,
+    basename: str = "presentation",
+) -> dict[str, list[str]]:
+    """
+    Renders a presentation to every requested format in one render job.
+
+    The native backend draws the slide images once for both the PDF and the
+    PNG thumbnails and writes the .pptx and HTML directly. The Marp backend
+    writes the markdown once and renders every format back to back on one
+    warm worker.
+
+    Args:
+        presentation_data:
+            Validated dictionary with `presentation_title` and `slides`
+        output_dir:
+            Directory for the output files
+        formats:
+            Any of EXPORT_FORMATS (default: OWL_EXPORT_FORMATS); "pptx" is
+            always written
+        theme:
+            Theme name (default: OWL_THEME)
+        backend:
+            "native" or "marp" (default: OWL_RENDER_BACKEND)
+        basename:
+            Output file name without extension
+
+    Returns:
+        dict[str, list[str]]: Output files by format, for the formats that
+        were written (thumbnails are one file per slide)
+    """
+    formats = ["pptx"] + [name for name in formats if name in EXPORT_MIME_TYPES and name != "pptx"]
+    base = os.path.join(output_dir, basename)
+
+    with span(
+        "export",
+        backend=backend,
+        formats=",".join(formats),
+        slides=len(presentation_data["slides"]),
+    ) as stage:
+        if backend == "marp":
+            outputs = await _export_marp(presentation_data, base, formats, theme)
+        else:
+            outputs = await asyncio.to_thread(
+                _export_native, presentation_data, base, formats, theme
+            )
+        stage.set(
+            output_bytes=sum(_file_size(path) for paths in outputs.values() for path in paths)
+        )
+        if "pptx" not in outputs:
+            stage.fail()
+
+    for name, paths in outputs.items():
+        more = f" (+{len(paths) - 1} files)" if len(paths) > 1 else ""
+        logger.info(f"[export] {name.upper()} generated: {paths[0]}{more}")
+    return outputs
+
+
+def _export_native(
+    presentation_data: dict, base: str, formats: list[str], theme: str
+) -> dict[str, list[str]]:
+    outputs = {}
+
+    def export(name: str, write) -> None:
+        with span(f"write_{name}", theme=theme) as stage:
+            try:
+                paths = write()
+            except Exception as e:
+                logger.error(f"[export] Could not write {name}: {e}")
+                stage.fail()
+                return
+            stage.set(output_bytes=sum(_file_size(path) for path in paths))
+        outputs[name] = paths
+
+    def pptx() -> list[str]:
+        write_pptx(presentation_data, f"{base}.pptx", theme=theme)
+        return [f"{base}.pptx"]
+
+    def html() -> list[str]:
+        write_html(presentation_data, f"{base}.html", theme=theme)
+        return [f"{base}.html"]
+
+    export("pptx", pptx)
+    if "html" in formats:
+        export("html", html)
+
+    if "pdf" in formats or "png" in formats:
+        # One set of slide images feeds both the PDF and the thumbnails
+        with span("render_slides", theme=theme):
+            try:
+                images = render_slides(presentation_data, theme)
+            except Exception as e:
+                logger.error(f"[export] Could not render the slide images: {e}")
+                return outputs
+
+        def pdf() -> list[str]:
+            save_pdf(images, f"{base}.pdf")
+            return [f"{base}.pdf"]
+
+        def png() -> list[str]:
+            paths = []
+            for index, image in enumerate(thumbnails(images, THUMBNAIL_WIDTH), start=1):
+                paths.append(f"{base}.{index:03d}.png")
+                image.save(paths[-1], "PNG")
+            return paths
+
+        if "pdf" in formats:
+            export("pdf", pdf)
+        if "png" in formats:
+            export("png", png)
+    return outputs
+
+
+async def _export_marp(
+    presentation_data: dict, base: str, formats: list[str], theme: str
+) -> dict[str, list[str]]:
+    markdown_file = f"{base}.md"
+    convert_json_to_marp(presentation_data, markdown_file)
+
+    # Marp names the images <base>.001.png, <base>.002.png, ...
+    thumbnail_pattern = f"{glob.escape(base)}.[0-9][0-9][0-9].png"
+    for path in glob.glob(thumbnail_pattern):
+        os.remove(path)
+
+    batch = []
+    for name in formats:
+        if name == "png":
+            scale = f"{THUMBNAIL_WIDTH / SLIDE_SIZE[0]:g}"
+            batch.append(
+                ["--theme", theme, markdown_file, "--images", "png", "--image-scale", scale]
+                + ["-o", f"{base}.png"]
+            )
+        else:
+            batch.append(marp_args(markdown_file, f"{base}.{name}", theme))
+
+    logger.info(f"[export] marp {' '.join(batch[0])} (+{len(batch) - 1} formats)")
+    with span("run_marp", backend="pool", queue_depth=render_pool.queue_depth) as stage:
+        results = await render_pool.render_batch(batch)
+        if not results[0]:
+            stage.fail()
+
+    outputs = {}
+    for name, ok in zip(formats, results):
+        paths = sorted(glob.glob(thumbnail_pattern)) if name == "png" else [f"{base}.{name}"]
+        if ok and paths:
+            outputs[name] = paths
+        else:
+            logger.error(f"[export] Failed to generate {name}")
+    return outputs
 
 
 def convert_json_to_marp(
@@ -16,6 +202,18 @@ def convert_json_to_marp(
     Returns:
         str: The generated markdown content
     """
+    with span("convert_json_to_marp", slides=len(presentation_data["slides"])) as stage:
+        markdown_content = _marp_markdown(presentation_data)
+
+        # Save to file
+        with open(output_path, "w") as f:
+            f.write(markdown_content)
+        stage.set(output_bytes=len(markdown_content.encode("utf-8")))
+
+    return markdown_content
+
+
+def _marp_markdown(presentation_data: dict) -> str:
     lines = []
 
     # Add Marp front matter
@@ -59,47 +257,18 @@ def convert_json_to_marp(
             lines.append("")
 
     # Join all lines
-    markdown_content = "\n".join(lines)
-
-    # Save to file
-    with open(output_path, "w") as f:
-        f.write(markdown_content)
-
-    return markdown_content
+    return "\n".join(lines)
 
 
-def run_marp(
+def marp_args(
     markdown_file: str, output_file: str, theme: str = "gaia", template: str = "bespoke"
-) -> bool:
-    """
-    Execute Marp CLI command to generate presentation.
+) -> list[str]:
+    """Builds the Marp CLI arguments for a render job."""
+    return ["--theme", theme, "--template", template, markdown_file, "-o", output_file]
 
-    Args:
-        markdown_file:
-            Input markdown file
-        output_file:
-            Output presentation file (e.g., presentation.pptx)
-        theme:
-            Marp theme (default: gaia)
-        template:
-            Marp template (default: bespoke)
-
-    Returns:
-        bool: True if successful, False otherwise
-    """
-    cmd = f"marp --theme {theme} --template {template} {markdown_file} -o {output_file}"
-
-    print(f"🚀 {cmd}")
 
+def _file_size(path: str) -> int:
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-
-        if result.returncode == 0:
-            print(f"✓ Presentation generated: {output_file}")
-            return True
-        else:
-            print(f"❌ Error: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
+        return os.path.getsize(path)
+    except OSError:
+        return 0
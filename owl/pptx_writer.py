@@ -0,0 +1,488 @@
+"""Native PowerPoint (OOXML) writer.
+
+Writes a `PresentationSchema`-shaped dict straight into a .pptx zip without
+Marp, Node or a browser. The deck uses one slide master with a title slide
+and a "title and content" layout, styled by a small set of themes that
+follow the Marp themes of the same name.
+"""
+
+import io
+import math
+import re
+import zipfile
+from functools import lru_cache
+from typing import BinaryIO, Union
+from xml.sax.saxutils import escape
+
+from .themes import DEFAULT_THEME, THEMES, theme_name
+
+# 16:9, the same aspect ratio as Marp's default 1280x720
+SLIDE_WIDTH = 12192000
+SLIDE_HEIGHT = 6858000
+# Fixed zip timestamps so the same deck always produces the same bytes
+_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+_NS = (
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+)
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_DOC_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_CT = "application/vnd.openxmlformats-officedocument.presentationml"
+# Characters that are not allowed in XML 1.0
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# Placeholder frames (EMU): margins follow Marp's 70px/80px padding
+_TITLE_FRAME = (762000, 457200, 10668000, 1143000)
+_BODY_FRAME = (762000, 1752600, 10668000, 4572000)
+_COVER_TITLE_FRAME = (914400, 2057400, 10363200, 1600200)
+# Bullet lines that fit the body at the base font size before shrinking
+_BODY_LINES = 8
+_BODY_LINE_CHARS = 60
+
+
+def write_pptx(
+    presentation_data: dict, output: Union[str, BinaryIO], theme: str = DEFAULT_THEME
+) -> None:
+    """
+    Writes a presentation as a .pptx file.
+
+    Args:
+        presentation_data:
+            Validated dictionary with `presentation_title` and `slides`
+        output:
+            File path or writable binary file object
+        theme:
+            One of THEMES (unknown names fall back to "gaia")
+
+    Raises:
+        KeyError: If the presentation is missing required fields
+    """
+    slides = presentation_data["slides"]
+    # The title slide comes first, then one slide per content slide
+    slide_parts = [_cover_slide(presentation_data["presentation_title"])]
+    slide_parts += [_content_slide(slide["title"], slide["content"]) for slide in slides]
+
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+
+        def add(name: str, xml: str) -> None:
+            info = zipfile.ZipInfo(name, date_time=_ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, xml)
+
+        add("[Content_Types].xml", _content_types(len(slide_parts)))
+        add("_rels/.rels", _package_rels())
+        add("docProps/core.xml", _core_props(presentation_data["presentation_title"]))
+        add("docProps/app.xml", _app_props(len(slide_parts)))
+        add("ppt/presentation.xml", _presentation(len(slide_parts)))
+        add("ppt/_rels/presentation.xml.rels", _presentation_rels(len(slide_parts)))
+        for name, xml in _static_parts(theme_name(theme)):
+            add(name, xml)
+        for index, (layout, xml) in enumerate(slide_parts, start=1):
+            add(f"ppt/slides/slide{index}.xml", xml)
+            add(
+                f"ppt/slides/_rels/slide{index}.xml.rels",
+                _rels([(f"{_DOC_REL}/slideLayout", f"../slideLayouts/slideLayout{layout}.xml")]),
+            )
+
+
+def pptx_bytes(presentation_data: dict, theme: str = DEFAULT_THEME) -> bytes:
+    """Returns the .pptx file of a presentation as bytes."""
+    buffer = io.BytesIO()
+    write_pptx(presentation_data, buffer, theme)
+    return buffer.getvalue()
+
+
+# Slides
+
+
+def _cover_slide(title: str) -> tuple[int, str]:
+    shapes = _placeholder(2, "Title 1", '<p:ph type="ctrTitle"/>', _paragraph(title))
+    return 1, _slide(shapes)
+
+
+def _content_slide(title: str, content: Union[str, list]) -> tuple[int, str]:
+    items = content if isinstance(content, list) else [content]
+    items = [str(item) for item in items if str(item).strip()]
+
+    # Shrink long slides the way PowerPoint's autofit would
+    lines = sum(max(1, math.ceil(len(item) / _BODY_LINE_CHARS)) for item in items)
+    scale = min(1.0, math.sqrt(_BODY_LINES / lines)) if lines else 1.0
+    autofit = (
+        f'<a:normAutofit fontScale="{max(40, int(scale * 100)) * 1000}"/>'
+        if scale < 1.0
+        else "<a:normAutofit/>"
+    )
+
+    if isinstance(content, list):
+        paragraphs = "".join(_paragraph(item) for item in items)
+    else:
+        # A single text block is a paragraph, not a bullet
+        paragraphs = "".join(
+            _paragraph(item, '<a:pPr marL="0" indent="0"><a:buNone/></a:pPr>')
+            for item in items
+        )
+
+    shapes = _placeholder(2, "Title 1", '<p:ph type="title"/>', _paragraph(title))
+    shapes += _placeholder(
+        3,
+        "Content 2",
+        '<p:ph idx="1"/>',
+        paragraphs or "<a:p><a:endParaRPr/></a:p>",
+        autofit,
+    )
+    return 2, _slide(shapes)
+
+
+def _slide(shapes: str) -> str:
+    return (
+        f"{_XML_HEADER}<p:sld {_NS}><p:cSld><p:spTree>{_GROUP_HEADER}{shapes}"
+        "</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>"
+    )
+
+
+def _placeholder(
+    shape_id: int, name: str, ph: str, paragraphs: str, autofit: str = "<a:normAutofit/>"
+) -> str:
+    return (
+        f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+        f'<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr><p:nvPr>{ph}</p:nvPr></p:nvSpPr>'
+        f"<p:spPr/><p:txBody><a:bodyPr>{autofit}</a:bodyPr><a:lstStyle/>"
+        f"{paragraphs}</p:txBody></p:sp>"
+    )
+
+
+def _paragraph(text: str, properties: str = "") -> str:
+    """One paragraph; `**bold**` spans become bold runs."""
+    runs = []
+    for index, chunk in enumerate(_clean(text).split("**")):
+        if chunk:
+            bold = ' b="1"' if index % 2 else ""
+            runs.append(f'<a:r><a:rPr dirty="0"{bold}/><a:t>{escape(chunk)}</a:t></a:r>')
+    return f"<a:p>{properties}{''.join(runs) or '<a:endParaRPr/>'}</a:p>"
+
+
+def _clean(text: str) -> str:
+    return _INVALID_XML.sub("", str(text)).strip()
+
+
+_GROUP_HEADER = (
+    '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    '<p:grpSpPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/>'
+    '<a:chOff x="0" y="0"/><a:chExt cx="0" cy="0"/></a:xfrm></p:grpSpPr>'
+)
+
+
+# Package parts
+
+
+def _rels(targets: list[tuple[str, str]]) -> str:
+    relationships = "".join(
+        f'<Relationship Id="rId{index}" Type="{kind}" Target="{target}"/>'
+        for index, (kind, target) in enumerate(targets, start=1)
+    )
+    return f'{_XML_HEADER}<Relationships xmlns="{_REL_NS}">{relationships}</Relationships>'
+
+
+def _content_types(slide_count: int) -> str:
+    overrides = [
+        ("/ppt/presentation.xml", f"{_CT}.presentation.main+xml"),
+        ("/ppt/slideMasters/slideMaster1.xml", f"{_CT}.slideMaster+xml"),
+        ("/ppt/slideLayouts/slideLayout1.xml", f"{_CT}.slideLayout+xml"),
+        ("/ppt/slideLayouts/slideLayout2.xml", f"{_CT}.slideLayout+xml"),
+        ("/ppt/theme/theme1.xml", "application/vnd.openxmlformats-officedocument.theme+xml"),
+        ("/ppt/presProps.xml", f"{_CT}.presProps+xml"),
+        ("/ppt/viewProps.xml", f"{_CT}.viewProps+xml"),
+        ("/ppt/tableStyles.xml", f"{_CT}.tableStyles+xml"),
+        ("/docProps/core.xml", "application/vnd.openxmlformats-package.core-properties+xml"),
+        (
+            "/docProps/app.xml",
+            "application/vnd.openxmlformats-officedocument.extended-properties+xml",
+        ),
+    ]
+    overrides += [
+        (f"/ppt/slides/slide{index}.xml", f"{_CT}.slide+xml")
+        for index in range(1, slide_count + 1)
+    ]
+    return (
+        f'{_XML_HEADER}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        + "".join(
+            f'<Override PartName="{name}" ContentType="{kind}"/>' for name, kind in overrides
+        )
+        + "</Types>"
+    )
+
+
+def _package_rels() -> str:
+    return _rels(
+        [
+            (f"{_DOC_REL}/officeDocument", "ppt/presentation.xml"),
+            (f"{_REL_NS}/metadata/core-properties", "docProps/core.xml"),
+            (f"{_DOC_REL}/extended-properties", "docProps/app.xml"),
+        ]
+    )
+
+
+def _core_props(title: str) -> str:
+    return (
+        f"{_XML_HEADER}<cp:coreProperties "
+        'xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        f"<dc:title>{escape(_clean(title))}</dc:title><dc:creator>OWL</dc:creator>"
+        "</cp:coreProperties>"
+    )
+
+
+def _app_props(slide_count: int) -> str:
+    return (
+        f"{_XML_HEADER}<Properties "
+        'xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+        f"<Application>OWL</Application><Slides>{slide_count}</Slides></Properties>"
+    )
+
+
+def _presentation(slide_count: int) -> str:
+    # rId1 is the master, slides follow
+    slide_ids = "".join(
+        f'<p:sldId id="{255 + index}" r:id="rId{index + 1}"/>'
+        for index in range(1, slide_count + 1)
+    )
+    return (
+        f'{_XML_HEADER}<p:presentation {_NS} saveSubsetFonts="1">'
+        '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+        f"<p:sldIdLst>{slide_ids}</p:sldIdLst>"
+        f'<p:sldSz cx="{SLIDE_WIDTH}" cy="{SLIDE_HEIGHT}"/>'
+        '<p:notesSz cx="6858000" cy="9144000"/></p:presentation>'
+    )
+
+
+def _presentation_rels(slide_count: int) -> str:
+    targets = [(f"{_DOC_REL}/slideMaster", "slideMasters/slideMaster1.xml")]
+    targets += [
+        (f"{_DOC_REL}/slide", f"slides/slide{index}.xml")
+        for index in range(1, slide_count + 1)
+    ]
+    targets += [
+        (f"{_DOC_REL}/presProps", "presProps.xml"),
+        (f"{_DOC_REL}/viewProps", "viewProps.xml"),
+        (f"{_DOC_REL}/theme", "theme/theme1.xml"),
+        (f"{_DOC_REL}/tableStyles", "tableStyles.xml"),
+    ]
+    return _rels(targets)
+
+
+@lru_cache(maxsize=None)
+def _static_parts(theme: str) -> tuple[tuple[str, str], ...]:
+    """Parts that only depend on the theme (master, layouts, theme, props)."""
+    colors = THEMES[theme]
+    return (
+        ("ppt/slideMasters/slideMaster1.xml", _slide_master(colors)),
+        (
+            "ppt/slideMasters/_rels/slideMaster1.xml.rels",
+            _rels(
+                [
+                    (f"{_DOC_REL}/slideLayout", "../slideLayouts/slideLayout1.xml"),
+                    (f"{_DOC_REL}/slideLayout", "../slideLayouts/slideLayout2.xml"),
+                    (f"{_DOC_REL}/theme", "../theme/theme1.xml"),
+                ]
+            ),
+        ),
+        ("ppt/slideLayouts/slideLayout1.xml", _cover_layout(colors)),
+        ("ppt/slideLayouts/slideLayout2.xml", _content_layout()),
+        (
+            "ppt/slideLayouts/_rels/slideLayout1.xml.rels",
+            _rels([(f"{_DOC_REL}/slideMaster", "../slideMasters/slideMaster1.xml")]),
+        ),
+        (
+            "ppt/slideLayouts/_rels/slideLayout2.xml.rels",
+            _rels([(f"{_DOC_REL}/slideMaster", "../slideMasters/slideMaster1.xml")]),
+        ),
+        ("ppt/theme/theme1.xml", _theme(theme, colors)),
+        ("ppt/presProps.xml", f"{_XML_HEADER}<p:presentationPr {_NS}/>"),
+        (
+            "ppt/viewProps.xml",
+            f"{_XML_HEADER}<p:viewPr {_NS}><p:gridSpacing cx=\"76200\" cy=\"76200\"/></p:viewPr>",
+        ),
+        (
+            "ppt/tableStyles.xml",
+            f'{_XML_HEADER}<a:tblStyleLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+            'def="{5C22544A-7EE6-4342-B048-85BDC9FD1C3A}"/>',
+        ),
+    )
+
+
+def _frame(frame: tuple[int, int, int, int]) -> str:
+    x, y, width, height = frame
+    return (
+        f'<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{width}" cy="{height}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr>'
+    )
+
+
+def _master_placeholder(
+    shape_id: int, name: str, ph: str, frame: tuple, anchor: str, text: str
+) -> str:
+    return (
+        f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+        f'<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr><p:nvPr>{ph}</p:nvPr></p:nvSpPr>'
+        f'{_frame(frame)}<p:txBody><a:bodyPr vert="horz" lIns="91440" tIns="45720" '
+        f'rIns="91440" bIns="45720" rtlCol="0" anchor="{anchor}"><a:normAutofit/></a:bodyPr>'
+        f"<a:lstStyle/><a:p><a:r><a:rPr/><a:t>{text}</a:t></a:r></a:p></p:txBody></p:sp>"
+    )
+
+
+def _level(level: int, size: int, bullet: bool, color: str) -> str:
+    indent = 342900
+    margin = indent * level
+    bullet_xml = (
+        f'<a:buClr><a:srgbClr val="{color}"/></a:buClr><a:buFont typeface="Arial"/>'
+        '<a:buChar char="&#8226;"/>'
+        if bullet
+        else "<a:buNone/>"
+    )
+    return (
+        f'<a:lvl{level}pPr marL="{margin}" indent="-{indent}" algn="l" rtl="0">'
+        '<a:lnSpc><a:spcPct val="100000"/></a:lnSpc><a:spcBef><a:spcPts val="1000"/></a:spcBef>'
+        f'{bullet_xml}<a:defRPr sz="{size}" kern="1200"><a:solidFill><a:schemeClr val="tx1"/>'
+        '</a:solidFill><a:latin typeface="+mn-lt"/><a:ea typeface="+mn-ea"/>'
+        '<a:cs typeface="+mn-cs"/></a:defRPr></a:lvl' + f"{level}pPr>"
+    )
+
+
+def _slide_master(colors: dict) -> str:
+    shapes = _master_placeholder(
+        2, "Title Placeholder 1", '<p:ph type="title"/>', _TITLE_FRAME, "b",
+        "Click to edit Master title style",
+    )
+    shapes += _master_placeholder(
+        3, "Text Placeholder 2", '<p:ph type="body" idx="1"/>', _BODY_FRAME, "t",
+        "Click to edit Master text styles",
+    )
+    title_style = (
+        '<p:titleStyle><a:lvl1pPr algn="l" rtl="0"><a:lnSpc><a:spcPct val="90000"/></a:lnSpc>'
+        '<a:spcBef><a:spcPct val="0"/></a:spcBef><a:buNone/>'
+        '<a:defRPr sz="4400" b="1" kern="1200"><a:solidFill><a:schemeClr val="tx2"/></a:solidFill>'
+        '<a:latin typeface="+mj-lt"/><a:ea typeface="+mj-ea"/><a:cs typeface="+mj-cs"/>'
+        "</a:defRPr></a:lvl1pPr></p:titleStyle>"
+    )
+    body_style = (
+        "<p:bodyStyle>"
+        + _level(1, 2800, True, colors["accent"])
+        + _level(2, 2400, True, colors["accent"])
+        + _level(3, 2000, True, colors["accent"])
+        + "</p:bodyStyle>"
+    )
+    other_style = (
+        '<p:otherStyle><a:defPPr><a:defRPr lang="en-US"/></a:defPPr>'
+        '<a:lvl1pPr marL="0" algn="l" rtl="0"><a:defRPr sz="1800" kern="1200">'
+        '<a:solidFill><a:schemeClr val="tx1"/></a:solidFill><a:latin typeface="+mn-lt"/>'
+        '<a:ea typeface="+mn-ea"/><a:cs typeface="+mn-cs"/></a:defRPr></a:lvl1pPr>'
+        "</p:otherStyle>"
+    )
+    return (
+        f"{_XML_HEADER}<p:sldMaster {_NS}><p:cSld><p:bg><p:bgPr><a:solidFill>"
+        '<a:schemeClr val="bg1"/></a:solidFill><a:effectLst/></p:bgPr></p:bg>'
+        f"<p:spTree>{_GROUP_HEADER}{shapes}</p:spTree></p:cSld>"
+        '<p:clrMap bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" '
+        'accent2="accent2" accent3="accent3" accent4="accent4" accent5="accent5" '
+        'accent6="accent6" hlink="hlink" folHlink="folHlink"/>'
+        '<p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/>'
+        '<p:sldLayoutId id="2147483650" r:id="rId2"/></p:sldLayoutIdLst>'
+        f"<p:txStyles>{title_style}{body_style}{other_style}</p:txStyles></p:sldMaster>"
+    )
+
+
+def _cover_layout(colors: dict) -> str:
+    title = (
+        '<p:sp><p:nvSpPr><p:cNvPr id="2" name="Title 1"/><p:cNvSpPr><a:spLocks noGrp="1"/>'
+        '</p:cNvSpPr><p:nvPr><p:ph type="ctrTitle"/></p:nvPr></p:nvSpPr>'
+        f'{_frame(_COVER_TITLE_FRAME)}<p:txBody><a:bodyPr anchor="b"><a:normAutofit/></a:bodyPr>'
+        '<a:lstStyle><a:lvl1pPr algn="ctr"><a:defRPr sz="6000"/></a:lvl1pPr></a:lstStyle>'
+        '<a:p><a:r><a:rPr/><a:t>Click to edit Master title style</a:t></a:r></a:p></p:txBody></p:sp>'
+    )
+    # Thin accent rule under the title, as on Marp "lead" slides
+    rule = (
+        '<p:cxnSp><p:nvCxnSpPr><p:cNvPr id="3" name="Accent Rule"/><p:cNvCxnSpPr/><p:nvPr/>'
+        '</p:nvCxnSpPr><p:spPr><a:xfrm><a:off x="5181600" y="3733800"/>'
+        '<a:ext cx="1828800" cy="0"/></a:xfrm><a:prstGeom prst="line"><a:avLst/></a:prstGeom>'
+        f'<a:ln w="38100"><a:solidFill><a:srgbClr val="{colors["accent"]}"/></a:solidFill>'
+        "</a:ln></p:spPr></p:cxnSp>"
+    )
+    return (
+        f'{_XML_HEADER}<p:sldLayout {_NS} type="title" preserve="1">'
+        f'<p:cSld name="Title Slide"><p:spTree>{_GROUP_HEADER}{title}{rule}</p:spTree></p:cSld>'
+        "<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>"
+    )
+
+
+def _content_layout() -> str:
+    shapes = (
+        '<p:sp><p:nvSpPr><p:cNvPr id="2" name="Title 1"/><p:cNvSpPr><a:spLocks noGrp="1"/>'
+        '</p:cNvSpPr><p:nvPr><p:ph type="title"/></p:nvPr></p:nvSpPr><p:spPr/>'
+        "<p:txBody><a:bodyPr/><a:lstStyle/><a:p><a:r><a:rPr/>"
+        "<a:t>Click to edit Master title style</a:t></a:r></a:p></p:txBody></p:sp>"
+        '<p:sp><p:nvSpPr><p:cNvPr id="3" name="Content Placeholder 2"/><p:cNvSpPr>'
+        '<a:spLocks noGrp="1"/></p:cNvSpPr><p:nvPr><p:ph idx="1"/></p:nvPr></p:nvSpPr>'
+        "<p:spPr/><p:txBody><a:bodyPr/><a:lstStyle/><a:p><a:r><a:rPr/>"
+        "<a:t>Click to edit Master text styles</a:t></a:r></a:p></p:txBody></p:sp>"
+    )
+    return (
+        f'{_XML_HEADER}<p:sldLayout {_NS} type="obj" preserve="1">'
+        f'<p:cSld name="Title and Content"><p:spTree>{_GROUP_HEADER}{shapes}</p:spTree>'
+        "</p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>"
+    )
+
+
+def _theme(name: str, colors: dict) -> str:
+    def color(tag: str, value: str) -> str:
+        return f'<a:{tag}><a:srgbClr val="{value}"/></a:{tag}>'
+
+    color_scheme = (
+        f'<a:clrScheme name="{name}">'
+        + color("dk1", colors["text"])
+        + color("lt1", colors["background"])
+        + color("dk2", colors["heading"])
+        + color("lt2", colors["background"])
+        + color("accent1", colors["accent"])
+        + color("accent2", "ED7D31")
+        + color("accent3", "A5A5A5")
+        + color("accent4", "FFC000")
+        + color("accent5", "5B9BD5")
+        + color("accent6", "70AD47")
+        + color("hlink", colors["accent"])
+        + color("folHlink", colors["accent"])
+        + "</a:clrScheme>"
+    )
+    font = escape(colors["font"], {'"': "&quot;"})
+    font_scheme = (
+        f'<a:fontScheme name="{name}">'
+        f'<a:majorFont><a:latin typeface="{font}"/><a:ea typeface=""/><a:cs typeface=""/></a:majorFont>'
+        f'<a:minorFont><a:latin typeface="{font}"/><a:ea typeface=""/><a:cs typeface=""/></a:minorFont>'
+        "</a:fontScheme>"
+    )
+    fill = '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+    line = (
+        '<a:ln w="{width}" cap="flat" cmpd="sng" algn="ctr"><a:solidFill>'
+        '<a:schemeClr val="phClr"/></a:solidFill><a:prstDash val="solid"/></a:ln>'
+    )
+    format_scheme = (
+        f'<a:fmtScheme name="{name}">'
+        f"<a:fillStyleLst>{fill * 3}</a:fillStyleLst>"
+        "<a:lnStyleLst>"
+        + "".join(line.format(width=width) for width in (6350, 12700, 19050))
+        + "</a:lnStyleLst>"
+        "<a:effectStyleLst>"
+        + "<a:effectStyle><a:effectLst/></a:effectStyle>" * 3
+        + "</a:effectStyleLst>"
+        f"<a:bgFillStyleLst>{fill * 3}</a:bgFillStyleLst>"
+        "</a:fmtScheme>"
+    )
+    return (
+        f'{_XML_HEADER}<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+        f'name="{name}"><a:themeElements>{color_scheme}{font_scheme}{format_scheme}'
+        "</a:themeElements><a:objectDefaults/><a:extraClrSchemeLst/></a:theme>"
+    )
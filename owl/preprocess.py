@@ -0,0 +1,203 @@
+from PIL import Image, ImageOps
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import io
+import math
+import os
+
+
+def compress_image_bytes(
+    data: bytes,
+    quality: int = 20,
+    max_dimension: int = 800,
+    target_size_kb: int = 300,
+    mode: str = "color",
+) -> tuple[bytes, tuple[int, int]]:
+    """
+    Compress an image to a target size with aggressive compression.
+
+    Args:
+        data:
+            Encoded input image (any format Pillow can read)
+        quality:
+            Starting quality (1-100)
+        max_dimension:
+            Maximum width/height in pixels
+        target_size_kb:
+            Target file size in KB
+        mode:
+            "color" keeps colors, "grayscale" converts to contrast-stretched
+            gray (best for whiteboards), "binarize" reduces to black and white
+
+    Returns:
+        tuple: The JPEG bytes and the (width, height) of the result
+    """
+    img = _prepare(data, mode)
+
+    # Calculate new dimensions maintaining aspect ratio, never upscale
+    ratio = min(1.0, max_dimension / float(img.width), max_dimension / float(img.height))
+    if ratio < 1.0:
+        new_size = (max(1, int(img.width * ratio)), max(1, int(img.height * ratio)))
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+    return _encode(img, quality, target_size_kb), img.size
+
+
+def tile_image_bytes(
+    data: bytes,
+    min_dimension: int = 2000,
+    tile_dimension: int = 1024,
+    overlap: float = 0.15,
+    max_tiles: int = 9,
+    quality: int = 20,
+    target_size_kb: int = 300,
+    mode: str = "color",
+) -> Optional[list[tuple[bytes, tuple[int, int, int, int]]]]:
+    """
+    Splits a high-resolution image into overlapping tiles, each compressed
+    like a whole image, so dense writing keeps its resolution instead of
+    being downscaled with the rest of the board.
+
+    Args:
+        data:
+            Encoded input image (any format Pillow can read)
+        min_dimension:
+            Images whose longest side is shorter are not tiled
+        tile_dimension:
+            Maximum width/height of a tile
+        overlap:
+            Fraction of a tile shared with its neighbours, so a line cut at
+            one tile edge is whole in the next tile
+        max_tiles:
+            Tile limit; larger images get larger tiles, downscaled to
+            `tile_dimension`
+        quality, target_size_kb, mode:
+            As for `compress_image_bytes`, per tile
+
+    Returns:
+        The JPEG bytes and the (left, top, right, bottom) box of every tile
+        in reading order, or None if the image is too small to tile
+    """
+    # The header is enough to rule out small images
+    with Image.open(io.BytesIO(data)) as probe:
+        if max(probe.size) < min_dimension:
+            return None
+
+    img = _prepare(data, mode)
+    boxes = overlapping_tiles(img.size, tile_dimension, overlap, max_tiles)
+
+    def encode(box: tuple[int, int, int, int]) -> bytes:
+        tile = img.crop(box)
+        ratio = min(1.0, tile_dimension / float(tile.width), tile_dimension / float(tile.height))
+        if ratio < 1.0:
+            tile = tile.resize(
+                (max(1, int(tile.width * ratio)), max(1, int(tile.height * ratio))),
+                Image.Resampling.LANCZOS,
+            )
+        return _encode(tile, quality, target_size_kb)
+
+    # Pillow releases the GIL while resizing and encoding
+    with ThreadPoolExecutor(max_workers=min(len(boxes), os.cpu_count() or 1)) as pool:
+        return list(zip(pool.map(encode, boxes), boxes))
+
+
+def overlapping_tiles(
+    size: tuple[int, int], tile_dimension: int, overlap: float, max_tiles: int
+) -> list[tuple[int, int, int, int]]:
+    """Returns the boxes of a grid of overlapping tiles covering an image,
+    row by row, with at most `max_tiles` tiles."""
+    tile = tile_dimension
+    while True:
+        counts = [_tile_count(length, tile, overlap) for length in size]
+        if counts[0] * counts[1] <= max(1, max_tiles):
+            break
+        tile = int(tile * 1.1) + 1
+
+    starts = []
+    for length, count in zip(size, counts):
+        extent = min(length, tile)
+        starts.append(
+            [
+                round(index * (length - extent) / (count - 1)) if count > 1 else 0
+                for index in range(count)
+            ]
+        )
+    width, height = min(size[0], tile), min(size[1], tile)
+    return [(left, top, left + width, top + height) for top in starts[1] for left in starts[0]]
+
+
+def _tile_count(length: int, tile: int, overlap: float) -> int:
+    if length <= tile:
+        return 1
+    step = tile * (1 - overlap)
+    return math.ceil((length - tile) / step) + 1
+
+
+def _prepare(data: bytes, mode: str) -> Image.Image:
+    img = Image.open(io.BytesIO(data))
+    # Respect camera orientation before resizing
+    img = ImageOps.exif_transpose(img)
+
+    if mode == "grayscale":
+        img = ImageOps.autocontrast(img.convert("L"), cutoff=1)
+    elif mode == "binarize":
+        gray = ImageOps.autocontrast(img.convert("L"), cutoff=1)
+        threshold = _otsu_threshold(gray)
+        img = gray.point(lambda value: 255 if value > threshold else 0)
+    elif img.mode not in ("RGB", "L"):
+        # Convert to RGB if needed
+        img = img.convert("RGB")
+    return img
+
+
+def _encode(img: Image.Image, quality: int, target_size_kb: int) -> bytes:
+    # Binary search for optimal quality
+    low = 5
+    high = quality
+    last_good = None
+
+    while low <= high:
+        mid = (low + high) // 2
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=mid, optimize=True, progressive=True)
+        size_kb = len(buffer.getvalue()) / 1024
+
+        if size_kb <= target_size_kb:
+            last_good = buffer
+            low = mid + 1  # Try higher quality
+        else:
+            high = mid - 1  # Need lower quality
+
+    if last_good is None:
+        # If no good quality found, use the lowest quality
+        last_good = io.BytesIO()
+        img.save(last_good, format="JPEG", quality=5, optimize=True, progressive=True)
+
+    return last_good.getvalue()
+
+
+def _otsu_threshold(gray: Image.Image) -> int:
+    """Returns the Otsu threshold of a grayscale image."""
+    histogram = gray.histogram()
+    total = sum(histogram)
+    sum_total = sum(value * count for value, count in enumerate(histogram))
+
+    sum_background = 0.0
+    weight_background = 0
+    best_threshold, best_variance = 127, 0.0
+    for value, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += value * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_total - sum_background) / weight_foreground
+        variance = (
+            weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        )
+        if variance > best_variance:
+            best_threshold, best_variance = value, variance
+    return best_threshold
@@ -1,3 +1,23 @@
+import json
+
+from pydantic import BaseModel
+
+
+def static_prompt(instructions: str, schema: type[BaseModel]) -> str:
+    """
+    Returns a system prompt of instructions followed by the output JSON schema.
+
+    The text only depends on its arguments (the schema is serialized with
+    sorted keys and no whitespace), so every request starts with the same
+    bytes and providers can serve the prefix from their prompt cache.
+    Per-request text belongs at the end of the user message.
+    """
+    schema_json = json.dumps(
+        schema.model_json_schema(), ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    return f"{instructions.strip()}\n\nJSON SCHEMA OF THE OUTPUT:\n{schema_json}\n"
+
+
 # VLM_INSTRUCTIONS = """
 # TASK: Extract ALL text and visual elements from this whiteboard image and convert to a structured PowerPoint presentation.
 
@@ -142,12 +162,37 @@ Return it as separate strings:
 """
 
 
-LLM_INSTRUCTIONS = """
+# Shorter variant of VLM_INSTRUCTIONS for retries after an invalid output
+VLM_RETRY_INSTRUCTIONS = """
+TASK: Transcribe ALL text of this whiteboard image into presentation slides.
+
+Use the EXACT wording of the image; do not summarize or add content. Describe
+diagrams literally in square brackets [like this] and mark unclear text with [?].
+
+OUTPUT: ONLY one valid JSON object, no markdown or commentary:
+{"presentation_title": "...", "slides": [{"slide_number": 1, "title": "...", "content": ["point 1", "point 2"], "layout": "title_content"}]}
+
+- EVERY slide MUST have slide_number, title, content and layout
+- content is a flat array of strings, one per line or bullet point
+- Close every string with a double quote
+"""
+
+
+# Sent after each tile of a tiled photo, so the system prompt stays the same
+TILE_HINT = """
+This image is tile {index} of {count} (row {row}, column {column}) of one
+large whiteboard photo, cut into overlapping tiles that are read separately
+and stitched afterwards. Transcribe only the text visible in this tile; text
+cut off at an edge is read whole in the neighbouring tile. Copy headings
+exactly as written, so slides of the same section can be matched.
+"""
+
+
+ENHANCE_GUIDELINES = """
 You are an AI presentation content enhancer. Your task is to improve the content
 of the presentation while strictly maintaining the original JSON schema structure.
 
-You will receive a presentation JSON object in the session state.
-Retrieve this JSON and enhance it according to the following guidelines:
+Enhance the presentation according to the following guidelines:
 
 For each slide:
 1. Improve clarity and professionalism of the text
@@ -165,3 +210,50 @@ For each slide:
 Focus on improving text quality and think about a clear presentation flow considering 
 multiple slides. Assume you are a professor preparing a presentation for a class.
 """
+
+
+LLM_INSTRUCTIONS = ENHANCE_GUIDELINES + """
+You will receive a JSON object with:
+- "language": the language every slide must be written in
+- "presentation": the presentation to enhance
+
+Output ONLY the enhanced presentation as a JSON object of the form
+{"presentation_title": "...", "slides": [...enhanced slides...]}
+"""
+
+
+REPAIR_INSTRUCTIONS = """
+You repair slides of a presentation JSON that failed schema validation.
+
+You will receive a JSON object with a "slides" array. Each entry has the
+"index" of the slide, the broken "slide" and the validation "errors".
+
+Every repaired slide MUST match this schema:
+{
+  "slide_number": 1,
+  "title": "Slide title",
+  "content": ["point 1", "point 2"],
+  "layout": "title_content"
+}
+
+RULES:
+1. Fix ONLY the fields listed in the errors, keep every other field unchanged
+2. content MUST be a flat array of strings - never nested arrays or objects
+3. Do not invent, summarize or translate any text
+4. Return the slides in the same order you received them
+5. Output ONLY a JSON object of the form {"slides": [...repaired slides...]}
+"""
+
+
+GROUP_ENHANCE_INSTRUCTIONS = ENHANCE_GUIDELINES + """
+You are enhancing ONE PART of a larger presentation; other parts are enhanced
+separately and combined afterwards. You will receive a JSON object with:
+- "presentation_title": the title of the whole presentation
+- "outline": the titles of all slides, for context and a consistent flow
+- "language": the language every slide must be written in
+- "slides": the slides of your part
+
+Enhance ONLY the slides of your part, keep the same tone as a single author
+would for the whole deck, and do not repeat content of other slides in the
+outline. Output ONLY a JSON object of the form {"slides": [...enhanced slides...]}
+"""
@@ -0,0 +1,236 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import shutil
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "marp_worker.js")
+_PREFIX = b"@@owl "
+
+
+class _MarpWorker:
+    """A warm `node marp_worker.js` process that renders one job at a time.
+
+    Warm means node and marp-cli are loaded; each Marp run still launches
+    its own browser (see marp_worker.js)."""
+
+    def __init__(self, script: str, ready_timeout: float):
+        self.script = script
+        self.ready_timeout = ready_timeout
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> bool:
+        """Spawns the worker and waits for its ready message."""
+        node = shutil.which("node")
+        if node is None or not os.path.exists(self.script):
+            return False
+
+        self.process = await asyncio.create_subprocess_exec(
+            node,
+            self.script,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+
+        try:
+            message = await asyncio.wait_for(self._read_message(), self.ready_timeout)
+        except asyncio.TimeoutError:
+            message = None
+
+        if not message or not message.get("ready"):
+            await self.stop()
+            return False
+        return True
+
+    async def render(self, job_id: int, batch: list[list[str]], timeout: float) -> list[bool]:
+        """Sends one job (one or more Marp runs) and waits for its results."""
+        line = json.dumps({"id": job_id, "batch": batch}) + "\n"
+        self.process.stdin.write(line.encode("utf-8"))
+        await self.process.stdin.drain()
+
+        while True:
+            message = await asyncio.wait_for(self._read_message(), timeout)
+            if message is None:
+                raise ConnectionError("Marp worker exited")
+            if message.get("id") == job_id:
+                results = message.get("results") or []
+                for result in results:
+                    if result.get("error"):
+                        logger.error(f"[render_pool] Marp error: {result['error']}")
+                ok = [bool(result.get("ok")) for result in results]
+                return ok + [False] * (len(batch) - len(ok))
+
+    async def _read_message(self) -> Optional[dict]:
+        """Returns the next protocol message, skipping Marp's own output."""
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                return None
+            if line.startswith(_PREFIX):
+                return json.loads(line[len(_PREFIX) :])
+            logger.debug(f"[render_pool] {line.decode(errors='replace').rstrip()}")
+
+    async def _drain_stderr(self) -> None:
+        async for line in self.process.stderr:
+            logger.debug(f"[render_pool] {line.decode(errors='replace').rstrip()}")
+
+    async def stop(self) -> None:
+        if self.process is None:
+            return
+        if self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+        if self._stderr_task is not None:
+            self._stderr_task.cancel()
+        self.process = None
+
+
+class MarpRenderPool:
+    """Pool of long-lived Marp render workers behind a bounded asyncio queue.
+
+    Workers are started lazily on the first render inside the running event
+    loop. Rendering never blocks the loop: jobs are awaited, and when no warm
+    worker can be started (Node or `@marp-team/marp-cli` missing locally) each
+    job falls back to an asynchronous `marp` CLI subprocess.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_queue: int = 16,
+        timeout: float = 120.0,
+        script: str = WORKER_SCRIPT,
+    ):
+        self.size = max(1, size)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.script = script
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._ids = itertools.count(1)
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [
+            loop.create_task(self._worker_loop(index)) for index in range(self.size)
+        ]
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def render(self, args: list[str]) -> bool:
+        """
+        Queues a Marp job and waits for it to finish.
+
+        Args:
+            args:
+                Marp CLI arguments (without the `marp` executable)
+
+        Returns:
+            bool: True if the deck was rendered, False otherwise
+        """
+        return (await self.render_batch([args]))[0]
+
+    async def render_batch(self, batch: list[list[str]]) -> list[bool]:
+        """
+        Queues several Marp runs as one job, rendered back to back by the
+        same warm worker (e.g. every output format of one deck).
+
+        Args:
+            batch:
+                Marp CLI arguments of each run
+
+        Returns:
+            list[bool]: Whether each run succeeded, in order
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        # Waits (without blocking the loop) while the queue is full
+        await self._queue.put((batch, future))
+        return await future
+
+    async def _worker_loop(self, index: int) -> None:
+        worker = _MarpWorker(self.script, ready_timeout=30.0)
+        warm = await worker.start()
+        if not warm:
+            logger.warning(
+                f"[render_pool] Worker {index} unavailable, falling back to the marp CLI"
+            )
+
+        try:
+            while True:
+                batch, future = await self._queue.get()
+                try:
+                    if warm and not worker.alive:
+                        warm = await worker.start()
+                    if warm:
+                        ok = await worker.render(
+                            next(self._ids), batch, self.timeout * len(batch)
+                        )
+                    else:
+                        ok = [await _run_marp_cli(args, self.timeout) for args in batch]
+                    if not future.done():
+                        future.set_result(ok)
+                except Exception as e:
+                    logger.error(f"[render_pool] Render failed: {e}")
+                    await worker.stop()
+                    if not future.done():
+                        future.set_result([False] * len(batch))
+                finally:
+                    self._queue.task_done()
+        finally:
+            await worker.stop()
+
+    async def close(self) -> None:
+        """Stops every worker."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        self._queue = None
+
+
+async def _run_marp_cli(args: list[str], timeout: float) -> bool:
+    """Renders with a one-off `marp` process, without blocking the event loop."""
+    marp = shutil.which("marp")
+    if marp is None:
+        logger.error("[render_pool] marp CLI not found")
+        return False
+
+    process = await asyncio.create_subprocess_exec(
+        marp,
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        logger.error("[render_pool] marp CLI timed out")
+        return False
+
+    if process.returncode != 0:
+        logger.error(f"[render_pool] marp CLI failed: {stderr.decode(errors='replace')}")
+        return False
+    return True
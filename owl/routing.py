@@ -0,0 +1,275 @@
+"""Routing of model calls over an ordered list of candidate models.
+
+`RoutedLlm` stands in for a single model wherever the pipeline takes one
+(LlmAgent, `generate_text`). Each call goes to one candidate: the preferred
+one, or the cheapest one for simple images. If it has not answered within
+its model's recent p95 latency (or fails, or returns an invalid response),
+the same request is also sent to the next candidate and the first valid
+response wins; the other call is cancelled.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import AsyncGenerator, Callable, Optional, Union
+
+from google.adk.models import BaseLlm, LLMRegistry, LlmRequest, LlmResponse
+
+from .config import (
+    HEDGE_DEFAULT_SECONDS,
+    HEDGE_ENABLED,
+    HEDGE_QUANTILE,
+    ROUTE_SIMPLE_MAX_KB,
+    TELEMETRY_WINDOW,
+)
+from .metrics import record_route
+from .telemetry import current_span
+
+logger = logging.getLogger(__name__)
+
+# Recorded calls a model needs before its own latency quantile is trusted
+_MIN_SAMPLES = 20
+
+_lock = threading.Lock()
+# Recent call durations per (model, streaming): full response, or first chunk
+_latencies: dict[tuple[str, bool], deque] = {}
+
+
+class RoutedLlm(BaseLlm):
+    """A model that routes each request to one of several candidate models
+    and hedges slow calls with the next candidate."""
+
+    candidates: list[BaseLlm]
+    # Pipeline stage, for the routing metrics
+    stage: str = "model"
+    hedge: bool = HEDGE_ENABLED
+    # Images up to this many bytes in total go to the cheapest candidate
+    simple_max_bytes: int = ROUTE_SIMPLE_MAX_KB * 1024
+    # Tells whether a complete response text is usable; invalid responses
+    # lose against the other candidate's
+    accept: Optional[Callable[[str], bool]] = None
+
+    @property
+    def capabilities(self):
+        return self.candidates[0].capabilities
+
+    def with_candidates(self, candidates: list[BaseLlm]) -> "RoutedLlm":
+        """Returns a copy with the same routing over other candidates."""
+        return self.model_copy(
+            update={
+                "candidates": candidates,
+                "model": "|".join(candidate.model for candidate in candidates),
+            }
+        )
+
+    def route(self, llm_request: LlmRequest) -> list[BaseLlm]:
+        """Returns the candidates in the order they are tried for a request."""
+        if is_simple(llm_request, self.simple_max_bytes):
+            # Cheapest first, the preferred model is the hedge
+            return [self.candidates[-1], *self.candidates[:-1]]
+        return list(self.candidates)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        order = self.route(llm_request)
+        if not self.hedge:
+            order = order[:1]
+
+        attempts: dict[asyncio.Task, tuple[BaseLlm, float]] = {}
+        # Finished attempts that were not kept
+        results: list[tuple[BaseLlm, Union[tuple, BaseException]]] = []
+        winner = None
+
+        def launch(llm: BaseLlm) -> None:
+            task = asyncio.ensure_future(self._attempt(llm, llm_request, stream))
+            attempts[task] = (llm, time.perf_counter())
+
+        launch(order[0])
+        launched = 1
+        budget = latency_budget(order[0].model, stream)
+        try:
+            while attempts and winner is None:
+                timeout = None
+                if launched < len(order[:2]):
+                    elapsed = time.perf_counter() - attempts[next(iter(attempts))][1]
+                    timeout = max(0.0, budget - elapsed)
+                done, _ = await asyncio.wait(
+                    attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.info(
+                        f"[routing] {order[0].model} exceeded {budget:.1f}s, "
+                        f"hedging with {order[1].model}"
+                    )
+                    launch(order[1])
+                    launched += 1
+                    continue
+
+                for task in done:
+                    llm, _ = attempts.pop(task)
+                    result = task.exception() or task.result()
+                    if winner is None and self._valid(result, stream):
+                        winner = (llm, result)
+                    else:
+                        results.append((llm, result))
+
+                # A failed or invalid first answer is hedged right away
+                if winner is None and not attempts and launched < len(order[:2]):
+                    launch(order[launched])
+                    launched += 1
+
+            if winner is None:
+                # No valid answer: hand on the first one, the caller's checks
+                # and retries deal with it
+                winner = results.pop(0)
+        finally:
+            for task, (llm, started) in attempts.items():
+                task.cancel()
+                # A cancelled call took at least this long, this keeps the
+                # budget from drifting down when slow calls are always cut
+                _observe(llm.model, stream, time.perf_counter() - started)
+            for _, result in results:
+                await _close(result)
+
+        llm, result = winner
+        hedged = launched > 1
+        span = current_span()
+        if span is not None:
+            span.set(routed_model=llm.model, hedged=hedged)
+        if isinstance(result, BaseException):
+            raise result
+        record_route(self.stage, llm.model, hedged, llm is not order[0])
+
+        responses, rest = result
+        for response in responses:
+            yield response
+        if rest is not None:
+            async for response in rest:
+                yield response
+
+    async def _attempt(
+        self, llm: BaseLlm, llm_request: LlmRequest, stream: bool
+    ) -> tuple[list[LlmResponse], Optional[AsyncGenerator]]:
+        """Calls one candidate. Returns every response, or with streaming
+        the first chunk and the generator of the rest."""
+        started = time.perf_counter()
+        request = llm_request.model_copy(
+            update={
+                "model": llm.model,
+                # Models may adjust the config, keep the candidates apart
+                "config": llm_request.config.model_copy() if llm_request.config else None,
+            }
+        )
+        responses = llm.generate_content_async(request, stream=stream)
+        if stream:
+            try:
+                first = await anext(responses)
+            except StopAsyncIteration:
+                return [], None
+            collected, rest = [first], responses
+        else:
+            collected, rest = [response async for response in responses], None
+        if collected and not collected[0].error_code:
+            _observe(llm.model, stream, time.perf_counter() - started)
+        return collected, rest
+
+    def _valid(self, result, stream: bool) -> bool:
+        if isinstance(result, BaseException):
+            return False
+        responses, _ = result
+        if not responses or any(response.error_code for response in responses):
+            return False
+        # A streamed answer is kept as soon as it starts
+        if stream or self.accept is None:
+            return True
+        return self.accept(response_text(responses))
+
+
+def routed_model(
+    stage: str,
+    models: list[Union[str, BaseLlm]],
+    accept: Optional[Callable[[str], bool]] = None,
+) -> Union[str, BaseLlm]:
+    """
+    Returns the model of a stage: the model itself when there is a single
+    candidate, else a RoutedLlm over the candidates.
+
+    Args:
+        stage:
+            Pipeline stage, for the routing metrics
+        models:
+            Candidate models or registered model names, from the preferred
+            to the cheapest one
+        accept:
+            Optional check of a complete response text
+
+    Returns:
+        The model to pass to an LlmAgent or `generate_text`
+    """
+    if len(models) == 1:
+        return models[0]
+    candidates = [
+        model if isinstance(model, BaseLlm) else LLMRegistry.new_llm(model)
+        for model in models
+    ]
+    return RoutedLlm(
+        model="|".join(candidate.model for candidate in candidates),
+        candidates=candidates,
+        stage=stage,
+        accept=accept,
+    )
+
+
+def is_simple(llm_request: LlmRequest, max_bytes: int) -> bool:
+    """Whether a request only carries small images. A preprocessed
+    whiteboard photo compresses in proportion to how much is written on it,
+    so its size stands in for the text density."""
+    sizes = [
+        len(part.inline_data.data)
+        for content in llm_request.contents
+        for part in content.parts or []
+        if part.inline_data is not None
+        and part.inline_data.data
+        and (part.inline_data.mime_type or "").startswith("image/")
+    ]
+    return bool(sizes) and sum(sizes) <= max_bytes
+
+
+def latency_budget(model: str, stream: bool = False) -> float:
+    """Seconds a call to `model` may take before it is hedged: the
+    HEDGE_QUANTILE of its recent calls, or HEDGE_DEFAULT_SECONDS until it
+    has enough of them."""
+    with _lock:
+        recent = sorted(_latencies.get((model, stream), ()))
+    if len(recent) < _MIN_SAMPLES:
+        return HEDGE_DEFAULT_SECONDS
+    return recent[min(len(recent) - 1, int(HEDGE_QUANTILE * len(recent)))]
+
+
+def response_text(responses: list[LlmResponse]) -> str:
+    return "".join(
+        part.text
+        for response in responses
+        if response.content and response.content.parts
+        for part in response.content.parts
+        if part.text and not part.thought
+    )
+
+
+def _observe(model: str, stream: bool, duration: float) -> None:
+    with _lock:
+        _latencies.setdefault((model, stream), deque(maxlen=TELEMETRY_WINDOW)).append(
+            duration
+        )
+
+
+async def _close(result) -> None:
+    """Closes the stream of an attempt that lost."""
+    if isinstance(result, BaseException):
+        return
+    _, rest = result
+    if rest is not None:
+        await rest.aclose()
@@ -0,0 +1,260 @@
+"""Bounded in-memory session store for the API server.
+
+Every generation runs in a fresh session, and ADK keeps each session's
+events (with the uploaded images, before they are stripped) until it is
+deleted. `BoundedInMemorySessionService` drops sessions that have not been
+used for `ttl_seconds`, and the least recently used ones when there are
+more than `max_sessions` or their estimated size exceeds `max_bytes`,
+together with the artifacts (rendered decks) saved in them.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from google.adk.artifacts import BaseArtifactService
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.genai import types
+
+from .cache import digest
+
+logger = logging.getLogger(__name__)
+
+# Sessions written to this recently are taken to be in use by a run, and
+# are not evicted to meet the count and size caps
+_ACTIVE_SECONDS = 300
+
+
+class BoundedInMemorySessionService(InMemorySessionService):
+    """InMemorySessionService with TTL and LRU eviction and a size cap.
+
+    Sizes are estimates: inline data, text and state delta bytes of the
+    events. `strip_images` replaces the images of a session's events with
+    their digest once they are no longer needed. When `artifact_service`
+    is set, the artifacts of a removed session are deleted from it, and
+    `on_remove` is called (off the event loop) with its id.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: int = 3600,
+    ):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evictions = {"ttl": 0, "lru": 0}
+        self.stripped_bytes = 0
+        self.deleted_artifacts = 0
+        self.artifact_service: Optional[BaseArtifactService] = None
+        self.on_remove: Optional[Callable[[str], None]] = None
+
+        # (app, user, session) in least recently used order, with last use
+        self._used: "OrderedDict[tuple[str, str, str], float]" = OrderedDict()
+        self._sizes: dict[tuple[str, str, str], int] = {}
+        # Ids of the resident sessions, safe to test from other threads
+        self._ids: set[str] = set()
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        key = (app_name, user_id, session.id)
+        self._sizes[key] = _value_bytes(session.state)
+        self._touch(key)
+        await self._evict(keep=key)
+        return session
+
+    async def get_session(
+        self, *, app_name: str, user_id: str, session_id: str, config=None
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        if key in self._used and self._expired(key, time.time()):
+            await self._remove(key, "ttl")
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self._touch(key)
+        return session
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        key = (app_name, user_id, session_id)
+        self._used.pop(key, None)
+        self._sizes.pop(key, None)
+        self._ids.discard(session_id)
+        await self._release(key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        self._sizes[key] = self._sizes.get(key, 0) + _event_bytes(event)
+        self._touch(key)
+        await self._evict(keep=key)
+        return event
+
+    def strip_images(self, *, app_name: str, user_id: str, session_id: str) -> int:
+        """
+        Replaces the inline images of a session's stored events with a text
+        part naming their digest.
+
+        Returns:
+            int: Bytes of image data removed
+        """
+        session = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if session is None:
+            return 0
+
+        stripped = 0
+        for event in session.events:
+            if event.content is None or not event.content.parts:
+                continue
+            changed = False
+            parts = []
+            for part in event.content.parts:
+                if part.inline_data is None or not part.inline_data.data:
+                    parts.append(part)
+                    continue
+                data = part.inline_data.data
+                stripped += len(data)
+                changed = True
+                parts.append(
+                    types.Part(
+                        text=f"[{part.inline_data.mime_type or 'data'} sha256:{digest(data)}, "
+                        f"{len(data)} bytes]"
+                    )
+                )
+            if changed:
+                # A new Content: the running invocation may still hold the old one
+                event.content = event.content.model_copy(update={"parts": parts})
+
+        key = (app_name, user_id, session_id)
+        if key in self._sizes:
+            # Recounted: images may have been replaced in place since they
+            # were appended (see ImagePreprocessAgent)
+            self._sizes[key] = _value_bytes(session.state) + sum(
+                _event_bytes(event) for event in session.events
+            )
+        self.stripped_bytes += stripped
+        return stripped
+
+    def stats(self) -> dict:
+        """Returns the resident sessions and their estimated size."""
+        return {
+            "sessions": len(self._used),
+            "bytes": sum(self._sizes.values()),
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": dict(self.evictions),
+            "stripped_bytes": self.stripped_bytes,
+            "deleted_artifacts": self.deleted_artifacts,
+        }
+
+    def has_session_id(self, session_id: str) -> bool:
+        """Whether a session with this id is resident, under any app and user."""
+        return session_id in self._ids
+
+    def _touch(self, key: tuple[str, str, str]) -> None:
+        self._ids.add(key[2])
+        self._used[key] = time.time()
+        self._used.move_to_end(key)
+
+    def _expired(self, key: tuple[str, str, str], now: float) -> bool:
+        return now - self._used[key] > self.ttl_seconds
+
+    async def _evict(self, keep: tuple[str, str, str]) -> None:
+        """Drops expired sessions, then least recently used idle ones until
+        within the caps. `keep` is the session being written."""
+        now = time.time()
+        for key in [key for key in self._used if self._expired(key, now)]:
+            await self._remove(key, "ttl")
+
+        total = sum(self._sizes.values())
+        for key, used in list(self._used.items()):
+            if len(self._used) <= self.max_sessions and total <= self.max_bytes:
+                return
+            if key == keep or now - used < _ACTIVE_SECONDS:
+                # Oldest first: every later session is in use too
+                break
+            total -= self._sizes.get(key, 0)
+            await self._remove(key, "lru")
+
+        if len(self._used) > self.max_sessions or total > self.max_bytes:
+            logger.warning(
+                f"[sessions] {len(self._used)} sessions ({total} bytes) in use, "
+                "over the session store caps"
+            )
+
+    async def _remove(self, key: tuple[str, str, str], reason: str) -> None:
+        app_name, user_id, session_id = key
+        users = self.sessions.get(app_name, {})
+        users.get(user_id, {}).pop(session_id, None)
+        if user_id in users and not users[user_id]:
+            del users[user_id]
+        self._used.pop(key, None)
+        self._sizes.pop(key, None)
+        self._ids.discard(session_id)
+        self.evictions[reason] += 1
+        await self._release(key)
+
+    async def _release(self, key: tuple[str, str, str]) -> None:
+        """Deletes the artifacts saved in a removed session (not the
+        user's) and calls `on_remove`."""
+        app_name, user_id, session_id = key
+        if self.on_remove is not None:
+            try:
+                await asyncio.to_thread(self.on_remove, session_id)
+            except Exception as e:
+                logger.warning(f"[sessions] on_remove failed for {session_id}: {e}")
+        if self.artifact_service is None:
+            return
+        try:
+            filenames = await self.artifact_service.list_artifact_keys(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+            # The listing includes the user-scoped artifacts
+            user_files = await self.artifact_service.list_artifact_keys(
+                app_name=app_name, user_id=user_id
+            )
+            for filename in filenames:
+                if filename in user_files or filename.startswith("user:"):
+                    continue
+                await self.artifact_service.delete_artifact(
+                    app_name=app_name, user_id=user_id, filename=filename, session_id=session_id
+                )
+                self.deleted_artifacts += 1
+        except Exception as e:
+            logger.warning(f"[sessions] Could not delete the artifacts of {session_id}: {e}")
+
+
+def _event_bytes(event: Event) -> int:
+    size = 0
+    if event.content is not None and event.content.parts:
+        for part in event.content.parts:
+            if part.inline_data is not None and part.inline_data.data:
+                size += len(part.inline_data.data)
+            if part.text:
+                size += len(part.text.encode("utf-8"))
+    if event.actions and event.actions.state_delta:
+        size += _value_bytes(event.actions.state_delta)
+    return size
+
+
+def _value_bytes(value: Any) -> int:
+    return len(repr(value).encode("utf-8"))
@@ -0,0 +1,160 @@
+"""Slide images for the PDF and PNG thumbnail exports.
+
+Draws each slide once with Pillow, in the same layout and theme as the
+native .pptx writer, so one set of images can be saved as a multi-page PDF
+and scaled down to thumbnails.
+"""
+
+from typing import BinaryIO, Union
+
+from PIL import Image, ImageDraw
+
+from .themes import DEFAULT_THEME, get_theme, load_font, rgb
+
+# Marp's default slide size
+SLIDE_SIZE = (1280, 720)
+_PADDING_X = 80
+_TITLE_TOP = 50
+_BODY_TOP = 180
+_BODY_BOTTOM = 660
+_TITLE_SIZE = 48
+_COVER_TITLE_SIZE = 64
+_BODY_SIZE = 30
+# Smallest body font size when shrinking long slides to fit
+_MIN_BODY_SIZE = 16
+
+
+def render_slides(presentation_data: dict, theme: str = DEFAULT_THEME) -> list[Image.Image]:
+    """
+    Draws the title slide and every content slide.
+
+    Args:
+        presentation_data:
+            Validated dictionary with `presentation_title` and `slides`
+        theme:
+            Theme name (unknown names fall back to the default theme)
+
+    Returns:
+        list[Image.Image]: One RGB image per slide, title slide first
+    """
+    colors = get_theme(theme)
+    images = [_cover(presentation_data["presentation_title"], colors)]
+    images += [
+        _content(slide["title"], slide["content"], colors)
+        for slide in presentation_data["slides"]
+    ]
+    return images
+
+
+def save_pdf(images: list[Image.Image], output: Union[str, BinaryIO]) -> None:
+    """Saves slide images as one PDF page per slide."""
+    images[0].save(
+        output, "PDF", save_all=True, append_images=images[1:], resolution=96.0
+    )
+
+
+def thumbnails(images: list[Image.Image], width: int) -> list[Image.Image]:
+    """Scales slide images down to `width` pixels wide."""
+    height = round(width * SLIDE_SIZE[1] / SLIDE_SIZE[0])
+    # reducing_gap box-reduces first, several times faster than a full resample
+    return [
+        image.resize((width, height), Image.BICUBIC, reducing_gap=2.0) for image in images
+    ]
+
+
+def _cover(title: str, colors: dict) -> Image.Image:
+    image = Image.new("RGB", SLIDE_SIZE, rgb(colors["background"]))
+    draw = ImageDraw.Draw(image)
+    width = SLIDE_SIZE[0] - 2 * _PADDING_X
+
+    size = _COVER_TITLE_SIZE
+    font = load_font(colors["font"], size, bold=True)
+    lines = _wrap(draw, _plain(title), font, width)
+    while len(lines) > 3 and size > _TITLE_SIZE:
+        size -= 4
+        font = load_font(colors["font"], size, bold=True)
+        lines = _wrap(draw, _plain(title), font, width)
+
+    line_height = round(size * 1.2)
+    top = (SLIDE_SIZE[1] - line_height * len(lines)) // 2 - 20
+    for index, line in enumerate(lines):
+        left = (SLIDE_SIZE[0] - draw.textlength(line, font=font)) // 2
+        draw.text((left, top + index * line_height), line, font=font, fill=rgb(colors["heading"]))
+
+    # Accent rule under the title, as on the .pptx cover layout
+    rule_top = top + line_height * len(lines) + 24
+    draw.rectangle(
+        (SLIDE_SIZE[0] // 2 - 120, rule_top, SLIDE_SIZE[0] // 2 + 120, rule_top + 6),
+        fill=rgb(colors["accent"]),
+    )
+    return image
+
+
+def _content(title: str, content: Union[str, list], colors: dict) -> Image.Image:
+    image = Image.new("RGB", SLIDE_SIZE, rgb(colors["background"]))
+    draw = ImageDraw.Draw(image)
+    width = SLIDE_SIZE[0] - 2 * _PADDING_X
+
+    title_font = load_font(colors["font"], _TITLE_SIZE, bold=True)
+    title_lines = _wrap(draw, _plain(title), title_font, width)[:2]
+    for index, line in enumerate(title_lines):
+        draw.text(
+            (_PADDING_X, _TITLE_TOP + index * round(_TITLE_SIZE * 1.15)),
+            line,
+            font=title_font,
+            fill=rgb(colors["heading"]),
+        )
+
+    bullets = isinstance(content, list)
+    items = content if bullets else [content]
+    items = [_plain(item) for item in items if str(item).strip()]
+    indent = 36 if bullets else 0
+
+    # Shrink long slides until the body fits, like PowerPoint's autofit
+    size = _BODY_SIZE
+    while True:
+        font = load_font(colors["font"], size)
+        line_height = round(size * 1.35)
+        wrapped = [_wrap(draw, item, font, width - indent) for item in items]
+        height = sum(len(lines) * line_height + size // 2 for lines in wrapped)
+        if height <= _BODY_BOTTOM - _BODY_TOP or size <= _MIN_BODY_SIZE:
+            break
+        size -= 2
+
+    top = _BODY_TOP
+    for lines in wrapped:
+        if bullets:
+            radius = max(3, size // 7)
+            center = top + line_height // 2
+            draw.ellipse(
+                (_PADDING_X + 6, center - radius, _PADDING_X + 6 + 2 * radius, center + radius),
+                fill=rgb(colors["accent"]),
+            )
+        for line in lines:
+            if top + line_height > SLIDE_SIZE[1]:
+                return image
+            draw.text((_PADDING_X + indent, top), line, font=font, fill=rgb(colors["text"]))
+            top += line_height
+        top += size // 2
+    return image
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> list[str]:
+    """Greedy word wrap to a pixel width."""
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if not line or draw.textlength(candidate, font=font) <= width:
+                line = candidate
+            else:
+                lines.append(line)
+                line = word
+        lines.append(line)
+    return lines
+
+
+def _plain(text) -> str:
+    # `**bold**` markers are kept as bold runs in the .pptx only
+    return str(text).replace("**", "").strip()
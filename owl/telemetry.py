@@ -0,0 +1,370 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from .config import TELEMETRY_FILE, TELEMETRY_WINDOW
+from .metrics import vlm_retry_summary
+
+# Structured span events, one JSON object per line
+logger = logging.getLogger(__name__)
+if TELEMETRY_FILE:
+    _file_handler = logging.FileHandler(TELEMETRY_FILE)
+    _file_handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_file_handler)
+    logger.setLevel(logging.INFO)
+
+# Histogram bucket bounds in seconds, from a JSON repair to a slow NIM call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("owl_span", default=None)
+
+T = TypeVar("T")
+
+
+class Span:
+    """A timed pipeline stage. Attributes set on it (token counts, payload
+    sizes, iteration index, ...) are exported with its duration and outcome."""
+
+    def __init__(self, stage: str, parent: Optional["Span"], attrs: dict):
+        self.stage = stage
+        self.parent = parent
+        self.attrs = dict(attrs)
+        self.outcome = "ok"
+        self.duration = 0.0
+
+    def set(self, **attrs) -> None:
+        """Adds or replaces span attributes."""
+        self.attrs.update(attrs)
+
+    def add(self, **counts) -> None:
+        """Increments numeric span attributes (e.g. prompt_tokens)."""
+        for key, value in counts.items():
+            self.attrs[key] = self.attrs.get(key, 0) + (value or 0)
+
+    def fail(self, outcome: str = "error") -> None:
+        """Marks the stage as failed without raising."""
+        self.outcome = outcome
+
+    def to_dict(self) -> dict:
+        return {
+            "event": "owl.span",
+            "stage": self.stage,
+            "parent": self.parent.stage if self.parent else None,
+            "outcome": self.outcome,
+            "duration_ms": round(self.duration * 1000, 3),
+            "timestamp": time.time(),
+            **self.attrs,
+        }
+
+
+class _StageStats:
+    """Cumulative histogram plus a window of recent durations for quantiles."""
+
+    def __init__(self, window: int):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+        self.outcomes = Counter()
+        self.counters = Counter()
+
+    def observe(self, span: Span) -> None:
+        self.count += 1
+        self.total += span.duration
+        index = bisect.bisect_left(BUCKETS, span.duration)
+        if index < len(BUCKETS):
+            self.buckets[index] += 1
+        self.recent.append(span.duration)
+        self.outcomes[span.outcome] += 1
+        for key, value in span.attrs.items():
+            if key.endswith(("_tokens", "_bytes")) and isinstance(value, (int, float)):
+                self.counters[key] += value
+
+    def quantiles(self) -> dict:
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {
+            q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES
+        }
+
+
+_lock = threading.Lock()
+_stages: dict[str, _StageStats] = {}
+# Stage progress of the most recent sessions (spans with a session_id)
+_progress: "OrderedDict[str, dict]" = OrderedDict()
+
+
+@contextmanager
+def span(stage: str, **attrs) -> Iterator[Span]:
+    """
+    Times a pipeline stage and exports it as a JSON event and as metrics.
+
+    Spans nest: token usage recorded inside a span is added to all of its
+    parents, so a stage also accounts for the model calls it makes. The span
+    is the current one of the context until the block ends, so the block
+    must not `yield` from a generator; use `span_events` for that.
+
+    Args:
+        stage:
+            Stage name (e.g. "vlm", "run_marp")
+        attrs:
+            Initial attributes (session id, iteration index, payload sizes)
+
+    Yields:
+        Span: The running span, to add attributes or mark the outcome
+    """
+    current = Span(stage, _current_span.get(), attrs)
+    with _timed(current):
+        token = _current_span.set(current)
+        try:
+            yield current
+        finally:
+            _current_span.reset(token)
+
+
+async def span_events(
+    stage: str, events: Callable[[Span], AsyncIterator[T]], **attrs
+) -> AsyncIterator[T]:
+    """
+    Times a stage that is an async generator (e.g. an agent's events) and
+    yields its items.
+
+    An async generator runs in the context of whoever iterates it, so the
+    span is made current only while the generator computes its next item,
+    never while it is suspended at a `yield`.
+
+    Args:
+        stage:
+            Stage name (e.g. "vlm", "enhancer")
+        events:
+            Called with the running span, returns the generator to time
+        attrs:
+            Initial attributes (session id, iteration index, payload sizes)
+
+    Yields:
+        The items of the generator
+    """
+    current = Span(stage, _current_span.get(), attrs)
+    with _timed(current):
+        async with aclosing(events(current)) as items:
+            while True:
+                token = _current_span.set(current)
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _current_span.reset(token)
+                yield item
+
+
+@contextmanager
+def _timed(current: Span) -> Iterator[None]:
+    """Tracks, times and records a span, marking it failed on errors."""
+    _track(current)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        current.fail()
+        current.set(error=type(e).__name__)
+        raise
+    except BaseException:
+        # Cancelled task or a closed agent generator
+        current.fail("cancelled")
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _record(current)
+
+
+def record_usage(usage_metadata) -> None:
+    """Adds the token counts of a model response to the running spans."""
+    if usage_metadata is None:
+        return
+    prompt = usage_metadata.prompt_token_count or 0
+    completion = usage_metadata.candidates_token_count or 0
+    # Prompt tokens served from the provider's prompt cache
+    cached = usage_metadata.cached_content_token_count or 0
+    current = _current_span.get()
+    while current is not None:
+        current.add(prompt_tokens=prompt, completion_tokens=completion, cached_tokens=cached)
+        current = current.parent
+
+
+def current_span() -> Optional[Span]:
+    """Returns the innermost running span of this context."""
+    return _current_span.get()
+
+
+def session_progress(session_id: str) -> Optional[dict]:
+    """
+    Returns the running stage and the finished stages of a session.
+
+    Args:
+        session_id:
+            ADK session id
+
+    Returns:
+        dict: `stage` (running stage or None), `completed` (stage,
+        outcome and duration_ms of each finished stage, in order) and
+        `updated` (timestamp), or None if the session has no spans yet
+    """
+    with _lock:
+        entry = _progress.get(session_id)
+        if entry is None:
+            return None
+        return {**entry, "completed": list(entry["completed"])}
+
+
+def _track(running: Span, finished: bool = False) -> None:
+    session_id = running.attrs.get("session_id")
+    if not session_id:
+        return
+    with _lock:
+        entry = _progress.pop(session_id, None) or {"stage": None, "completed": []}
+        if finished:
+            entry["stage"] = None
+            entry["completed"].append(
+                {
+                    "stage": running.stage,
+                    "outcome": running.outcome,
+                    "duration_ms": round(running.duration * 1000, 3),
+                }
+            )
+        else:
+            entry["stage"] = running.stage
+        entry["updated"] = time.time()
+        _progress[session_id] = entry
+        while len(_progress) > TELEMETRY_WINDOW:
+            _progress.popitem(last=False)
+
+
+def _record(finished: Span) -> None:
+    _track(finished, finished=True)
+    with _lock:
+        stats = _stages.get(finished.stage)
+        if stats is None:
+            stats = _stages[finished.stage] = _StageStats(TELEMETRY_WINDOW)
+        stats.observe(finished)
+    logger.info(json.dumps(finished.to_dict(), default=str, ensure_ascii=False))
+
+
+def stage_summary() -> dict:
+    """Returns count, outcomes, p50/p95/p99 (seconds) and token/byte totals
+    per stage."""
+    with _lock:
+        return {
+            stage: {
+                "count": stats.count,
+                "outcomes": dict(stats.outcomes),
+                "mean": stats.total / stats.count if stats.count else 0.0,
+                **{f"p{int(q * 100)}": value for q, value in stats.quantiles().items()},
+                **dict(stats.counters),
+                **_prompt_cache_ratio(stats.counters),
+            }
+            for stage, stats in sorted(_stages.items())
+        }
+
+
+def _prompt_cache_ratio(counters: Counter) -> dict:
+    """Share of the prompt tokens that were served from the prompt cache."""
+    if not counters.get("prompt_tokens"):
+        return {}
+    return {"prompt_cache_hit_ratio": counters["cached_tokens"] / counters["prompt_tokens"]}
+
+
+def metric_lines(name: str, kind: str, help_text: str, samples: list) -> list[str]:
+    """
+    Formats one metric family in the Prometheus text exposition format.
+
+    Args:
+        name:
+            Metric name
+        kind:
+            "counter", "gauge", "histogram" or "summary"
+        help_text:
+            HELP line
+        samples:
+            (suffix, labels dict, value) tuples
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        if label_text:
+            lines.append(f"{name}{suffix}{{{label_text}}} {value}")
+        else:
+            lines.append(f"{name}{suffix} {value}")
+    return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Renders the stage histograms, quantiles, token/byte counters and the
+    VLM retry histogram for a Prometheus scrape."""
+    with _lock:
+        stages = sorted(_stages.items())
+        histogram, summary, outcomes, counters = [], [], [], []
+        for stage, stats in stages:
+            cumulative = 0
+            for bound, count in zip(BUCKETS, stats.buckets):
+                cumulative += count
+                histogram.append(("_bucket", {"stage": stage, "le": bound}, cumulative))
+            histogram.append(("_bucket", {"stage": stage, "le": "+Inf"}, stats.count))
+            histogram.append(("_sum", {"stage": stage}, stats.total))
+            histogram.append(("_count", {"stage": stage}, stats.count))
+
+            for q, value in stats.quantiles().items():
+                summary.append(("", {"stage": stage, "quantile": q}, value))
+            summary.append(("_sum", {"stage": stage}, sum(stats.recent)))
+            summary.append(("_count", {"stage": stage}, len(stats.recent)))
+
+            for outcome, count in sorted(stats.outcomes.items()):
+                outcomes.append(("", {"stage": stage, "outcome": outcome}, count))
+            for key, value in sorted(stats.counters.items()):
+                counters.append(("", {"stage": stage, "kind": key}, value))
+
+    lines = []
+    lines += metric_lines(
+        "owl_stage_duration_seconds", "histogram", "Duration of pipeline stages", histogram
+    )
+    lines += metric_lines(
+        "owl_stage_latency_seconds",
+        "summary",
+        f"Stage latency quantiles over the last {TELEMETRY_WINDOW} runs",
+        summary,
+    )
+    lines += metric_lines(
+        "owl_stage_runs_total", "counter", "Pipeline stage runs by outcome", outcomes
+    )
+    lines += metric_lines(
+        "owl_stage_usage_total",
+        "counter",
+        "Tokens and payload bytes processed per stage",
+        counters,
+    )
+
+    attempts = [
+        ("", {"mode": mode, "attempts": count}, runs)
+        for mode, retries in vlm_retry_summary().items()
+        for count, runs in retries["attempts"].items()
+    ]
+    lines += metric_lines(
+        "owl_vlm_attempts_total",
+        "counter",
+        "Invocations by number of VLM calls needed for valid output",
+        attempts,
+    )
+    return "\n".join(lines) + "\n"
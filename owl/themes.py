@@ -0,0 +1,145 @@
+"""Deck themes shared by the native PPTX, image, PDF and HTML exporters.
+
+Theme lookups, fonts and stylesheets are resolved once per process and
+cached, so repeated exports never reload them.
+"""
+
+import os
+from functools import lru_cache
+from typing import Optional
+
+from PIL import ImageFont
+
+from .config import FONT_PATH
+
+THEMES = {
+    # Marp "gaia": warm cream background, slate text, blue accent
+    "gaia": {
+        "text": "455A64",
+        "background": "FFF8E1",
+        "heading": "455A64",
+        "accent": "0288D1",
+        "font": "Lato",
+    },
+    # Marp "default": GitHub-like white background
+    "default": {
+        "text": "1F2328",
+        "background": "FFFFFF",
+        "heading": "1F2328",
+        "accent": "0969DA",
+        "font": "Segoe UI",
+    },
+    # Marp "uncover": minimal, centered headings
+    "uncover": {
+        "text": "202228",
+        "background": "FDFCFF",
+        "heading": "202228",
+        "accent": "009DD5",
+        "font": "Helvetica Neue",
+    },
+}
+DEFAULT_THEME = "gaia"
+
+# Searched in order when OWL_FONT_PATH is not set
+_FONT_DIRS = [
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+    os.path.expanduser("~/.fonts"),
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+]
+_FONT_FILES = {
+    "Lato": ["Lato-Regular.ttf"],
+    "Segoe UI": ["segoeui.ttf"],
+    "Helvetica Neue": ["HelveticaNeue.ttc", "Helvetica.ttc"],
+}
+_BOLD_FONT_FILES = {
+    "Lato": ["Lato-Bold.ttf"],
+    "Segoe UI": ["segoeuib.ttf"],
+    "Helvetica Neue": ["HelveticaNeue.ttc", "Helvetica.ttc"],
+}
+_FALLBACK_FONT_FILES = ["DejaVuSans.ttf", "LiberationSans-Regular.ttf", "Arial.ttf", "arial.ttf"]
+_FALLBACK_BOLD_FONT_FILES = ["DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf", "arialbd.ttf"]
+
+
+def get_theme(name: str) -> dict:
+    """Returns a theme by name, falling back to the default theme."""
+    return THEMES.get(name, THEMES[DEFAULT_THEME])
+
+
+def theme_name(name: str) -> str:
+    """Returns `name` if it is a known theme, else the default theme name."""
+    return name if name in THEMES else DEFAULT_THEME
+
+
+def rgb(hex_color: str) -> tuple[int, int, int]:
+    return tuple(int(hex_color[index : index + 2], 16) for index in (0, 2, 4))
+
+
+@lru_cache(maxsize=None)
+def _font_index() -> dict[str, str]:
+    """Maps font file names to paths for every font directory (scanned once)."""
+    index = {}
+    for directory in _FONT_DIRS:
+        if not os.path.isdir(directory):
+            continue
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                index.setdefault(filename, os.path.join(dirpath, filename))
+    return index
+
+
+def font_file(family: str, bold: bool = False) -> Optional[str]:
+    """Returns the path of a font file for a theme font, or None."""
+    if FONT_PATH and os.path.exists(FONT_PATH):
+        return FONT_PATH
+    candidates = (_BOLD_FONT_FILES if bold else _FONT_FILES).get(family, [])
+    candidates += _FALLBACK_BOLD_FONT_FILES if bold else _FALLBACK_FONT_FILES
+    index = _font_index()
+    for candidate in candidates:
+        if candidate in index:
+            return index[candidate]
+    return None
+
+
+@lru_cache(maxsize=128)
+def load_font(family: str, size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    """
+    Returns a font for drawing slide images, cached by family, size and weight.
+
+    Uses the theme font when it is installed, a common sans-serif otherwise,
+    and Pillow's bundled font as the last resort.
+    """
+    path = font_file(family, bold)
+    if path is not None:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    return ImageFont.load_default(size=size)
+
+
+@lru_cache(maxsize=None)
+def stylesheet(name: str) -> str:
+    """Returns the CSS of the HTML export for a theme."""
+    theme = get_theme(name)
+    return f"""
+html, body {{ margin: 0; background: #222; }}
+body {{ scroll-snap-type: y mandatory; overflow-y: scroll; height: 100vh; }}
+section {{
+  box-sizing: border-box; width: 100vw; max-width: 177.78vh; aspect-ratio: 16 / 9;
+  margin: 0 auto 2vh; padding: 4% 6%; scroll-snap-align: center;
+  background: #{theme['background']}; color: #{theme['text']};
+  font-family: "{theme['font']}", "Helvetica Neue", Arial, sans-serif; font-size: 2.6vh;
+  display: flex; flex-direction: column; overflow: hidden;
+}}
+section.cover {{ justify-content: center; align-items: center; text-align: center; }}
+section.cover h1 {{ font-size: 2.4em; border-bottom: 0.12em solid #{theme['accent']}; }}
+h1 {{ color: #{theme['heading']}; font-size: 1.8em; margin: 0 0 0.6em; }}
+ul {{ margin: 0; padding-left: 1.2em; }}
+li {{ margin: 0.35em 0; }}
+li::marker {{ color: #{theme['accent']}; }}
+p {{ margin: 0; line-height: 1.5; }}
+footer {{ margin-top: auto; align-self: flex-end; font-size: 0.6em; opacity: 0.6; }}
+"""
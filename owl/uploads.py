@@ -0,0 +1,144 @@
+"""Binary image uploads referenced by id from the `/run` message.
+
+Clients upload each image once as a raw request body (see `server.py`) and
+send a `fileData` part with the returned `owl-upload://<id>` URI instead of
+base64 inline data. The files live in the session workspace until the
+preprocessing stage swaps the references for the image bytes.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import uuid
+from typing import AsyncIterator
+
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_URI_PREFIX = "owl-upload://"
+_UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+# Bytes of request body chunks collected per file write
+_WRITE_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the size limit."""
+
+
+async def save_upload(
+    workspace: str, chunks: AsyncIterator[bytes], max_bytes: int
+) -> tuple[str, int]:
+    """
+    Streams an upload to disk without holding it in memory.
+
+    Args:
+        workspace:
+            Session workspace directory
+        chunks:
+            Request body chunks
+        max_bytes:
+            Size limit; larger uploads are discarded
+
+    Returns:
+        tuple: The upload id and its size in bytes
+
+    Raises:
+        UploadTooLarge: If the body is larger than `max_bytes`
+    """
+    upload_id = uuid.uuid4().hex
+    path = _upload_path(workspace, upload_id)
+    size = 0
+    try:
+        # File work runs in a thread, in batches of chunks, off the event loop
+        f = await asyncio.to_thread(open, path, "wb")
+        try:
+            batch, written = [], 0
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                batch.append(chunk)
+                if size - written >= _WRITE_BYTES:
+                    await asyncio.to_thread(f.write, b"".join(batch))
+                    batch, written = [], size
+            if batch:
+                await asyncio.to_thread(f.write, b"".join(batch))
+        finally:
+            await asyncio.to_thread(f.close)
+    except BaseException:
+        _remove(path)
+        raise
+    return upload_id, size
+
+
+def upload_uri(upload_id: str) -> str:
+    return f"{UPLOAD_URI_PREFIX}{upload_id}"
+
+
+def upload_parts(content) -> list:
+    """Returns the parts of a user message that reference an upload."""
+    if content is None or not content.parts:
+        return []
+    return [part for part in content.parts if _is_upload(part)]
+
+
+def resolve_uploads(content, workspace: str) -> int:
+    """
+    Replaces upload references in a user message with the uploaded images,
+    in place, and deletes the uploaded files. Unknown references are dropped.
+
+    Args:
+        content:
+            User message (google.genai Content)
+        workspace:
+            Session workspace the files were uploaded to
+
+    Returns:
+        int: Number of resolved uploads
+    """
+    resolved = 0
+    parts = []
+    for part in content.parts:
+        if not _is_upload(part):
+            parts.append(part)
+            continue
+
+        upload_id = part.file_data.file_uri[len(UPLOAD_URI_PREFIX) :]
+        path = _upload_path(workspace, upload_id) if _UPLOAD_ID.fullmatch(upload_id) else None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except (OSError, TypeError):
+            logger.error(f"[uploads] Upload {upload_id!r} not found, dropping it")
+            continue
+
+        parts.append(
+            types.Part.from_bytes(
+                data=data, mime_type=part.file_data.mime_type or "image/jpeg"
+            )
+        )
+        _remove(path)
+        resolved += 1
+
+    # Keep the same list object: the message is shared with later agents
+    content.parts[:] = parts
+    return resolved
+
+
+def _is_upload(part) -> bool:
+    return part.file_data is not None and (part.file_data.file_uri or "").startswith(
+        UPLOAD_URI_PREFIX
+    )
+
+
+def _upload_path(workspace: str, upload_id: str) -> str:
+    return os.path.join(workspace, f"upload_{upload_id}")
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
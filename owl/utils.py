@@ -1,4 +1,10 @@
 import json
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Optional
+
+from google.genai import types
 
 
 def convert_llm_io_to_pydict(llm_output: str):
@@ -6,3 +12,318 @@ def convert_llm_io_to_pydict(llm_output: str):
         return json.loads(llm_output)
     except json.JSONDecodeError:
         return llm_output
+
+
+def compact_json(value) -> str:
+    """Serializes to JSON without whitespace or ASCII escapes, the smallest
+    text (and token count) a model prompt can carry it in."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def image_parts(content) -> list:
+    """Returns the inline image parts of a user message (google.genai Content)."""
+    if content is None or not content.parts:
+        return []
+    return [
+        part
+        for part in content.parts
+        if part.inline_data is not None
+        and (part.inline_data.mime_type or "").startswith("image/")
+    ]
+
+
+_LANGUAGE_REQUEST = re.compile(r"[^\n]*\bLanguages?:\s*(\S[^\n]*)")
+# ISO 639-1 codes of the frontend's languages, for the output file names
+_LANGUAGE_CODES = {
+    "english": "en",
+    "french": "fr",
+    "german": "de",
+    "italian": "it",
+    "spanish": "es",
+}
+
+
+def prompt_parts(content) -> list:
+    """
+    Returns the parts of a user message for a language-neutral extraction:
+    the images first, then any text other than the language request.
+
+    The language only matters to the enhancer, and without it the request
+    is the same for every language and ends with everything that a retry of
+    the same images repeats byte for byte.
+    """
+    if content is None or not content.parts:
+        return []
+    parts = [part for part in content.parts if not part.text]
+    for part in content.parts:
+        if part.text:
+            text = _LANGUAGE_REQUEST.sub("", part.text).strip()
+            if text:
+                parts.append(types.Part(text=text))
+    return parts
+
+
+def requested_languages(content, default: str = "English") -> list[str]:
+    """
+    Reads the presentation languages from the text parts of a user message,
+    in order and without duplicates.
+
+    Several languages are sent comma-separated ("...Languages: \\nEnglish,
+    French"), each one gets its own deck from the same extraction.
+    """
+    if content is None or not content.parts:
+        return [default]
+    for part in content.parts:
+        if part.text:
+            match = _LANGUAGE_REQUEST.search(part.text)
+            if match:
+                languages = [name.strip() for name in match.group(1).split(",")]
+                return list(dict.fromkeys(name for name in languages if name)) or [default]
+    return [default]
+
+
+def language_code(language: str) -> str:
+    """Returns a short file name suffix for a language ("French" -> "fr")."""
+    name = language.strip().lower()
+    return _LANGUAGE_CODES.get(name) or re.sub(r"[^a-z0-9]+", "-", name).strip("-") or "xx"
+
+
+def merge_presentations(presentations: list[dict]) -> dict:
+    """
+    Merges validated presentations into one deck, keeping their order.
+
+    The first presentation provides the title and slides are renumbered
+    sequentially across all inputs.
+    """
+    slides = []
+    for presentation in presentations:
+        for slide in presentation["slides"]:
+            slides.append({**slide, "slide_number": len(slides) + 1})
+
+    return {
+        "presentation_title": presentations[0]["presentation_title"],
+        "slides": slides,
+    }
+
+
+def stitch_presentations(presentations: list[dict], boxes: list[list[int]]) -> dict:
+    """
+    Stitches the presentations extracted from overlapping tiles of one photo
+    into a single deck.
+
+    `boxes[i]` is the (left, top, right, bottom) box `presentations[i]` was
+    read from, in reading order. Only readings of different, overlapping
+    tiles are deduplicated: a slide joins the slide of such a tile whose
+    title is the same text (equal up to case and punctuation), and a point
+    is dropped or joined only when it matches a point of that tile in the
+    overlap band between the two (see `_stitch_points`). Slides and points
+    of the same tile are never merged. The most frequent presentation title
+    wins.
+    """
+    titles = Counter(_normalize(presentation["presentation_title"]) for presentation in presentations)
+    title = next(
+        presentation["presentation_title"]
+        for presentation in presentations
+        if _normalize(presentation["presentation_title"]) == titles.most_common(1)[0][0]
+    )
+
+    # Each entry is a slide with the tiles it was read from, and its points
+    # with the tiles each was read from (in order)
+    entries = []
+    for tile, presentation in enumerate(presentations):
+        for slide in presentation["slides"]:
+            entry = next(
+                (
+                    entry
+                    for entry in entries
+                    if tile not in entry["tiles"]
+                    and _normalize(entry["slide"]["title"]) == _normalize(slide["title"])
+                    and any(_overlap(boxes[other], boxes[tile]) for other in entry["tiles"])
+                ),
+                None,
+            )
+            if entry is None:
+                entries.append(
+                    {
+                        "slide": dict(slide),
+                        "tiles": {tile},
+                        "points": [[point, [tile]] for point in _points(slide["content"])],
+                    }
+                )
+                continue
+            entry["tiles"].add(tile)
+            _stitch_points(entry["points"], _points(slide["content"]), tile, boxes)
+            content = entry["slide"]["content"]
+            texts = [point for point, _ in entry["points"]]
+            if isinstance(content, str) and isinstance(slide["content"], str) and len(texts) == 1:
+                entry["slide"]["content"] = texts[0]
+            else:
+                entry["slide"]["content"] = texts
+
+    return {
+        "presentation_title": title,
+        "slides": [
+            {**entry["slide"], "slide_number": index + 1} for index, entry in enumerate(entries)
+        ],
+    }
+
+
+# Points at the bottom of a tile, and at the top of the tile below it, that
+# can sit in the overlap band between the two
+_BAND_POINTS = 2
+
+
+def _stitch_points(points: list[list], new_points: list[str], tile: int, boxes: list) -> None:
+    """
+    Adds the points a tile read for a slide to the points the slide already
+    has from other tiles.
+
+    A new point is the same line as an existing one when they are the same
+    text, or when the existing point comes from an overlapping tile and both
+    can sit in the overlap band: then the pieces of a line cut at the edge
+    between tiles side by side are joined (see `_join`), and a line read
+    slightly differently by two tiles is kept once (see `_near_duplicate`).
+    Between a tile and the one below it, only the last and first
+    `_BAND_POINTS` points can be in the band.
+    """
+    existing = list(points)
+    for position, point in enumerate(new_points):
+        for entry in existing:
+            merged = _match_point(points, entry, point, position, tile, boxes)
+            if merged is not None:
+                entry[0] = merged
+                entry[1] = [*entry[1], tile]
+                existing.remove(entry)
+                break
+        else:
+            points.append([point, [tile]])
+
+
+def _match_point(
+    points: list[list], entry: list, point: str, position: int, tile: int, boxes: list
+) -> Optional[str]:
+    """Returns one text for an existing point and a point read by another
+    tile, or None if they are different lines (see `_stitch_points`)."""
+    text, tiles = entry
+    for other in tiles:
+        relation = _overlap(boxes[other], boxes[tile])
+        if relation is None:
+            continue
+        if _normalize(text) == _normalize(point):
+            return text if len(text) >= len(point) else point
+        if relation == "below":
+            above = [previous for previous in points if other in previous[1]]
+            if position >= _BAND_POINTS or entry not in above[-_BAND_POINTS:]:
+                continue
+        else:
+            joined = _join(text, point)
+            if joined is not None:
+                return joined
+        if _near_duplicate(text, point):
+            return text if len(text) >= len(point) else point
+    return None
+
+
+def _overlap(box: list[int], other: list[int]) -> Optional[str]:
+    """How two tile boxes overlap: "side" when they sit side by side, "below"
+    when one is above the other (or diagonal to it), None when apart."""
+    width = min(box[2], other[2]) - max(box[0], other[0])
+    height = min(box[3], other[3]) - max(box[1], other[1])
+    if width <= 0 or height <= 0:
+        return None
+    if height >= 0.5 * min(box[3] - box[1], other[3] - other[1]):
+        return "side"
+    return "below"
+
+
+def merge_slides(slides: list[dict], new_slides: list[dict]) -> list[dict]:
+    """
+    Merges slides read again from part of the same board into its deck.
+
+    A new slide replaces the content of the existing slide whose title is
+    the same text (equal up to case and punctuation): that part of the board
+    was read again, so points erased or edited there are dropped. Each
+    existing slide takes at most one new slide, other slides are appended.
+    Slides are renumbered.
+    """
+    merged = [dict(slide) for slide in slides]
+    matched = set()
+    for slide in new_slides:
+        for index, existing in enumerate(merged):
+            if index not in matched and _normalize(existing["title"]) == _normalize(slide["title"]):
+                existing["content"] = slide["content"]
+                matched.add(index)
+                break
+        else:
+            matched.add(len(merged))
+            merged.append(dict(slide))
+    return [{**slide, "slide_number": index + 1} for index, slide in enumerate(merged)]
+
+
+# Shortest overlap, in characters and in words, that joins two pieces of a
+# line cut at a tile edge
+_MIN_OVERLAP = 4
+_MIN_OVERLAP_WORDS = 2
+# Similarity above which two readings with the same numbers are one line
+_NEAR_DUPLICATE = 0.9
+
+
+def _join(left: str, right: str) -> Optional[str]:
+    """
+    Joins the pieces of a line cut at the edge between two tiles side by
+    side, or returns None when they are not pieces of one line.
+
+    The end of the left tile's reading must be the start of the right
+    tile's (one of them may be the whole line), over at least
+    `_MIN_OVERLAP` characters and `_MIN_OVERLAP_WORDS` words.
+    """
+    x, y = left.lower(), right.lower()
+    match = SequenceMatcher(None, x, y, autojunk=False).find_longest_match(0, len(x), 0, len(y))
+    run = x[match.a : match.a + match.size]
+    if match.size < _MIN_OVERLAP or len(re.findall(r"\w+", run)) < _MIN_OVERLAP_WORDS:
+        return None
+    if match.a + match.size == len(x) and match.b == 0:
+        return left[: match.a] + right
+    if match.size == len(y) and match.a + match.size == len(x):
+        return left
+    if match.size == len(x) and match.b == 0:
+        return right
+    return None
+
+
+def _near_duplicate(a: str, b: str) -> bool:
+    """Whether two readings differ by a few characters only. Readings with
+    different numbers ("Sprint 10", "Sprint 11") are different lines."""
+    if re.findall(r"\d+", a) != re.findall(r"\d+", b):
+        return False
+    return SequenceMatcher(None, _normalize(a), _normalize(b), autojunk=False).ratio() >= _NEAR_DUPLICATE
+
+
+def _points(content) -> list[str]:
+    if isinstance(content, list):
+        return [str(point) for point in content]
+    return [content] if str(content).strip() else []
+
+
+def _normalize(text) -> str:
+    return re.sub(r"\W+", " ", str(text)).strip().lower()
+
+
+def split_long_slides(slides: list[dict], max_points: int = 4) -> list[dict]:
+    """
+    Splits slides with more than `max_points` bullet points into continuation
+    slides and renumbers all slides sequentially.
+    """
+    result = []
+    for slide in slides:
+        content = slide.get("content")
+        if not isinstance(content, list) or len(content) <= max_points:
+            result.append(slide)
+            continue
+        for start in range(0, len(content), max_points):
+            title = slide["title"] if start == 0 else f"{slide['title']} (cont.)"
+            result.append(
+                {**slide, "title": title, "content": content[start : start + max_points]}
+            )
+
+    return [{**slide, "slide_number": index + 1} for index, slide in enumerate(result)]
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, ValidationError
-from typing import Union, Optional
+from typing import Any, Union, Optional
+
+from .json_repair import parse_response
 
 
 class Slide(BaseModel):
@@ -14,6 +16,37 @@ class PresentationSchema(BaseModel):
     slides: list[Slide]
 
 
+class SlideGroup(BaseModel):
+    """Output of one parallel enhancement call: a part of the slides."""
+
+    slides: list[Slide]
+
+
+def parse_presentation(
+    text: str, schema: type[BaseModel] = PresentationSchema
+) -> tuple[Any, bool]:
+    """
+    Parses a model response into a presentation, validating it straight from
+    the extracted JSON text with pydantic-core. JSON repair (and the dict
+    validation of the validation stage) only run when that fails.
+
+    Args:
+        text: Raw model response
+        schema: Model to validate against (default: PresentationSchema)
+
+    Returns:
+        tuple: The presentation as a dict and whether it already passed
+        schema validation (when False it is the repaired, unvalidated value)
+
+    Raises:
+        JSONRepairError: If the response contains no recoverable JSON
+    """
+    value = parse_response(text, validate=schema.model_validate_json)
+    if isinstance(value, schema):
+        return value.model_dump(), True
+    return value, False
+
+
 def validate_vlm_output(vlm_output: dict) -> bool:
     """
     Validates VLM output against the presentation schema.
@@ -35,3 +68,131 @@ def validate_vlm_output(vlm_output: dict) -> bool:
     except Exception as e:
         print(f"Unexpected error during validation: {e}")
         return False
+
+
+def validation_errors(vlm_output: dict) -> list[dict]:
+    """
+    Returns the pydantic validation errors of a VLM output.
+
+    Args:
+        vlm_output: Dictionary returned from NVIDIA NIM VLM
+
+    Returns:
+        list[dict]: Errors with their `loc` path, empty if the output is valid
+    """
+    if not isinstance(vlm_output, dict):
+        return [{"loc": (), "msg": "Output must be a JSON object", "type": "dict_type"}]
+    try:
+        PresentationSchema(**vlm_output)
+        return []
+    except ValidationError as e:
+        return e.errors()
+
+
+def broken_slides(vlm_output: dict) -> dict[int, list[dict]]:
+    """Groups validation errors by the index of the slide they belong to."""
+    broken: dict[int, list[dict]] = {}
+    for error in validation_errors(vlm_output):
+        loc = error["loc"]
+        if len(loc) >= 2 and loc[0] == "slides" and isinstance(loc[1], int):
+            broken.setdefault(loc[1], []).append(
+                {"loc": list(loc[2:]), "msg": error["msg"]}
+            )
+    return broken
+
+
+def valid_slides(slides: list) -> list[dict]:
+    """Returns the slides that pass `Slide` validation, as dicts."""
+    valid = []
+    for slide in slides:
+        try:
+            valid.append(Slide.model_validate(slide).model_dump())
+        except ValidationError:
+            continue
+    return valid
+
+
+def fix_vlm_output(vlm_output: dict) -> dict:
+    """
+    Deterministically fixes the common shape problems of VLM output: nested
+    content arrays, "[] " prefixes, numbers as strings, missing titles or
+    slide numbers. Valid slides are returned unchanged.
+
+    Args:
+        vlm_output: Dictionary returned from NVIDIA NIM VLM
+
+    Returns:
+        dict: A copy of the output with the fixable fields repaired
+    """
+    if not isinstance(vlm_output, dict):
+        return vlm_output
+
+    slides = vlm_output.get("slides")
+    if isinstance(slides, dict):
+        slides = [slides]
+    if not isinstance(slides, list):
+        return vlm_output
+
+    fixed_slides = []
+    for index, slide in enumerate(slides):
+        if isinstance(slide, str):
+            slide = {"title": slide, "content": []}
+        if not isinstance(slide, dict):
+            fixed_slides.append(slide)
+            continue
+
+        slide = dict(slide)
+        number = slide.get("slide_number")
+        if isinstance(number, str) and number.strip().isdigit():
+            slide["slide_number"] = int(number)
+        elif not isinstance(number, int):
+            slide["slide_number"] = index + 1
+
+        title = slide.get("title")
+        if not isinstance(title, str) or not title.strip():
+            slide["title"] = _flatten_text(title) or f"Slide {index + 1}"
+
+        content = slide.get("content")
+        if not isinstance(content, str):
+            slide["content"] = [
+                item for item in (_clean_item(item) for item in _flatten(content)) if item
+            ]
+        else:
+            slide["content"] = _clean_item(content)
+
+        if slide.get("layout") is not None and not isinstance(slide["layout"], str):
+            slide["layout"] = "title_content"
+        fixed_slides.append(slide)
+
+    fixed = {**vlm_output, "slides": fixed_slides}
+    title = fixed.get("presentation_title")
+    if not isinstance(title, str) or not title.strip():
+        first_title = next(
+            (s["title"] for s in fixed_slides if isinstance(s, dict) and s.get("title")),
+            "Presentation",
+        )
+        fixed["presentation_title"] = _flatten_text(title) or first_title
+    return fixed
+
+
+def _flatten(value) -> list:
+    """Flattens nested lists/dicts of content into a flat list of items."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [item for element in value for item in _flatten(element)]
+    if isinstance(value, dict):
+        return [f"{key}: {_flatten_text(item)}" for key, item in value.items()]
+    return [value]
+
+
+def _flatten_text(value) -> str:
+    return " ".join(str(item) for item in _flatten(value)).strip()
+
+
+def _clean_item(item) -> str:
+    text = str(item).strip()
+    # The VLM sometimes prefixes bullets with "[]" checkboxes
+    if text.startswith("[]"):
+        text = text[2:].strip()
+    return text
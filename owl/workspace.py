@@ -0,0 +1,159 @@
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Callable, Optional
+
+from .cache import digest
+
+logger = logging.getLogger(__name__)
+
+# Workspaces handed out this recently are taken to be in use by a run
+_ACTIVE_SECONDS = 300
+# Least time between two cleanups
+_CLEANUP_INTERVAL = 60
+
+
+class WorkspaceManager:
+    """Per-session working directories for rendered decks.
+
+    Every invocation writes its markdown and presentation files into
+    `<root>/<session_id>/`, so concurrent sessions never overwrite each
+    other. A background thread removes workspaces older than `ttl_seconds`,
+    then the oldest ones while the total size exceeds `max_bytes`, at most
+    once a minute. Workspaces in use are never removed: those handed out in
+    the last few minutes, and those of sessions for which `in_use` (when
+    set) returns True.
+    """
+
+    def __init__(self, root: str, max_bytes: int, ttl_seconds: int):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # Whether a session is still alive, e.g. in the session store;
+        # called from the cleanup thread
+        self.in_use: Optional[Callable[[str], bool]] = None
+        self._lock = threading.Lock()
+        # Workspace name -> (session id, last time handed out)
+        self._used: dict[str, tuple[str, float]] = {}
+        self._usage = 0
+        self._last_cleanup = 0.0
+        self._cleaning = False
+
+    def path(self, session_id: str) -> str:
+        """
+        Returns (and creates) the workspace directory for a session.
+
+        Args:
+            session_id:
+                ADK session id
+
+        Returns:
+            str: Absolute path of the session workspace
+        """
+        name = _name(session_id)
+        workspace = os.path.join(self.root, name)
+        os.makedirs(workspace, exist_ok=True)
+        # Touch so that active workspaces are the last to be evicted, also
+        # after a restart
+        os.utime(workspace)
+        with self._lock:
+            self._used[name] = (session_id, time.time())
+        self._schedule_cleanup()
+        return workspace
+
+    def remove(self, session_id: str) -> None:
+        """Removes the workspace of a session that has ended."""
+        name = _name(session_id)
+        with self._lock:
+            self._used.pop(name, None)
+        workspace = os.path.join(self.root, name)
+        if os.path.isdir(workspace):
+            self._remove(workspace)
+
+    def cleanup(self) -> None:
+        """Removes expired workspaces, then the oldest until under the disk
+        cap, skipping the ones in use, and records the total size."""
+        if not os.path.isdir(self.root):
+            return
+
+        now = time.time()
+        workspaces = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            size = _dir_size(entry.path)
+            if self._in_use(entry.name, now):
+                workspaces.append((now, entry.path, size, True))
+                continue
+            modified = entry.stat().st_mtime
+            if now - modified > self.ttl_seconds and not self._in_use(entry.name, time.time()):
+                self._remove(entry.path)
+            else:
+                workspaces.append((modified, entry.path, size, False))
+
+        total = sum(size for _, _, size, _ in workspaces)
+        for _, path, size, in_use in sorted(workspaces):
+            if total <= self.max_bytes:
+                break
+            # Checked again: the workspace may have been handed out since
+            if in_use or self._in_use(os.path.basename(path), time.time()):
+                continue
+            self._remove(path)
+            total -= size
+        self._usage = total
+
+    def usage(self) -> int:
+        """Returns the total size of all workspaces in bytes, as of the last
+        cleanup."""
+        return self._usage
+
+    def _in_use(self, name: str, now: float) -> bool:
+        with self._lock:
+            session_id, used = self._used.get(name, (name, 0.0))
+            if now - used > _ACTIVE_SECONDS:
+                self._used.pop(name, None)
+        if now - used <= _ACTIVE_SECONDS:
+            return True
+        return self.in_use is not None and self.in_use(session_id)
+
+    def _schedule_cleanup(self) -> None:
+        """Starts a cleanup on a background thread unless one is running or
+        the last one is recent."""
+        with self._lock:
+            if self._cleaning or time.time() - self._last_cleanup < _CLEANUP_INTERVAL:
+                return
+            self._cleaning = True
+        threading.Thread(target=self._run_cleanup, name="owl-workspace-cleanup", daemon=True).start()
+
+    def _run_cleanup(self) -> None:
+        try:
+            self.cleanup()
+        except Exception as e:
+            logger.error(f"[workspace] Cleanup failed: {e}")
+        finally:
+            with self._lock:
+                self._cleaning = False
+                self._last_cleanup = time.time()
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        logger.info(f"[workspace] Removing {path}")
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _name(session_id: str) -> str:
+    return session_id if re.fullmatch(r"[\w-]{1,64}", session_id) else digest(session_id)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
@@ -0,0 +1,385 @@
+"""ADK API server with OWL's operational endpoints.
+
+Serves the same API as `adk api_server` (run it from the repository root)
+plus `/metrics` for Prometheus, `/metrics/summary` as JSON, binary image
+uploads (`POST /apps/{app}/users/{user}/sessions/{session}/uploads`),
+asynchronous generation jobs (`POST /jobs`, then poll `GET /jobs/{id}`) and
+`/sessions/stats` for the bounded in-memory session store:
+
+    python server.py
+"""
+
+import asyncio
+import json
+import os
+from contextlib import aclosing
+from typing import AsyncIterator
+
+import uvicorn
+from fastapi import HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from google.adk.cli import fast_api
+from google.adk.cli.api_server import RunAgentRequest
+from google.adk.cli.fast_api import get_fast_api_app
+
+from owl.agents import result_cache, workspaces
+from owl.config import (
+    JOB_QUEUE_SIZE,
+    JOB_TIMEOUT_SECONDS,
+    JOB_TTL_SECONDS,
+    JOB_WORKERS,
+    SESSION_MAX_COUNT,
+    SESSION_MAX_MB,
+    SESSION_STORE,
+    SESSION_TTL_SECONDS,
+    UPLOAD_MAX_MB,
+)
+from owl.jobs import Job, JobQueue, QueueFull
+from owl.metrics import routing_summary, vlm_retry_summary
+from owl.sessions import BoundedInMemorySessionService
+from owl.telemetry import (
+    PROMETHEUS_CONTENT_TYPE,
+    metric_lines,
+    prometheus_text,
+    stage_summary,
+)
+from owl.uploads import UploadTooLarge, save_upload, upload_uri
+
+AGENTS_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = os.getenv("OWL_HOST", "127.0.0.1")
+PORT = int(os.getenv("OWL_PORT", "8000"))
+
+session_service = (
+    BoundedInMemorySessionService(
+        max_sessions=SESSION_MAX_COUNT,
+        max_bytes=int(SESSION_MAX_MB * 1024 * 1024),
+        ttl_seconds=SESSION_TTL_SECONDS,
+    )
+    if SESSION_STORE == "memory"
+    else None
+)
+# The session service the API runs on (whichever store), see _session_service
+api_services = {}
+create_session_service = fast_api.create_session_service_from_options
+
+
+def _session_service(**kwargs):
+    # get_fast_api_app builds its own session service and takes no instance
+    api_services["sessions"] = session_service or create_session_service(**kwargs)
+    return api_services["sessions"]
+
+
+fast_api.create_session_service_from_options = _session_service
+if session_service is not None:
+    create_artifact_service = fast_api.create_artifact_service_from_options
+
+    def _artifact_service(**kwargs):
+        # Rendered decks are deleted with the session they were saved in
+        session_service.artifact_service = create_artifact_service(**kwargs)
+        return session_service.artifact_service
+
+    fast_api.create_artifact_service_from_options = _artifact_service
+    # A session's workspace lives as long as the session
+    workspaces.in_use = session_service.has_session_id
+    session_service.on_remove = workspaces.remove
+
+app = get_fast_api_app(agents_dir=AGENTS_DIR, web=False, host=HOST, port=PORT)
+# Seconds a client should wait before resubmitting when the job queue is full
+RETRY_AFTER_SECONDS = 5
+
+
+async def run_job(request: dict, job: Job) -> dict:
+    """
+    Runs the agent through this app's own `/run_sse` endpoint, in process,
+    so jobs use the same session and artifact services as the API. Slides
+    are added to the job's preview as the enhancer streams them.
+
+    Returns:
+        dict: `exports` (artifact names by format), the enhanced `slides`,
+        `warning` when part of the images could not be read and, when
+        several languages were requested, `languages` (exports by
+        language, the first one's slides are returned)
+
+    Raises:
+        RuntimeError: If the run fails or renders no presentation
+    """
+    slides, exports, languages, warning = {}, None, None, None
+    async with aclosing(_stream_events("/run_sse", request)) as events:
+        async for event in events:
+            if event.get("error") or event.get("errorMessage"):
+                raise RuntimeError(event.get("error") or event["errorMessage"])
+            metadata = event.get("customMetadata") or {}
+            if metadata.get("owl_slide"):
+                slides.setdefault(metadata.get("language"), []).append(metadata["owl_slide"])
+                job.add_slide(metadata["owl_slide"], metadata.get("language"))
+            state_delta = (event.get("actions") or {}).get("stateDelta") or {}
+            exports = state_delta.get("exports") or exports
+            languages = state_delta.get("exports_by_language") or languages
+            warning = state_delta.get("extraction_warning", warning)
+    if not exports:
+        raise RuntimeError("No presentation was generated, check the agent logs")
+    result = {"exports": exports, "slides": slides.get(None, []), "warning": warning}
+    if languages:
+        result["slides"] = slides.get(next(iter(languages)), [])
+        result["languages"] = languages
+    return result
+
+
+async def _stream_events(path: str, body: dict) -> AsyncIterator[dict]:
+    """
+    Posts to a server-sent events endpoint of this app, in process, and
+    yields its events as they are sent (httpx's ASGI transport only returns
+    the response once it is complete).
+
+    Raises:
+        RuntimeError: If the endpoint does not answer 200
+    """
+    payload = json.dumps(body).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("ascii"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"owl"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode("ascii")),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("owl", 80),
+    }
+    chunks: asyncio.Queue = asyncio.Queue()
+    request_sent = False
+    finished = asyncio.Event()
+    status = None
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # The client stays connected until the response is complete
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.put_nowait(message.get("body", b""))
+            if not message.get("more_body", False):
+                chunks.put_nowait(None)
+
+    async def call() -> None:
+        try:
+            await app(scope, receive, send)
+        finally:
+            chunks.put_nowait(None)
+
+    task = asyncio.create_task(call())
+    try:
+        buffer = b""
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            buffer += chunk
+            if status != 200:
+                continue
+            *messages, buffer = buffer.split(b"\n\n")
+            for message in messages:
+                for line in message.decode("utf-8").splitlines():
+                    if line.startswith("data:"):
+                        yield json.loads(line[len("data:"):])
+        await task
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status}: {buffer[:500].decode('utf-8', 'replace')}")
+    finally:
+        finished.set()
+        if not task.done():
+            # The job timed out or failed: stop the run
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+jobs = JobQueue(
+    run_job,
+    workers=JOB_WORKERS,
+    max_queue=JOB_QUEUE_SIZE,
+    timeout=JOB_TIMEOUT_SECONDS,
+    ttl_seconds=JOB_TTL_SECONDS,
+)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Stage latency histograms and quantiles, token, cache and disk usage."""
+    lines = []
+    if result_cache is not None:
+        stats = result_cache.stats()
+        lookups = [
+            ("", {"namespace": namespace, "result": result}, count)
+            for result, counts in (("hit", stats["hits"]), ("miss", stats["misses"]))
+            for namespace, count in sorted(counts.items())
+        ]
+        lines += metric_lines(
+            "owl_cache_requests_total", "counter", "Result cache lookups", lookups
+        )
+        lines += metric_lines(
+            "owl_cache_entries", "gauge", "Cached results", [("", {}, stats["entries"])]
+        )
+        lines += metric_lines(
+            "owl_cache_bytes", "gauge", "Size of the result cache", [("", {}, stats["bytes"])]
+        )
+    job_stats = jobs.stats()
+    lines += metric_lines(
+        "owl_jobs",
+        "gauge",
+        "Generation jobs by status",
+        [("", {"status": status}, count) for status, count in job_stats["jobs"].items()],
+    )
+    lines += metric_lines(
+        "owl_job_queue_depth",
+        "gauge",
+        "Jobs waiting for a worker",
+        [("", {}, job_stats["queue_depth"])],
+    )
+    routes = routing_summary()
+    lines += metric_lines(
+        "owl_model_responses_total",
+        "counter",
+        "Routed model calls by stage and answering model",
+        [
+            ("", {"stage": stage, "model": model}, count)
+            for stage, route in sorted(routes.items())
+            for model, count in sorted(route["models"].items())
+        ],
+    )
+    lines += metric_lines(
+        "owl_hedged_calls_total",
+        "counter",
+        "Routed model calls that were hedged, and hedges that answered first",
+        [
+            ("", {"stage": stage, "result": result}, route[key])
+            for stage, route in sorted(routes.items())
+            for result, key in (("hedged", "hedged"), ("hedge_won", "hedge_wins"))
+        ],
+    )
+    if session_service is not None:
+        session_stats = session_service.stats()
+        lines += metric_lines(
+            "owl_sessions", "gauge", "Sessions in memory", [("", {}, session_stats["sessions"])]
+        )
+        lines += metric_lines(
+            "owl_session_bytes",
+            "gauge",
+            "Estimated size of the sessions in memory",
+            [("", {}, session_stats["bytes"])],
+        )
+        lines += metric_lines(
+            "owl_session_evictions_total",
+            "counter",
+            "Sessions dropped by the session store",
+            [
+                ("", {"reason": reason}, count)
+                for reason, count in session_stats["evictions"].items()
+            ],
+        )
+    lines += metric_lines(
+        "owl_workspace_bytes",
+        "gauge",
+        "Disk used by render workspaces, as of the last cleanup",
+        [("", {}, workspaces.usage())],
+    )
+    return PlainTextResponse(
+        prometheus_text() + "\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+@app.get("/metrics/summary")
+def metrics_summary() -> dict:
+    """Per-stage p50/p95/p99 (seconds), outcomes and totals as JSON."""
+    return {
+        "stages": stage_summary(),
+        "vlm_retries": vlm_retry_summary(),
+        "routing": routing_summary(),
+        "cache": result_cache.stats() if result_cache is not None else None,
+        "jobs": jobs.stats(),
+        "sessions": session_service.stats() if session_service is not None else None,
+    }
+
+
+@app.get("/sessions/stats")
+def session_stats() -> dict:
+    """Resident sessions, their estimated size, caps and evictions."""
+    if session_service is None:
+        raise HTTPException(status_code=404, detail="OWL_SESSION_STORE is not \"memory\"")
+    return session_service.stats()
+
+
+@app.post("/apps/{app_name}/users/{user_id}/sessions/{session_id}/uploads", status_code=201)
+async def upload_image(app_name: str, user_id: str, session_id: str, request: Request) -> dict:
+    """
+    Stores an image sent as the raw request body (Content-Type: image/*).
+
+    Reference it in the `/run` message as
+    `{"fileData": {"fileUri": <fileUri>, "mimeType": <mimeType>}}`; the
+    preprocessing stage replaces it with the image. The session must exist.
+    """
+    mime_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if not mime_type.startswith("image/"):
+        raise HTTPException(status_code=415, detail="Upload an image (Content-Type: image/*)")
+    session = await api_services["sessions"].get_session(
+        app_name=app_name, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    try:
+        upload_id, size = await save_upload(
+            workspaces.path(session_id),
+            request.stream(),
+            max_bytes=int(UPLOAD_MAX_MB * 1024 * 1024),
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    return {"id": upload_id, "fileUri": upload_uri(upload_id), "mimeType": mime_type, "bytes": size}
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(req: RunAgentRequest) -> dict:
+    """
+    Queues a generation (same body as `/run`) and returns its job id at once.
+
+    Answers 429 with a Retry-After header when the queue is full.
+    """
+    request = req.model_dump(by_alias=True, exclude_none=True, mode="json")
+    request["streaming"] = False
+    try:
+        job = jobs.submit(request, req.session_id)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        ) from e
+    return {**job.to_dict(), "position": jobs.position(job)}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> dict:
+    """Status, queue position, stage progress and, once done, the result."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**job.to_dict(), "position": jobs.position(job)}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=HOST, port=PORT)
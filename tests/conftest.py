@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Importing `owl` builds the agents, keep LiteLLM from fetching its model
+# cost map over the network
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
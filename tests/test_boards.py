@@ -0,0 +1,94 @@
+import io
+import random
+
+from PIL import Image, ImageDraw
+
+from owl.boards import board_signature, changed_tiles, compare_board
+
+GRID = 4
+# One pixel of the alignment thumbnail (160 px wide) on a 2000 px photo
+STEP = 2000 // 160
+
+
+def wall(seed: int = 1) -> Image.Image:
+    """A board with short strokes of writing up to its edges, larger than
+    one photo so a photo can be taken with the camera shifted."""
+    random.seed(seed)
+    image = Image.new("RGB", (2400, 1900), "white")
+    draw = ImageDraw.Draw(image)
+    for top in range(0, 1900, 60):
+        left = random.randint(0, 80)
+        while left < 2400:
+            length = random.randint(40, 160)
+            draw.rectangle([left, top + 20, left + length, top + 34], fill="black")
+            left += length + random.randint(60, 200)
+    return image
+
+
+def photo(image: Image.Image, dx: int = 0, dy: int = 0) -> Image.Image:
+    return image.crop((200 + dx, 200 + dy, 2200 + dx, 1700 + dy))
+
+
+def test_same_photo_is_unchanged():
+    board = wall()
+    assert changed_tiles(board_signature(photo(board), GRID), photo(board), 6)[0] == []
+
+
+def test_shift_does_not_change_the_edge_tiles():
+    board = wall()
+    signature = board_signature(photo(board), GRID)
+    for dx, dy in [(3 * STEP, 0), (-6 * STEP, 0), (0, 4 * STEP), (6 * STEP, -4 * STEP)]:
+        tiles, shift = changed_tiles(signature, photo(board, dx, dy), 6)
+        assert tiles == [], (dx, dy)
+        assert shift != (0.0, 0.0)
+
+
+def test_edit_changes_its_tile_only():
+    board = wall()
+    signature = board_signature(photo(board), GRID)
+    edited = photo(board, 3 * STEP, 0)
+    # Erase writing in the middle of tile 5 (second row, second column)
+    ImageDraw.Draw(edited).rectangle([600, 450, 900, 700], fill="white")
+    assert changed_tiles(signature, edited, 6)[0] == [5]
+
+
+def test_edit_in_a_shifted_edge_tile_is_found():
+    board = wall()
+    signature = board_signature(photo(board), GRID)
+    edited = photo(board, 3 * STEP, 0)
+    # Tile 4 (second row, first column) lost part of its left edge in the shift
+    ImageDraw.Draw(edited).rectangle([200, 450, 450, 700], fill="white")
+    assert changed_tiles(signature, edited, 6)[0] == [4]
+
+
+def test_entry_without_inner_hashes_extracts_the_clipped_tiles():
+    board = wall()
+    signature = board_signature(photo(board), GRID)
+    del signature["inner_hashes"]
+    tiles, _ = changed_tiles(signature, photo(board, 3 * STEP, 0), 6)
+    # The left column is partly out of view
+    assert tiles == [0, 4, 8, 12]
+
+
+def test_other_board_is_extracted_in_full():
+    signature = board_signature(photo(wall(1)), GRID)
+    tiles, _ = changed_tiles(signature, photo(wall(2)), 6)
+    assert tiles is None or len(tiles) > 0.5 * GRID * GRID
+
+
+def test_compare_board_crops_the_changed_region():
+    board = wall()
+    data = io.BytesIO()
+    photo(board).save(data, format="PNG")
+    previous, tiles, region = compare_board(data.getvalue(), None, GRID, 6, 0.5, 90)
+    assert tiles is None and region is None
+
+    edited = photo(board)
+    ImageDraw.Draw(edited).rectangle([600, 450, 900, 700], fill="white")
+    data = io.BytesIO()
+    edited.save(data, format="PNG")
+    _, tiles, region = compare_board(data.getvalue(), previous, GRID, 6, 0.5, 90)
+    assert tiles == [5]
+    # One tile (500 x 375) with half a tile of margin on each side
+    width, height = Image.open(io.BytesIO(region)).size
+    assert width == 1000 and abs(height - 750) <= 1
@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+import owl.cache as cache_module
+from owl.cache import ResultCache, digest, make_key
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def make_cache(tmp_path, clock):
+    def make(**kwargs):
+        return ResultCache(str(tmp_path / "cache" / "results.sqlite3"), **kwargs)
+
+    return make
+
+
+def test_make_key_is_stable():
+    key = make_key("vlm", "abc", "English", 3)
+    assert key == hashlib.sha256("vlm\x1fabc\x1fEnglish\x1f3".encode("utf-8")).hexdigest()
+    assert key == make_key("vlm", "abc", "English", "3")
+    assert key != make_key("vlm", "English", "abc", 3)
+
+
+def test_digest_ignores_dict_order():
+    assert digest({"a": 1, "b": [1, 2]}) == digest({"b": [1, 2], "a": 1})
+    assert digest("text") == digest(b"text")
+
+
+def test_hits_and_misses_per_namespace(make_cache):
+    cache = make_cache()
+    assert cache.get("vlm", "k1") is None
+    cache.put("vlm", "k1", {"slides": [1]})
+    assert cache.get("vlm", "k1") == {"slides": [1]}
+    assert cache.get("enhancer", "k2") is None
+    stats = cache.stats()
+    assert stats["hits"] == {"vlm": 1}
+    assert stats["misses"] == {"vlm": 1, "enhancer": 1}
+    assert stats["entries"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.put("vlm", "a", 1)
+    clock.now += 1
+    cache.put("vlm", "b", 2)
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("vlm", "a") == 1
+    clock.now += 1
+    cache.put("vlm", "c", 3)
+    assert cache.get("vlm", "b") is None
+    assert cache.get("vlm", "a") == 1
+    assert cache.get("vlm", "c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_bound_evicts_oldest(make_cache, clock):
+    value = "x" * 100
+    cache = make_cache(max_bytes=250)
+    for key in "abc":
+        cache.put("vlm", key, value)
+        clock.now += 1
+    assert cache.get("vlm", "a") is None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] <= 250
+
+
+def test_entry_over_the_size_bound_is_not_stored(make_cache):
+    cache = make_cache(max_bytes=10)
+    cache.put("vlm", "a", "x" * 100)
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire(make_cache, clock):
+    cache = make_cache(ttl_seconds=60)
+    cache.put("vlm", "a", 1)
+    clock.now += 59
+    assert cache.get("vlm", "a") == 1
+    clock.now += 2
+    assert cache.get("vlm", "a") is None
+    # Expired entries are deleted by the next put
+    cache.put("vlm", "b", 2)
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_persist_across_instances(make_cache):
+    make_cache().put("enhancer", "a", {"title": "Plan"})
+    assert make_cache().get("enhancer", "a") == {"title": "Plan"}
+
+
+def test_async_access(make_cache):
+    cache = make_cache()
+
+    async def main():
+        await cache.aput("vlm", "a", [1, 2])
+        return await cache.aget("vlm", "a")
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_clear(make_cache):
+    cache = make_cache()
+    cache.put("vlm", "a", 1)
+    cache.clear()
+    assert cache.get("vlm", "a") is None
+    assert cache.stats()["entries"] == 0
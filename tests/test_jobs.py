@@ -0,0 +1,158 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import owl.jobs as jobs_module
+from owl.jobs import Job, JobQueue, QueueFull
+
+
+async def settle(queue: JobQueue) -> None:
+    await queue._queue.join()
+
+
+def test_jobs_run_and_keep_their_result():
+    async def run(request, job):
+        return {"echo": request["text"]}
+
+    async def main():
+        queue = JobQueue(run, workers=2)
+        job = queue.submit({"text": "hi"}, "s")
+        assert job.status == "queued"
+        await settle(queue)
+        await queue.close()
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == "done"
+    assert job.result == {"echo": "hi"}
+    # The request holds the images and is dropped once the job has run
+    assert job.request is None
+    assert job.to_dict()["result"] == {"echo": "hi"}
+
+
+def test_full_queue_raises_queue_full():
+    release = None
+
+    async def run(request, job):
+        await release.wait()
+        return {}
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        queue = JobQueue(run, workers=1, max_queue=2)
+        first = queue.submit({}, "a")
+        # Let the worker take the first job so two can wait behind it
+        await asyncio.sleep(0)
+        waiting = [queue.submit({}, name) for name in "bc"]
+        with pytest.raises(QueueFull):
+            queue.submit({}, "d")
+        stats = queue.stats()
+        positions = [queue.position(job) for job in waiting]
+        release.set()
+        await settle(queue)
+        await queue.close()
+        return first, stats, positions
+
+    first, stats, positions = asyncio.run(main())
+    assert first.status == "done"
+    assert stats["queue_depth"] == 2
+    assert stats["jobs"] == {"queued": 2, "running": 1, "done": 0, "failed": 0}
+    assert positions == [0, 1]
+
+
+def test_slow_jobs_time_out():
+    async def run(request, job):
+        await asyncio.sleep(10)
+
+    async def main():
+        queue = JobQueue(run, workers=1, timeout=0.05)
+        job = queue.submit({}, "s")
+        await settle(queue)
+        await queue.close()
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == "failed"
+    assert job.error == "Timed out after 0.05s"
+    assert job.finished_at is not None
+
+
+def test_failed_jobs_keep_the_error():
+    async def run(request, job):
+        raise ValueError("no slides")
+
+    async def main():
+        queue = JobQueue(run, workers=1)
+        job = queue.submit({}, "s")
+        await settle(queue)
+        await queue.close()
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == "failed"
+    assert job.error == "no slides"
+
+
+def test_finished_jobs_are_pruned_after_the_ttl(monkeypatch):
+    clock = SimpleNamespace(now=time.time())
+    monkeypatch.setattr(jobs_module, "time", SimpleNamespace(time=lambda: clock.now))
+
+    async def run(request, job):
+        return {}
+
+    async def main():
+        queue = JobQueue(run, workers=1, ttl_seconds=60)
+        old = queue.submit({}, "old")
+        await settle(queue)
+        clock.now += 59
+        recent = queue.submit({}, "recent")
+        await settle(queue)
+        assert queue.get(old.id) is old
+        clock.now += 2
+        # Pruning happens on submit
+        queue.submit({}, "new")
+        await settle(queue)
+        await queue.close()
+        return queue.get(old.id), queue.get(recent.id)
+
+    old, recent = asyncio.run(main())
+    assert old is None
+    assert recent is not None
+
+
+def test_streamed_slides_are_kept_per_language():
+    job = Job({}, "s")
+    job.add_slide({"title": "One"})
+    job.add_slide({"title": "Eins"}, "German")
+    job.add_slide({"title": "Zwei"}, "German")
+    job.status = "running"
+    assert job.to_dict()["slides"] == {
+        "": [{"title": "One"}],
+        "German": [{"title": "Eins"}, {"title": "Zwei"}],
+    }
+
+
+def test_running_job_reports_its_slides():
+    seen = {}
+
+    async def run(request, job):
+        job.add_slide({"title": "Plan"}, "English")
+        seen.update(job.to_dict())
+        return {}
+
+    async def main():
+        queue = JobQueue(run, workers=1)
+        job = queue.submit({}, "s")
+        await settle(queue)
+        await queue.close()
+        return job
+
+    job = asyncio.run(main())
+    assert seen["status"] == "running"
+    assert seen["slides"] == {"English": [{"title": "Plan"}]}
+    # Previews are dropped with the request once the job is finished
+    assert job.slides == {}
+    assert "slides" not in job.to_dict()
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+from owl.json_repair import (
+    JSONArrayItemStream,
+    JSONExtractor,
+    JSONRepairError,
+    extract_json,
+    loads,
+    parse_response,
+)
+
+DECK = {
+    "presentation_title": "Roadmap",
+    "slides": [
+        {"slide_number": 1, "title": "Goals", "content": ["Ship v2", "Hire"]},
+        {"slide_number": 2, "title": "Risks", "content": ["Budget"]},
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": [1, 2', {"a": [1, 2]}),
+        ('{"a": {"b": "unterminated', {"a": {"b": "unterminated"}}),
+        ('{"a": 1, "b":', {"a": 1, "b": None}),
+        ('{"title": "Plan", "content": ["one", "tw', {"title": "Plan", "content": ["one", "tw"]}),
+    ],
+)
+def test_truncated(text, expected):
+    assert loads(text) == expected
+
+
+def test_truncated_deck_keeps_the_complete_slides():
+    text = (
+        '{"presentation_title": "Roadmap", "slides": ['
+        '{"slide_number": 1, "title": "Goals", "content": ["Ship v2", "Hire"]}, '
+        '{"slide_number": 2, "title": "Risks", "content": ["Bud'
+    )
+    slides = parse_response(text)["slides"]
+    assert slides[0] == DECK["slides"][0]
+    assert slides[1]["content"] == ["Bud"]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": [1, 2, 3,], "b": 2,}', {"a": [1, 2, 3], "b": 2}),
+        ('[1, 2,\n]', [1, 2]),
+        ('{"a": {"b": 1,},}', {"a": {"b": 1}}),
+    ],
+)
+def test_trailing_comma(text, expected):
+    assert loads(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '```json\n{"a": 1}\n```',
+        'Here is the deck:\n```json\n{"a": 1}\n```\nLet me know if you need changes.',
+        '```\n{"a": 1}\n```',
+    ],
+)
+def test_fenced(text):
+    assert parse_response(text) == {"a": 1}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("{'a': 'b'}", {"a": "b"}),
+        ("{'a': \"b\"}", {"a": "b"}),
+        ("{\"a\": 'b\"}", {"a": "b"}),
+        ("{\"a\": \"b'}", {"a": "b"}),
+        ("{\"a': 1}", {"a": 1}),
+        ("{“title”: “Plan”, ‘n’: 1}", {"title": "Plan", "n": 1}),
+    ],
+)
+def test_quote_mismatch(text, expected):
+    assert loads(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, extracted, expected",
+    [
+        ("{“title”: “Plan\"} Notes: “done”", "{“title”: “Plan\"}", {"title": "Plan"}),
+        ("{‘title’: ‘Plan'} Notes: it’s done.", "{‘title’: ‘Plan'}", {"title": "Plan"}),
+        ("{‘a’: [‘x', ‘y']} {‘b’: 1}", "{‘a’: [‘x', ‘y']}", {"a": ["x", "y"]}),
+    ],
+)
+def test_smart_quotes_closed_with_straight_ones(text, extracted, expected):
+    assert extract_json(text) == extracted
+    assert loads(extracted) == expected
+
+
+def test_extractor_completes_on_a_smart_single_quoted_string():
+    extractor = JSONExtractor()
+    assert extractor.feed("{‘title’: ‘Pl") is None
+    assert extractor.feed("an'}") == "{‘title’: ‘Plan'}"
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": "it\'s"}', {"a": "it's"}),
+        ('{"a": "the \'x\', y"}', {"a": "the 'x', y"}),
+        ('{"a": "say "hi" now"}', {"a": 'say "hi" now'}),
+        # Truncated prose keeps its apostrophe
+        ('{"a": "the students\', then', {"a": "the students', then"}),
+    ],
+)
+def test_quotes_inside_strings(text, expected):
+    assert loads(text) == expected
+
+
+def test_valid_json_is_returned_as_is():
+    assert parse_response(f"Sure!\n{json.dumps(DECK)}\nDone") == DECK
+
+
+def test_validate_fast_path_falls_back_on_value_error():
+    def validate(text):
+        raise ValueError(text)
+
+    assert parse_response('{"a": 1,}', validate=validate) == {"a": 1}
+    assert parse_response('{"a": 1}', validate=lambda text: "validated") == "validated"
+
+
+def test_no_json():
+    with pytest.raises(JSONRepairError):
+        parse_response("I could not read the board.")
+
+
+def test_array_item_stream_yields_complete_slides():
+    stream = JSONArrayItemStream()
+    text = '```json\n{"presentation_title": "Roadmap", "slides": [' + ", ".join(
+        json.dumps(slide) for slide in DECK["slides"]
+    )
+    items = []
+    for start in range(0, len(text), 7):
+        items.extend(stream.feed(text[start : start + 7]))
+    assert [loads(item) for item in items] == DECK["slides"]
@@ -0,0 +1,117 @@
+import io
+import zipfile
+from xml.etree import ElementTree
+
+from owl.pptx_writer import pptx_bytes, write_pptx
+
+A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+DECK = {
+    "presentation_title": "Sprint <Review> & Plan",
+    "slides": [
+        {"title": "Goals", "content": ["Ship the **native** writer", "Cut render time"]},
+        {"title": "Notes", "content": "A single paragraph"},
+    ],
+}
+
+
+def read(data: bytes) -> dict[str, ElementTree.Element]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        return {
+            name: ElementTree.fromstring(archive.read(name))
+            for name in archive.namelist()
+            if name.endswith((".xml", ".rels"))
+        }
+
+
+def paragraphs(shape: ElementTree.Element) -> list[str]:
+    return [
+        "".join(text.text or "" for text in paragraph.iter(f"{A}t"))
+        for paragraph in shape.iter(f"{A}p")
+    ]
+
+
+def placeholders(slide: ElementTree.Element) -> dict[str, list[str]]:
+    """Paragraph texts of each placeholder of a slide, by placeholder type."""
+    shapes = {}
+    for shape in slide.iter(f"{P}sp"):
+        ph = shape.find(f"{P}nvSpPr/{P}nvPr/{P}ph")
+        shapes[ph.get("type", "body")] = paragraphs(shape)
+    return shapes
+
+
+def test_round_trip_has_the_slides_and_their_text():
+    parts = read(pptx_bytes(DECK))
+
+    # A title slide, then one slide per content slide, in order
+    slide_ids = parts["ppt/presentation.xml"].find(f"{P}sldIdLst")
+    relationships = {
+        rel.get("Id"): rel.get("Target")
+        for rel in parts["ppt/_rels/presentation.xml.rels"].iter(f"{REL}Relationship")
+    }
+    targets = [relationships[slide_id.get(f"{R}id")] for slide_id in slide_ids]
+    assert targets == [f"slides/slide{index}.xml" for index in (1, 2, 3)]
+    assert "ppt/slides/slide4.xml" not in parts
+
+    assert placeholders(parts["ppt/slides/slide1.xml"]) == {
+        "ctrTitle": ["Sprint <Review> & Plan"]
+    }
+    assert placeholders(parts["ppt/slides/slide2.xml"]) == {
+        "title": ["Goals"],
+        "body": ["Ship the native writer", "Cut render time"],
+    }
+    assert placeholders(parts["ppt/slides/slide3.xml"]) == {
+        "title": ["Notes"],
+        "body": ["A single paragraph"],
+    }
+    core = parts["docProps/core.xml"]
+    assert core.find("{http://purl.org/dc/elements/1.1/}title").text == "Sprint <Review> & Plan"
+
+
+def test_slides_use_their_layouts():
+    parts = read(pptx_bytes(DECK))
+    layouts = [
+        parts[f"ppt/slides/_rels/slide{index}.xml.rels"].find(f"{REL}Relationship").get("Target")
+        for index in (1, 2, 3)
+    ]
+    assert layouts == [
+        "../slideLayouts/slideLayout1.xml",
+        "../slideLayouts/slideLayout2.xml",
+        "../slideLayouts/slideLayout2.xml",
+    ]
+    content_types = {
+        override.get("PartName")
+        for override in parts["[Content_Types].xml"]
+        if override.get("PartName")
+    }
+    assert {f"/ppt/slides/slide{index}.xml" for index in (1, 2, 3)} <= content_types
+
+
+def test_bold_spans_become_bold_runs():
+    slide = read(pptx_bytes(DECK))["ppt/slides/slide2.xml"]
+    runs = [
+        (run.find(f"{A}t").text, run.find(f"{A}rPr").get("b"))
+        for run in slide.iter(f"{A}r")
+        if run.find(f"{A}t").text.strip(" ") in ("Ship the", "native", "writer")
+    ]
+    assert runs == [("Ship the ", None), ("native", "1"), (" writer", None)]
+
+
+def test_text_that_is_not_valid_xml_is_cleaned():
+    deck = {
+        "presentation_title": "Deck",
+        "slides": [{"title": "Bell\x07", "content": ["Tab\x0b stop", "   "]}],
+    }
+    slide = read(pptx_bytes(deck))["ppt/slides/slide2.xml"]
+    assert placeholders(slide) == {"title": ["Bell"], "body": ["Tab stop"]}
+
+
+def test_same_deck_gives_the_same_bytes(tmp_path):
+    path = tmp_path / "deck.pptx"
+    write_pptx(DECK, str(path), "uncover")
+    assert path.read_bytes() == pptx_bytes(DECK, "uncover")
+    assert pptx_bytes(DECK, "unknown") == pptx_bytes(DECK)
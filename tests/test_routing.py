@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from owl import routing
+from owl.routing import RoutedLlm, is_simple, latency_budget
+
+
+class StubLlm(BaseLlm):
+    """Answers every request with `text` after `delay` seconds."""
+
+    delay: float = 0.0
+    text: str = "ok"
+    calls: int = 0
+    cancelled: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=self.text)]))
+
+
+def request(image_bytes: int = 0) -> LlmRequest:
+    parts = [types.Part(text="Extract the slides")]
+    if image_bytes:
+        image = types.Blob(data=b"x" * image_bytes, mime_type="image/jpeg")
+        parts.append(types.Part(inline_data=image))
+    return LlmRequest(contents=[types.Content(role="user", parts=parts)])
+
+
+def calibrate(model: str, seconds: float) -> None:
+    """Records enough calls of `model` for its own p95 to be the budget."""
+    for _ in range(routing._MIN_SAMPLES):
+        routing._observe(model, False, seconds)
+
+
+def answer(llm: RoutedLlm, llm_request: LlmRequest) -> tuple[str, float]:
+    async def main():
+        started = time.perf_counter()
+        responses = [response async for response in llm.generate_content_async(llm_request)]
+        return routing.response_text(responses), time.perf_counter() - started
+
+    return asyncio.run(main())
+
+
+def routed(*candidates: StubLlm, **kwargs) -> RoutedLlm:
+    return RoutedLlm(
+        model="|".join(candidate.model for candidate in candidates),
+        candidates=list(candidates),
+        stage="test",
+        **{"hedge": True, **kwargs},
+    )
+
+
+def test_budget_is_the_recent_p95():
+    assert latency_budget("test-unseen") == routing.HEDGE_DEFAULT_SECONDS
+    for index in range(100):
+        routing._observe("test-p95", False, index / 100)
+    assert abs(latency_budget("test-p95") - routing.HEDGE_QUANTILE) < 0.02
+    # Streaming calls are timed to their first chunk and kept apart
+    assert latency_budget("test-p95", stream=True) == routing.HEDGE_DEFAULT_SECONDS
+
+
+def test_call_within_the_budget_is_not_hedged():
+    calibrate("test-fast-primary", 0.5)
+    primary = StubLlm(model="test-fast-primary", delay=0.05, text="primary")
+    backup = StubLlm(model="test-fast-backup", text="backup")
+    assert answer(routed(primary, backup), request())[0] == "primary"
+    assert backup.calls == 0
+
+
+def test_call_over_the_budget_is_hedged():
+    calibrate("test-slow-primary", 0.05)
+    primary = StubLlm(model="test-slow-primary", delay=5, text="primary")
+    backup = StubLlm(model="test-slow-backup", text="backup")
+    text, seconds = answer(routed(primary, backup), request())
+    assert text == "backup"
+    assert seconds < 1
+    # The slow call lost and was cancelled
+    assert primary.cancelled == 1
+
+
+def test_no_hedge_when_disabled():
+    calibrate("test-off-primary", 0.01)
+    primary = StubLlm(model="test-off-primary", delay=0.1, text="primary")
+    backup = StubLlm(model="test-off-backup", text="backup")
+    assert answer(routed(primary, backup, hedge=False), request())[0] == "primary"
+    assert backup.calls == 0
+
+
+def test_invalid_answer_is_hedged_right_away():
+    primary = StubLlm(model="test-invalid-primary", text="not json")
+    backup = StubLlm(model="test-invalid-backup", text="{}")
+    llm = routed(primary, backup, accept=lambda text: text.startswith("{"))
+    assert answer(llm, request())[0] == "{}"
+    assert backup.calls == 1
+
+
+def test_small_images_go_to_the_cheapest_model():
+    preferred = StubLlm(model="test-preferred", text="preferred")
+    cheap = StubLlm(model="test-cheap", text="cheap")
+    llm = routed(preferred, cheap, simple_max_bytes=1000)
+    assert llm.route(request(500)) == [cheap, preferred]
+    assert answer(llm, request(500))[0] == "cheap"
+    # Large images and text-only requests keep the preferred model
+    assert llm.route(request(5000)) == [preferred, cheap]
+    assert llm.route(request()) == [preferred, cheap]
+
+
+def test_is_simple_counts_only_images():
+    llm_request = request(600)
+    llm_request.contents[0].parts.append(
+        types.Part(inline_data=types.Blob(data=b"x" * 5000, mime_type="application/pdf"))
+    )
+    assert is_simple(llm_request, 1000)
+    llm_request.contents.append(request(600).contents[0])
+    assert not is_simple(llm_request, 1000)
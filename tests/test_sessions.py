@@ -0,0 +1,181 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.events import Event
+from google.genai import types
+
+import owl.sessions as sessions_module
+from owl.cache import digest
+from owl.sessions import BoundedInMemorySessionService
+
+APP, USER = "owl", "u"
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sessions_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def create(service, session_id: str):
+    return await service.create_session(app_name=APP, user_id=USER, session_id=session_id)
+
+
+async def resident(service, session_id: str) -> bool:
+    session = await service.get_session(app_name=APP, user_id=USER, session_id=session_id)
+    return session is not None
+
+
+def image_event(data: bytes) -> Event:
+    return Event(
+        author="user",
+        content=types.Content(
+            role="user",
+            parts=[
+                types.Part(text="Language: \nEnglish"),
+                types.Part(inline_data=types.Blob(data=data, mime_type="image/jpeg")),
+            ],
+        ),
+    )
+
+
+def test_idle_sessions_expire(clock):
+    service = BoundedInMemorySessionService(ttl_seconds=60)
+
+    async def main():
+        await create(service, "old")
+        clock.now += 61
+        await create(service, "new")
+        return await resident(service, "old"), await resident(service, "new")
+
+    assert run(main()) == (False, True)
+    assert service.evictions["ttl"] == 1
+    assert not service.has_session_id("old")
+
+
+def test_least_recently_used_idle_session_is_evicted(clock):
+    service = BoundedInMemorySessionService(max_sessions=2)
+
+    async def main():
+        await create(service, "a")
+        clock.now += 1
+        await create(service, "b")
+        clock.now += 1
+        # Reading "a" makes "b" the least recently used session
+        await resident(service, "a")
+        clock.now += sessions_module._ACTIVE_SECONDS
+        await create(service, "c")
+        return [await resident(service, name) for name in "abc"]
+
+    assert run(main()) == [True, False, True]
+    assert service.evictions["lru"] == 1
+
+
+def test_sessions_in_use_are_not_evicted(clock):
+    service = BoundedInMemorySessionService(max_sessions=1)
+
+    async def main():
+        await create(service, "a")
+        clock.now += 1
+        await create(service, "b")
+        return [await resident(service, name) for name in "ab"]
+
+    # Over the cap, but "a" was used too recently to be dropped
+    assert run(main()) == [True, True]
+    assert service.evictions["lru"] == 0
+
+
+def test_size_cap(clock):
+    service = BoundedInMemorySessionService(max_bytes=150_000)
+
+    async def main():
+        for name in "ab":
+            session = await create(service, name)
+            await service.append_event(session, image_event(b"x" * 100_000))
+            clock.now += sessions_module._ACTIVE_SECONDS + 1
+        return [await resident(service, name) for name in "ab"]
+
+    assert run(main()) == [False, True]
+    assert service.stats()["bytes"] < 150_000
+
+
+def test_strip_images(clock):
+    service = BoundedInMemorySessionService()
+    data = b"\xff\xd8" + b"x" * 5000
+
+    async def main():
+        session = await create(service, "s")
+        await service.append_event(session, image_event(data))
+        before = service.stats()["bytes"]
+        stripped = service.strip_images(app_name=APP, user_id=USER, session_id="s")
+        session = await service.get_session(app_name=APP, user_id=USER, session_id="s")
+        return before, stripped, session
+
+    before, stripped, session = run(main())
+    assert stripped == len(data)
+    parts = session.events[0].content.parts
+    assert parts[0].text == "Language: \nEnglish"
+    assert parts[1].inline_data is None
+    assert digest(data) in parts[1].text
+    assert service.stats()["bytes"] < before - 4000
+    assert service.stats()["stripped_bytes"] == len(data)
+
+
+def test_removed_sessions_lose_their_artifacts_and_workspace(clock):
+    service = BoundedInMemorySessionService(ttl_seconds=60)
+    service.artifact_service = InMemoryArtifactService()
+    removed = []
+    service.on_remove = removed.append
+    deck = types.Part(inline_data=types.Blob(data=b"pptx", mime_type="application/octet-stream"))
+
+    async def main():
+        artifacts = service.artifact_service
+        await create(service, "old")
+        for filename in ["presentation.pptx", "user:logo.png"]:
+            await artifacts.save_artifact(
+                app_name=APP, user_id=USER, session_id="old", filename=filename, artifact=deck
+            )
+        clock.now += 61
+        await create(service, "new")
+        return (
+            await artifacts.list_artifact_keys(app_name=APP, user_id=USER, session_id="old"),
+            await artifacts.list_artifact_keys(app_name=APP, user_id=USER),
+        )
+
+    session_files, user_files = run(main())
+    assert "presentation.pptx" not in session_files
+    # User-scoped artifacts outlive the session
+    assert user_files == ["user:logo.png"]
+    assert removed == ["old"]
+    assert service.stats()["deleted_artifacts"] == 1
+
+
+def test_delete_session_releases_it(clock):
+    service = BoundedInMemorySessionService()
+    removed = []
+    service.on_remove = removed.append
+
+    async def main():
+        await create(service, "s")
+        await service.delete_session(app_name=APP, user_id=USER, session_id="s")
+        return await resident(service, "s")
+
+    assert run(main()) is False
+    assert removed == ["s"]
+    assert service.stats()["sessions"] == 0
@@ -0,0 +1,135 @@
+import pytest
+
+from owl.boards import merge_revision
+from owl.utils import merge_slides, stitch_presentations
+
+# Two tiles side by side, and two tiles one above the other, with overlap
+SIDE = [[0, 0, 1150, 1000], [850, 0, 2000, 1000]]
+STACKED = [[0, 0, 1000, 1150], [0, 850, 1000, 2000]]
+APART = [[0, 0, 900, 900], [1100, 1100, 2000, 2000]]
+
+SIMILAR = [
+    ("Sprint 10", "Sprint 11"),
+    ("Q1 2024", "Q2 2024"),
+    ("Version 1.2", "Version 1.3"),
+    ("Goals", "Non-goals"),
+    ("Risks", "Risks of migration"),
+]
+
+
+def deck(*slides):
+    return {
+        "presentation_title": "Board",
+        "slides": [
+            {"slide_number": index + 1, "title": title, "content": content}
+            for index, (title, content) in enumerate(slides)
+        ],
+    }
+
+
+def titles(presentation):
+    return [slide["title"] for slide in presentation["slides"]]
+
+
+@pytest.mark.parametrize("first, second", SIMILAR)
+def test_single_tile_keeps_similar_slides(first, second):
+    stitched = stitch_presentations([deck((first, ["a"]), (second, ["b"]))], [SIDE[0]])
+    assert titles(stitched) == [first, second]
+
+
+@pytest.mark.parametrize("first, second", SIMILAR)
+def test_similar_titles_are_different_slides(first, second):
+    stitched = stitch_presentations([deck((first, ["a"])), deck((second, ["b"]))], SIDE)
+    assert titles(stitched) == [first, second]
+
+
+@pytest.mark.parametrize("first, second", SIMILAR)
+def test_similar_points_are_kept(first, second):
+    stitched = stitch_presentations(
+        [deck(("Plan", [first])), deck(("Plan", [second]))], SIDE
+    )
+    assert stitched["slides"][0]["content"] == [first, second]
+
+
+def test_points_of_one_tile_are_kept():
+    stitched = stitch_presentations([deck(("Plan", ["Ship it", "Ship it"]))], [SIDE[0]])
+    assert stitched["slides"][0]["content"] == ["Ship it", "Ship it"]
+
+
+def test_same_title_is_merged_up_to_case_and_punctuation():
+    stitched = stitch_presentations(
+        [deck(("Next steps:", ["Hire two engineers"])), deck(("next steps", ["Book venue"]))],
+        SIDE,
+    )
+    assert titles(stitched) == ["Next steps:"]
+    assert stitched["slides"][0]["content"] == ["Hire two engineers", "Book venue"]
+
+
+def test_line_cut_between_tiles_side_by_side_is_joined():
+    stitched = stitch_presentations(
+        [deck(("Plan", ["Migrate the billing serv"])), deck(("Plan", ["billing service to Postgres"]))],
+        SIDE,
+    )
+    assert stitched["slides"][0]["content"] == ["Migrate the billing service to Postgres"]
+
+
+def test_line_read_twice_in_the_band_is_kept_once():
+    stitched = stitch_presentations(
+        [
+            deck(("Plan", ["Kickoff", "Write the design doc"])),
+            deck(("Plan", ["Write the desing doc", "Review with the team"])),
+        ],
+        STACKED,
+    )
+    assert stitched["slides"][0]["content"] == [
+        "Kickoff",
+        "Write the design doc",
+        "Review with the team",
+    ]
+
+
+def test_near_duplicates_outside_the_band_are_kept():
+    stitched = stitch_presentations(
+        [
+            deck(("Plan", ["Write the design doc", "Kickoff", "Demo"])),
+            deck(("Plan", ["Retro", "Budget", "Write the desing doc"])),
+        ],
+        STACKED,
+    )
+    assert len(stitched["slides"][0]["content"]) == 6
+
+
+def test_tiles_apart_are_not_merged():
+    stitched = stitch_presentations([deck(("Notes", ["a"])), deck(("Notes", ["a"]))], APART)
+    assert titles(stitched) == ["Notes", "Notes"]
+
+
+@pytest.mark.parametrize("first, second", SIMILAR)
+def test_revision_keeps_similar_slides(first, second):
+    revised = merge_revision(deck((first, ["a"])), deck((second, ["b"])))
+    assert titles(revised) == [first, second]
+
+
+def test_revision_replaces_the_points_of_changed_slides():
+    revised = merge_revision(
+        deck(("Sprint 10", ["Fix login", "Ship v2"]), ("Risks", ["Budget"])),
+        deck(("Sprint 10", ["Fix login", "Ship v3", "Write docs"])),
+    )
+    assert revised["slides"][0]["content"] == ["Fix login", "Ship v3", "Write docs"]
+    assert "Ship v2" not in revised["slides"][0]["content"]
+    # Slides outside the changed region are kept as they were
+    assert revised["slides"][1]["content"] == ["Budget"]
+
+
+def test_revision_drops_erased_points():
+    revised = merge_revision(
+        deck(("Todo", ["Call Anna", "Book room"])),
+        deck(("Todo", ["Book room"])),
+    )
+    assert revised["slides"][0]["content"] == ["Book room"]
+
+
+def test_merge_slides_renumbers():
+    slides = merge_slides(deck(("A", "x"))["slides"], deck(("B", "y"), ("A", "x"))["slides"])
+    assert [(slide["slide_number"], slide["title"]) for slide in slides] == [(1, "A"), (2, "B")]
+    assert slides[0]["content"] == "x"
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from owl.telemetry import current_span, record_usage, span, span_events, stage_summary
+
+
+def usage(prompt: int, completion: int = 0):
+    return SimpleNamespace(
+        prompt_token_count=prompt,
+        candidates_token_count=completion,
+        cached_content_token_count=0,
+    )
+
+
+def test_nested_spans_add_usage_to_parents():
+    with span("test_outer") as outer:
+        with span("test_inner") as inner:
+            assert current_span() is inner
+            assert inner.parent is outer
+            record_usage(usage(10, 2))
+        assert current_span() is outer
+    assert current_span() is None
+    assert outer.attrs["prompt_tokens"] == 10
+    assert inner.attrs["completion_tokens"] == 2
+
+
+def test_span_events_is_current_only_inside_the_generator():
+    seen = []
+
+    async def events(stage):
+        for index in range(3):
+            seen.append(current_span() is stage)
+            with span("test_step") as step:
+                assert step.parent is stage
+                record_usage(usage(5))
+            await asyncio.sleep(0)
+            yield index
+
+    async def consume():
+        items = []
+        async for item in span_events("test_events", events):
+            # The consumer does not see the stage while it is suspended
+            assert current_span() is None
+            items.append(item)
+        return items
+
+    assert asyncio.run(consume()) == [0, 1, 2]
+    assert seen == [True, True, True]
+    assert stage_summary()["test_events"]["prompt_tokens"] >= 15
+
+
+def test_span_events_closed_from_another_task():
+    async def events(stage):
+        yield 1
+        yield 2
+
+    async def main():
+        stream = span_events("test_closed", events)
+        # Started in one task and closed in another, as a dropped
+        # generator is finalized by the event loop
+        assert await asyncio.create_task(stream.__anext__()) == 1
+        await asyncio.create_task(stream.aclose())
+        return current_span()
+
+    assert asyncio.run(main()) is None
+    assert stage_summary()["test_closed"]["outcomes"] == {"cancelled": 1}
+
+
+def test_span_events_marks_errors():
+    async def events(stage):
+        yield 1
+        raise RuntimeError("broken")
+
+    async def consume():
+        return [item async for item in span_events("test_error", events)]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(consume())
+    assert stage_summary()["test_error"]["outcomes"] == {"error": 1}
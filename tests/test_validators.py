@@ -0,0 +1,127 @@
+from owl.utils import split_long_slides
+from owl.validators import (
+    broken_slides,
+    fix_vlm_output,
+    parse_presentation,
+    valid_slides,
+    validation_errors,
+)
+
+
+def deck(*slides) -> dict:
+    return {"presentation_title": "Deck", "slides": list(slides)}
+
+
+def test_valid_output_is_unchanged():
+    output = deck({"slide_number": 1, "title": "Plan", "content": ["One", "Two"]})
+    assert fix_vlm_output(output) == output
+    assert broken_slides(output) == {}
+
+
+def test_missing_titles_are_filled_in():
+    output = {
+        "slides": [
+            {"content": ["One"]},
+            {"title": "  ", "content": ["Two"]},
+            {"title": ["Nested", "title"], "content": ["Three"]},
+        ]
+    }
+    fixed = fix_vlm_output(output)
+    assert [slide["title"] for slide in fixed["slides"]] == ["Slide 1", "Slide 2", "Nested title"]
+    # The presentation title falls back to the first slide's
+    assert fixed["presentation_title"] == "Slide 1"
+    assert validation_errors(fixed) == []
+
+
+def test_content_that_is_not_a_list_is_flattened():
+    output = deck(
+        {"title": "Nested", "content": [["One", ["Two"]], None, "[] Three", "  "]},
+        {"title": "Mapping", "content": {"Owner": "Ana", "Due": ["Friday"]}},
+        {"title": "Number", "content": 42},
+        {"title": "Text", "content": "[] A single paragraph "},
+    )
+    fixed = fix_vlm_output(output)
+    assert [slide["content"] for slide in fixed["slides"]] == [
+        ["One", "Two", "Three"],
+        ["Owner: Ana", "Due: Friday"],
+        ["42"],
+        "A single paragraph",
+    ]
+    assert validation_errors(fixed) == []
+
+
+def test_slide_numbers_and_shapes_are_repaired():
+    output = deck(
+        {"slide_number": "2", "title": "Two", "content": [], "layout": 3},
+        {"slide_number": None, "title": "Three", "content": []},
+        "Only a title",
+    )
+    slides = fix_vlm_output(output)["slides"]
+    assert [slide["slide_number"] for slide in slides] == [2, 2, 3]
+    assert slides[0]["layout"] == "title_content"
+    assert slides[2] == {"slide_number": 3, "title": "Only a title", "content": []}
+
+    # A single slide object is wrapped in a list
+    assert fix_vlm_output({"slides": {"title": "One"}})["slides"][0]["title"] == "One"
+
+
+def test_unfixable_output_is_returned_as_is():
+    assert fix_vlm_output(["not", "a", "deck"]) == ["not", "a", "deck"]
+    assert fix_vlm_output({"slides": "none"}) == {"slides": "none"}
+
+
+def test_broken_slides_are_grouped_by_index():
+    output = deck(
+        {"slide_number": 1, "title": "Fine", "content": []},
+        {"slide_number": "x", "content": [{"point": 1}]},
+        "not a slide",
+    )
+    broken = broken_slides(output)
+    assert sorted(broken) == [1, 2]
+    assert {tuple(error["loc"][:1]) for error in broken[1]} == {
+        ("slide_number",),
+        ("title",),
+        ("content",),
+    }
+    assert [error["loc"] for error in broken[2]] == [[]]
+    # Errors outside the slides have no slide to belong to
+    assert broken_slides({"slides": []}) == {}
+    assert broken_slides("text") == {}
+
+
+def test_valid_slides_skips_the_broken_ones():
+    slides = [
+        {"slide_number": 1, "title": "Fine", "content": "Text"},
+        {"slide_number": 2, "content": []},
+        None,
+    ]
+    assert valid_slides(slides) == [
+        {"slide_number": 1, "title": "Fine", "content": "Text", "layout": "title_content"}
+    ]
+
+
+def test_overlong_slides_are_split_after_the_repair():
+    points = [f"Point {index}" for index in range(1, 11)]
+    fixed = fix_vlm_output(deck({"title": "Backlog", "content": points}))
+    # The repair keeps every point, splitting is a separate step
+    assert fixed["slides"][0]["content"] == points
+    slides = split_long_slides(fixed["slides"] + [{"title": "End", "content": ["Done"]}])
+    assert [(slide["slide_number"], slide["title"], len(slide["content"])) for slide in slides] == [
+        (1, "Backlog", 4),
+        (2, "Backlog (cont.)", 4),
+        (3, "Backlog (cont.)", 2),
+        (4, "End", 1),
+    ]
+    assert [point for slide in slides[:3] for point in slide["content"]] == points
+
+
+def test_parse_presentation_repairs_before_validating():
+    value, valid = parse_presentation(
+        'Here it is: {"presentation_title": "Deck", "slides": [{"slide_number": 1, '
+        '"title": "Plan", "content": ["One"]}]}'
+    )
+    assert valid and value["slides"][0]["layout"] == "title_content"
+
+    value, valid = parse_presentation('{"slides": [{"title": "Plan", "content": ["One",]')
+    assert not valid
+    assert value == {"slides": [{"title": "Plan", "content": ["One"]}]}
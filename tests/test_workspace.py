@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import owl.workspace as workspace_module
+from owl.cache import digest
+from owl.workspace import WorkspaceManager
+
+TTL = 3600
+
+
+class Clock:
+    def __init__(self):
+        # Directory mtimes are real, so the fake clock starts at real time
+        self.now = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(workspace_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def workspaces(tmp_path, clock):
+    manager = WorkspaceManager(str(tmp_path / "ws"), max_bytes=10_000, ttl_seconds=TTL)
+    # No background cleanup unless a test asks for it
+    manager._last_cleanup = clock.now
+    return manager
+
+
+def make(workspaces, session_id: str, size: int = 0, modified: float = None) -> str:
+    path = workspaces.path(session_id)
+    if size:
+        with open(os.path.join(path, "presentation.pptx"), "wb") as f:
+            f.write(b"x" * size)
+    if modified is not None:
+        os.utime(path, (modified, modified))
+    return path
+
+
+def names(workspaces) -> list[str]:
+    return sorted(os.listdir(workspaces.root))
+
+
+def test_expired_workspaces_are_removed(workspaces, clock):
+    start = clock.now
+    make(workspaces, "old", modified=start - TTL - 10)
+    make(workspaces, "recent", modified=start)
+    # Neither was handed out in the last few minutes
+    clock.now += workspace_module._ACTIVE_SECONDS + 1
+    workspaces.cleanup()
+    assert names(workspaces) == ["recent"]
+
+
+def test_oldest_workspaces_are_removed_over_the_disk_cap(workspaces, clock):
+    workspaces.max_bytes = 2500
+    start = clock.now
+    for index, session_id in enumerate(["a", "b", "c"]):
+        make(workspaces, session_id, size=1000, modified=start + index)
+    clock.now += workspace_module._ACTIVE_SECONDS + 10
+    workspaces.cleanup()
+    assert names(workspaces) == ["b", "c"]
+    assert workspaces.usage() == 2000
+
+
+def test_workspaces_in_use_are_kept(workspaces, clock):
+    start = clock.now
+    make(workspaces, "alive", size=1000, modified=start - TTL - 10)
+    make(workspaces, "ended", size=1000, modified=start - TTL - 10)
+    clock.now += workspace_module._ACTIVE_SECONDS + 1
+    workspaces.in_use = lambda session_id: session_id == "alive"
+    workspaces.cleanup()
+    assert names(workspaces) == ["alive"]
+
+
+def test_recently_handed_out_workspaces_are_kept(workspaces, clock):
+    workspaces.max_bytes = 0
+    make(workspaces, "running", size=1000, modified=clock.now - TTL - 10)
+    clock.now += workspace_module._ACTIVE_SECONDS - 1
+    workspaces.cleanup()
+    assert names(workspaces) == ["running"]
+    # Still counted, although it cannot be removed
+    assert workspaces.usage() == 1000
+
+
+def test_remove(workspaces):
+    make(workspaces, "done", size=10)
+    workspaces.remove("done")
+    workspaces.remove("unknown")
+    assert names(workspaces) == []
+
+
+def test_unsafe_session_ids_are_hashed(workspaces):
+    path = workspaces.path("../escape")
+    assert os.path.dirname(path) == workspaces.root
+    assert os.path.basename(path) == digest("../escape")
+
+
+def test_cleanup_runs_in_the_background_at_most_once_per_interval(workspaces, clock):
+    start = clock.now
+    make(workspaces, "old", modified=start - TTL - 10)
+    clock.now += workspace_module._CLEANUP_INTERVAL + workspace_module._ACTIVE_SECONDS + 1
+
+    workspaces.path("new")
+    for _ in range(100):
+        if not workspaces._cleaning:
+            break
+        time.sleep(0.05)
+    assert names(workspaces) == ["new"]
+
+    # Within the interval, handing out a workspace starts no cleanup
+    threads = threading.active_count()
+    workspaces.path("other")
+    assert not workspaces._cleaning
+    assert threading.active_count() == threads